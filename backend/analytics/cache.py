@@ -0,0 +1,58 @@
+import hashlib
+import json
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+RESULT_TTL = 60 * 60 * 24
+VERSION_TTL = None
+
+
+def _version_key(user_id):
+    return f"analytics:version:{user_id}"
+
+
+def data_version(user_id):
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        # Start od znacznika czasu, żeby po wyparciu klucza nie wrócić do numeru użytego wcześniej
+        cache.add(_version_key(user_id), time.time_ns(), VERSION_TTL)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def _bump(user_id):
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.add(_version_key(user_id), time.time_ns(), VERSION_TTL)
+
+
+def bump_version(user_id):
+    # Po commicie – inaczej równoległy odczyt mógłby zapisać stare dane pod nową wersją
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+def process_local(backend=None):
+    # LocMemCache to osobny cache w każdym procesie – podbicie wersji w jednym workerze nie dociera do innych
+    return isinstance(backend or cache, LocMemCache)
+
+
+def cached_for_user(user_id, name, params, compute, timeout=RESULT_TTL):
+    """
+    Wynik `compute()` z cache, klucz = użytkownik + aktualna wersja jego danych + parametry.
+    Zapis dowolnych danych użytkownika podbija wersję, więc stare wyniki po prostu przestają być trafiane.
+    Przy cache lokalnym dla procesu inny worker może jeszcze zwracać wynik sprzed zapisu – dlatego tam
+    czas życia jest ograniczony do ANALYTICS_LOCAL_CACHE_TTL.
+    """
+    if process_local():
+        timeout = min(timeout, settings.ANALYTICS_LOCAL_CACHE_TTL)
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    key = f"analytics:{user_id}:{data_version(user_id)}:{name}:{digest}"
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.set(key, result, timeout)
+    return result
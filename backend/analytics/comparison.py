@@ -0,0 +1,208 @@
+import math
+import numpy as np
+from django.db.models import Count, FloatField, Q, Sum
+from django.db.models.functions import Cast, ExtractHour, ExtractIsoWeekDay
+from .engine import wilson_interval
+
+MAX_PLAYBOOKS = 20
+BETA_ITERATIONS = 200
+BETA_EPSILON = 1e-12
+BETA_TINY = 1e-300
+
+# Źródło -> (relacja użytkownika, pole R, lookup instrumentu, pole przestrzegania zasad albo None)
+SOURCES = {
+    'logs': ('analytics_trade_logs', 'realized_r', 'instrument__name', None),
+    'trades': ('trades', 'realized_r_multiple', 'instrument', 'rules_followed'),
+}
+
+_lgamma = np.vectorize(math.lgamma, otypes=[float])
+_erfc = np.vectorize(math.erfc, otypes=[float])
+
+
+def _r(field):
+    return Cast(field, FloatField())
+
+
+def load_cells(user, source, playbook_ids):
+    """
+    Jedno zapytanie GROUP BY (strategia, instrument, dzień tygodnia, godzina[, rules_followed]) z liczbą
+    trade'ów, sumą R, sumą R² i liczbą wygranych – statystyki dostateczne dla średnich, wariancji i testów.
+    """
+    relation, r_field, instrument, rules = SOURCES[source]
+    dimensions = ['strategy_id', instrument, 'weekday', 'hour'] + ([rules] if rules else [])
+    rows = (
+        getattr(user, relation)
+        .filter(strategy_id__in=playbook_ids)
+        .order_by()
+        .annotate(weekday=ExtractIsoWeekDay('date'), hour=ExtractHour('date'))
+        .values_list(*dimensions)
+        .annotate(
+            trades=Count('pk'),
+            sum_r=Sum(_r(r_field)),
+            sum_r2=Sum(_r(r_field) * _r(r_field), output_field=FloatField()),
+            wins=Count('pk', filter=Q(**{f'{r_field}__gt': 0})),
+        )
+    )
+    return list(rows), ['instrument', 'weekday', 'hour'] + (['rules_followed'] if rules else [])
+
+
+def _betacf(a, b, x):
+    # Ułamek łańcuchowy niepełnej funkcji beta (metoda Lentza), na całych tablicach naraz
+    def guard(value):
+        return np.where(np.abs(value) < BETA_TINY, BETA_TINY, value)
+
+    c = np.ones_like(x)
+    d = 1 / guard(1 - (a + b) * x / (a + 1))
+    h = d
+    for m in range(1, BETA_ITERATIONS + 1):
+        aa = m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m))
+        d = 1 / guard(1 + aa * d)
+        c = guard(1 + aa / c)
+        h = h * d * c
+        aa = -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))
+        d = 1 / guard(1 + aa * d)
+        c = guard(1 + aa / c)
+        delta = d * c
+        h = h * delta
+        if np.all(np.abs(delta - 1) < BETA_EPSILON):
+            break
+    return h
+
+
+def betainc(a, b, x):
+    """Regularyzowana niepełna funkcja beta I_x(a, b), wektorowo (bez SciPy)."""
+    a, b, x = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in (a, b, x)))
+    swap = x > (a + 1) / (a + b + 2)
+    a, b, x = np.where(swap, b, a), np.where(swap, a, b), np.where(swap, 1 - x, x)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        front = np.exp(_lgamma(a + b) - _lgamma(a) - _lgamma(b) + a * np.log(x) + b * np.log1p(-x)) / a
+        result = np.where(x > 0, front * _betacf(a, b, x), 0.0)
+    return np.where(swap, 1 - result, result)
+
+
+def welch_test(n1, mean1, var1, n2, mean2, var2):
+    """Test t Welcha dla różnicy średnich R (dwustronny): t, stopnie swobody, p. NaN gdy test niemożliwy."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s1, s2 = var1 / n1, var2 / n2
+        se = np.sqrt(s1 + s2)
+        t = (mean1 - mean2) / se
+        df = (s1 + s2) ** 2 / (s1 ** 2 / (n1 - 1) + s2 ** 2 / (n2 - 1))
+        valid = (n1 > 1) & (n2 > 1) & (se > 0)
+        t, df = np.where(valid, t, np.nan), np.where(valid, df, np.nan)
+        p = np.where(valid, betainc(np.where(valid, df, 1) / 2, 0.5,
+                                    np.where(valid, df / (df + t ** 2), 1)), np.nan)
+    return t, df, p
+
+
+def proportion_test(wins1, n1, wins2, n2):
+    """Dwustronny test z dla różnicy win rate (wspólna proporcja)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pooled = (wins1 + wins2) / (n1 + n2)
+        se = np.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
+        z = (wins1 / n1 - wins2 / n2) / se
+        valid = (n1 > 0) & (n2 > 0) & (se > 0)
+        z = np.where(valid, z, np.nan)
+        p = np.where(valid, _erfc(np.abs(np.where(valid, z, 0)) / math.sqrt(2)), np.nan)
+    return z, p
+
+
+def holm(p):
+    # Poprawka Holma-Bonferroniego na porównania wielokrotne; NaN (brak testu) nie liczy się do rodziny
+    adjusted = np.full_like(p, np.nan)
+    tested = np.flatnonzero(~np.isnan(p))
+    if tested.size:
+        order = tested[np.argsort(p[tested], kind='stable')]
+        scaled = (tested.size - np.arange(tested.size)) * p[order]
+        adjusted[order] = np.minimum(np.maximum.accumulate(scaled), 1.0)
+    return adjusted
+
+
+def _summary(trades, sum_r, sum_r2, wins):
+    # Średnia, wariancja z próby (ddof=1) i win rate z sum; tablice dowolnego kształtu
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(trades > 0, sum_r / trades, np.nan)
+        variance = np.where(trades > 1, np.maximum(sum_r2 - trades * mean ** 2, 0) / (trades - 1), np.nan)
+        win_rate = np.where(trades > 0, wins / trades, np.nan)
+    return mean, variance, win_rate
+
+
+def _number(value, digits=4):
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def compare_strategies(user, source, playbooks):
+    """
+    Porównanie playbooków: podsumowanie każdej strategii, rozbicie R po instrumencie, dniu tygodnia
+    (ISO, 1 = poniedziałek), godzinie[ i rules_followed] oraz testy istotności dla każdej pary strategii.
+    """
+    playbook_ids = [playbook.pk for playbook in playbooks]
+    rows, dimensions = load_cells(user, source, playbook_ids)
+    position = {playbook_id: index for index, playbook_id in enumerate(playbook_ids)}
+    count = len(playbook_ids)
+
+    strategy = np.fromiter((position[row[0]] for row in rows), dtype=np.intp, count=len(rows))
+    measures = np.array([row[-4:] for row in rows], dtype=float).reshape(len(rows), 4)
+    measures = np.nan_to_num(measures)
+
+    totals = [np.bincount(strategy, weights=measures[:, column], minlength=count) for column in range(4)]
+    trades, sum_r, sum_r2, wins = totals
+    mean, variance, win_rate = _summary(*totals)
+
+    result = {'source': source, 'strategies': [], 'breakdown': {}, 'tests': []}
+    for index, playbook in enumerate(playbooks):
+        result['strategies'].append({
+            'id': playbook.pk,
+            'title': playbook.title,
+            'trades': int(trades[index]),
+            'total_r': round(float(sum_r[index]), 4),
+            'expectancy': _number(mean[index]),
+            'std_r': _number(np.sqrt(variance[index])),
+            'win_rate': _number(win_rate[index]),
+            'win_rate_ci_95': wilson_interval(int(wins[index]), int(trades[index])),
+        })
+
+    for column, dimension in enumerate(dimensions, start=1):
+        values, codes = np.unique(np.array([row[column] for row in rows], dtype=object), return_inverse=True)
+        cells = strategy * values.size + codes.reshape(-1)
+        grid = [
+            np.bincount(cells, weights=measures[:, measure], minlength=count * values.size).reshape(count, values.size)
+            for measure in range(4)
+        ]
+        cell_mean, _, cell_win_rate = _summary(*grid)
+        result['breakdown'][dimension] = [
+            {
+                'value': value,
+                'strategies': [
+                    {
+                        'id': playbook_ids[index],
+                        'trades': int(grid[0][index, value_index]),
+                        'total_r': round(float(grid[1][index, value_index]), 4),
+                        'expectancy': _number(cell_mean[index, value_index]),
+                        'win_rate': _number(cell_win_rate[index, value_index]),
+                    }
+                    for index in range(count)
+                ],
+            }
+            for value_index, value in enumerate(values)
+        ]
+
+    first, second = np.triu_indices(count, k=1)
+    t, df, p = welch_test(trades[first], mean[first], variance[first], trades[second], mean[second], variance[second])
+    z, win_rate_p = proportion_test(wins[first], trades[first], wins[second], trades[second])
+    p_holm, win_rate_p_holm = holm(p), holm(win_rate_p)
+    for pair in range(first.size):
+        a, b = first[pair], second[pair]
+        result['tests'].append({
+            'a': playbook_ids[a],
+            'b': playbook_ids[b],
+            'expectancy_diff': _number(mean[a] - mean[b]),
+            't': _number(t[pair]),
+            'df': _number(df[pair], 2),
+            'p_value': _number(p[pair]),
+            'p_value_holm': _number(p_holm[pair]),
+            'win_rate_diff': _number(win_rate[a] - win_rate[b]),
+            'z': _number(z[pair]),
+            'win_rate_p_value': _number(win_rate_p[pair]),
+            'win_rate_p_value_holm': _number(win_rate_p_holm[pair]),
+        })
+    return result
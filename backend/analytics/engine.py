@@ -0,0 +1,174 @@
+import math
+import numpy as np
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from rest_framework.exceptions import ValidationError
+from .models import TradeLog
+from .montecarlo import simulate
+from .cache import cached_for_user
+
+Z_95 = 1.959964
+SQN_MAX_TRADES = 100
+MAX_HISTOGRAM_BINS = 200
+MONTE_CARLO_CACHE_TTL = 60 * 60 * 24
+# trades × paths liczone w trakcie requestu (~0,4 s); większe symulacje idą do zadania w tle
+MONTE_CARLO_MAX_SYNC_STEPS = 10_000_000
+
+
+def load_trade_log_r(user, playbook_id=None):
+    # Jedno przejście values_list, rzutowanie na float po stronie bazy – bez obiektów modelu i Decimali
+    logs = user.analytics_trade_logs.all()
+    if playbook_id is not None:
+        logs = logs.filter(strategy_id=playbook_id)
+    rows = logs.order_by('date', 'id').values_list(Cast('realized_r', FloatField()), flat=True)
+    return np.fromiter(rows.iterator(chunk_size=5000), dtype=float)
+
+
+def load_trade_columns(user, playbook_id=None, sample_id=None):
+    trades = user.trades.all()
+    if playbook_id is not None:
+        trades = trades.filter(strategy_id=playbook_id)
+    if sample_id is not None:
+        trades = trades.filter(sample_id=sample_id)
+    rows = trades.order_by('date', 'id').values_list(
+        Cast('realized_r_multiple', FloatField()), Cast('realized_pnl', FloatField())
+    )
+    columns = np.fromiter(rows.iterator(chunk_size=5000), dtype=np.dtype((float, 2)))
+    return columns[:, 0], columns[:, 1]
+
+
+def _runs(mask):
+    # Długości kolejnych serii True w tablicy logicznej
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges[1::2] - edges[::2]
+
+
+def streaks(r):
+    wins, losses = r > 0, r < 0
+    win_runs, loss_runs = _runs(wins), _runs(losses)
+
+    current = 0
+    if r.size and r[-1] != 0:
+        sign = np.sign(r)
+        same = np.flatnonzero(sign != sign[-1])
+        current = int(r.size - (same[-1] + 1 if same.size else 0)) * int(sign[-1])
+
+    return {
+        'longest_win': int(win_runs.max()) if win_runs.size else 0,
+        'longest_loss': int(loss_runs.max()) if loss_runs.size else 0,
+        'current': current,
+    }
+
+
+def wilson_interval(successes, total, z=Z_95):
+    if not total:
+        return [0.0, 0.0]
+    p = successes / total
+    denominator = 1 + z ** 2 / total
+    center = (p + z ** 2 / (2 * total)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / total + z ** 2 / (4 * total ** 2)) / denominator
+    return [round(center - margin, 4), round(center + margin, 4)]
+
+
+def r_histogram(r, bin_width=0.5):
+    if not r.size:
+        return []
+    low = math.floor(r.min() / bin_width) * bin_width
+    high = math.ceil(r.max() / bin_width) * bin_width
+    if high <= low:
+        high = low + bin_width
+    bin_count = min(int(round((high - low) / bin_width)), MAX_HISTOGRAM_BINS)
+    counts, edges = np.histogram(r, bins=bin_count, range=(low, high))
+    return [
+        {'from': round(float(edges[i]), 4), 'to': round(float(edges[i + 1]), 4), 'count': int(counts[i])}
+        for i in range(counts.size)
+    ]
+
+
+def max_drawdown(values):
+    if not values.size:
+        return 0.0
+    equity = np.cumsum(values)
+    peaks = np.maximum.accumulate(np.maximum(equity, 0))
+    return float((peaks - equity).max())
+
+
+def strategy_statistics(r, pnl=None, bin_width=0.5):
+    """Statystyki serii R-multiple (w kolejności chronologicznej), liczone wektorowo."""
+    count = int(r.size)
+    if not count:
+        return {'trades': 0}
+
+    wins = int(np.count_nonzero(r > 0))
+    losses = int(np.count_nonzero(r < 0))
+    mean = float(r.mean())
+    std = float(r.std(ddof=1)) if count > 1 else 0.0
+    downside = r[r < 0]
+    downside_std = float(np.sqrt(np.mean(downside ** 2))) if downside.size else 0.0
+    gross_loss = float(-downside.sum())
+
+    result = {
+        'trades': count,
+        'expectancy': round(mean, 4),
+        'std_r': round(std, 4),
+        'sqn': round(math.sqrt(min(count, SQN_MAX_TRADES)) * mean / std, 4) if std else None,
+        'sharpe_r': round(mean / std, 4) if std else None,
+        'sortino_r': round(mean / downside_std, 4) if downside_std else None,
+        'total_r': round(float(r.sum()), 4),
+        'win_rate': round(wins / count, 4),
+        'win_rate_ci_95': wilson_interval(wins, count),
+        'wins': wins,
+        'losses': losses,
+        'breakevens': count - wins - losses,
+        'avg_win_r': round(float(r[r > 0].mean()), 4) if wins else 0.0,
+        'avg_loss_r': round(float(downside.mean()), 4) if losses else 0.0,
+        'profit_factor': round(float(r[r > 0].sum()) / gross_loss, 4) if gross_loss else None,
+        'max_drawdown_r': round(max_drawdown(r), 4),
+        'percentiles_r': dict(zip(
+            ('p5', 'p25', 'p50', 'p75', 'p95'),
+            (round(float(value), 4) for value in np.percentile(r, [5, 25, 50, 75, 95])),
+        )),
+        'streaks': streaks(r),
+        'histogram': r_histogram(r, bin_width),
+    }
+    if pnl is not None:
+        result['total_pnl'] = round(float(pnl.sum()), 2)
+        result['avg_pnl'] = round(float(pnl.mean()), 2)
+        result['max_drawdown_pnl'] = round(max_drawdown(pnl), 2)
+    return result
+
+
+def monte_carlo_options(params):
+    # Wspólne dla /playbooks/<id>/monte-carlo/ i zadania w tle: trades, paths, seed, ruin_r
+    try:
+        options = {
+            'n_trades': int(params.get('trades', 100)),
+            'n_paths': int(params.get('paths', 10000)),
+            'seed': int(params.get('seed', 0)),
+            'ruin_r': float(params.get('ruin_r', 20)),
+        }
+    except (TypeError, ValueError):
+        raise ValidationError("trades, paths, seed and ruin_r must be numbers.")
+
+    if not 1 <= options['n_trades'] <= 5000:
+        raise ValidationError({'trades': "Must be between 1 and 5000."})
+    if not 100 <= options['n_paths'] <= 100000:
+        raise ValidationError({'paths': "Must be between 100 and 100000."})
+    if options['seed'] < 0:
+        raise ValidationError({'seed': "Must be zero or positive."})
+    if not math.isfinite(options['ruin_r']) or options['ruin_r'] <= 0:
+        raise ValidationError({'ruin_r': "Must be a positive number."})
+    return options
+
+
+def playbook_monte_carlo(user, playbook_id, n_trades, n_paths, seed=0, ruin_r=20.0):
+    # Klucz zawiera wersję danych użytkownika – powtórne wyświetlenie nie czyta nawet logów z bazy
+    def compute():
+        r = load_trade_log_r(user, playbook_id)
+        if not r.size:
+            return None
+        return {'sample_size': int(r.size), **simulate(r, n_trades, n_paths, seed=seed, ruin_r=ruin_r)}
+
+    params = [playbook_id, n_trades, n_paths, seed, ruin_r]
+    return cached_for_user(user.pk, 'monte-carlo', params, compute, MONTE_CARLO_CACHE_TTL)
@@ -0,0 +1,149 @@
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Value, DecimalField
+from trade_samples.models import Trade
+from .locks import lock_owner
+from .models import EquityPoint, TradeLog
+
+ZERO = Decimal('0.00')
+
+
+def _curve_filter(owner_id, playbook_id=None, sample_id=None):
+    return {'owner_id': owner_id, 'playbook_id': playbook_id, 'sample_id': sample_id}
+
+
+def _source_rows(owner_id, playbook_id=None, sample_id=None):
+    # (id, data, pnl, R) w kolejności chronologicznej; krzywa playbooka liczona z TradeLog (tylko R)
+    if playbook_id is not None:
+        rows = TradeLog.objects.filter(strategy_id=playbook_id).values_list(
+            'id', 'date', Value(ZERO, output_field=DecimalField()), 'realized_r'
+        )
+    elif sample_id is not None:
+        rows = Trade.objects.filter(sample_id=sample_id).values_list(
+            'id', 'date', 'realized_pnl', 'realized_r_multiple'
+        )
+    else:
+        rows = Trade.objects.filter(owner_id=owner_id).values_list(
+            'id', 'date', 'realized_pnl', 'realized_r_multiple'
+        )
+    return rows.order_by('date', 'id')
+
+
+def refresh_curve(owner_id, playbook_id=None, sample_id=None, since=None):
+    """
+    Przelicza krzywą od daty `since` (włącznie) – wcześniejsze punkty zostają bez zmian.
+    Nowy trade na końcu historii to przeliczenie jednego punktu. Przeliczenia jednego konta są szeregowane.
+    """
+    curve = _curve_filter(owner_id, playbook_id, sample_id)
+    rows = _source_rows(owner_id, playbook_id, sample_id)
+
+    with transaction.atomic():
+        lock_owner(owner_id)
+        points = EquityPoint.objects.filter(**curve)
+        cum_pnl = cum_r = peak_pnl = peak_r = ZERO
+
+        if since is not None:
+            previous = points.filter(date__lt=since).order_by('-date', '-source_id').first()
+            if previous is not None:
+                cum_pnl, cum_r = previous.cum_pnl, previous.cum_r
+                peak_pnl = previous.cum_pnl + previous.drawdown_pnl
+                peak_r = previous.cum_r + previous.drawdown_r
+            points = points.filter(date__gte=since)
+            rows = rows.filter(date__gte=since)
+        points.delete()
+
+        batch = []
+        for source_id, date, pnl, r in rows.iterator(chunk_size=2000):
+            cum_pnl += pnl
+            cum_r += r
+            peak_pnl = max(peak_pnl, cum_pnl)
+            peak_r = max(peak_r, cum_r)
+            batch.append(EquityPoint(
+                source_id=source_id, date=date,
+                cum_pnl=cum_pnl, cum_r=cum_r,
+                drawdown_pnl=peak_pnl - cum_pnl, drawdown_r=peak_r - cum_r,
+                **curve,
+            ))
+            if len(batch) >= 2000:
+                EquityPoint.objects.bulk_create(batch)
+                batch = []
+        EquityPoint.objects.bulk_create(batch)
+
+
+def refresh_trade_curves(owner_id, sample_ids, since=None):
+    # Trade wpływa na krzywą użytkownika i krzywe swoich próbek
+    refresh_curve(owner_id, since=since)
+    for sample_id in set(sample_ids):
+        refresh_curve(owner_id, sample_id=sample_id, since=since)
+
+
+def refresh_playbook_curves(owner_id, playbook_ids, since=None):
+    for playbook_id in set(playbook_ids):
+        refresh_curve(owner_id, playbook_id=playbook_id, since=since)
+
+
+def rebuild_user_curves(user):
+    refresh_curve(user.pk)
+    for sample_id in user.trade_samples.values_list('id', flat=True):
+        refresh_curve(user.pk, sample_id=sample_id)
+    for playbook_id in user.playbooks.values_list('id', flat=True):
+        refresh_curve(user.pk, playbook_id=playbook_id)
+
+
+def lttb(points, threshold, key):
+    """Largest-Triangle-Three-Buckets: zmniejsza serię do `threshold` punktów, zachowując kształt wykresu."""
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return list(points)
+
+    values = [float(key(point)) for point in points]
+    sampled = [points[0]]
+    bucket_size = (count - 2) / (threshold - 2)
+    selected = 0
+
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # Średnia następnego kubełka jako trzeci wierzchołek trójkąta
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        next_values = values[next_start:next_end] or [values[-1]]
+        avg_x = (next_start + next_end - 1) / 2
+        avg_y = sum(next_values) / len(next_values)
+
+        selected_x, selected_y = selected, values[selected]
+        best, best_area = start, -1.0
+        for index in range(start, end):
+            area = abs(
+                (selected_x - avg_x) * (values[index] - selected_y)
+                - (selected_x - index) * (avg_y - selected_y)
+            )
+            if area > best_area:
+                best, best_area = index, area
+
+        sampled.append(points[best])
+        selected = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def equity_series(owner, playbook_id=None, sample_id=None, max_points=None, metric='cum_r'):
+    curve = _curve_filter(owner.pk, playbook_id, sample_id)
+    fields = ['date', 'cum_pnl', 'cum_r', 'drawdown_pnl', 'drawdown_r']
+    points = list(EquityPoint.objects.filter(**curve).order_by('date', 'source_id').values(*fields))
+
+    # Krzywe dla danych sprzed wprowadzenia tabeli budowane przy pierwszym odczycie
+    if not points and _source_rows(owner.pk, playbook_id, sample_id).exists():
+        refresh_curve(owner.pk, playbook_id, sample_id)
+        points = list(EquityPoint.objects.filter(**curve).order_by('date', 'source_id').values(*fields))
+
+    summary = {
+        'trades': len(points),
+        'max_drawdown_r': max((point['drawdown_r'] for point in points), default=ZERO),
+        'max_drawdown_pnl': max((point['drawdown_pnl'] for point in points), default=ZERO),
+    }
+    if max_points:
+        points = lttb(points, max_points, key=lambda point: point[metric])
+    return {**summary, 'points': points}
@@ -0,0 +1,13 @@
+from api.filters import JournalFilter
+from .models import TradeLog
+
+
+class TradeLogFilter(JournalFilter):
+    instrument_lookup = 'instrument__name'
+    r_field = 'realized_r'
+    outcome_choices = TradeLog.OutcomeChoices.values
+    facets = {
+        'instrument': ('instrument__name', None),
+        'outcome': ('outcome', None),
+        'strategy': ('strategy_id', 'strategy__title'),
+    }
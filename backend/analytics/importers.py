@@ -0,0 +1,43 @@
+from api import events
+from api.importing import BulkImporter, playbook_lookup
+from .models import TradeLog, Instrument
+from .serializers import TradeLogImportSerializer
+from .equity import refresh_playbook_curves
+from .rollups import Source, refresh_rollups
+from .cache import bump_version
+
+
+class TradeLogImporter(BulkImporter):
+    model = TradeLog
+    serializer_class = TradeLogImportSerializer
+    aliases = {
+        'symbol': 'instrument',
+        'playbook': 'strategy',
+        'r': 'realized_r',
+        'r_multiple': 'realized_r',
+        'result': 'outcome',
+    }
+
+    def __init__(self, request):
+        context = {
+            'playbooks': playbook_lookup(request.user),
+            'instruments': {instrument.name.lower(): instrument for instrument in Instrument.objects.all()},
+        }
+        super().__init__(request, context)
+        self.playbook_ids = set()
+        self.since = None
+
+    def build_instance(self, validated_data):
+        return TradeLog(owner=self.request.user, **validated_data)
+
+    def after_batch(self, instances):
+        self.playbook_ids.update(log.strategy_id for log in instances)
+        batch_since = min(log.date for log in instances)
+        self.since = batch_since if self.since is None else min(self.since, batch_since)
+
+    def after_import(self):
+        refresh_playbook_curves(self.request.user.pk, self.playbook_ids, since=self.since)
+        refresh_rollups(self.request.user.pk, Source.LOGS, since=self.since)
+        # bulk_create nie wysyła sygnałów, więc wersję danych podbijamy ręcznie
+        bump_version(self.request.user.pk)
+        events.publish(self.request.user.pk, 'trade_log', action='imported', created=self.created)
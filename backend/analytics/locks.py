@@ -0,0 +1,15 @@
+from django.contrib.auth.models import User
+
+
+def lock_owner(owner_id):
+    """
+    Blokuje wiersz użytkownika do końca bieżącej transakcji – przeliczenia danych pochodnych jednego
+    konta (krzywe kapitału, rollupy) idą po kolei, więc równoległe requesty nie wstawią tych samych
+    wierszy dwa razy. Wywoływać w transaction.atomic(); SQLite i tak szereguje zapisy.
+    """
+    list(User.objects.select_for_update().filter(pk=owner_id).values_list('pk', flat=True))
+
+
+def lock_owners(owner_ids):
+    # Jak lock_owner dla kilku kont naraz – zawsze w kolejności pk, więc dwie transakcje nie zakleszczą się
+    list(User.objects.select_for_update().filter(pk__in=owner_ids).order_by('pk').values_list('pk', flat=True))
@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from analytics.equity import rebuild_user_curves
+
+
+class Command(BaseCommand):
+    help = "Rebuilds precomputed equity curves (account, playbook and sample) from trades and trade logs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only rebuild curves of this username.")
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['user']:
+            users = users.filter(username=options['user'])
+
+        for user in users.iterator():
+            rebuild_user_curves(user)
+            self.stdout.write(f"Rebuilt curves for {user.username}")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt equity curves for {users.count()} user(s)."))
@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from analytics.rollups import rebuild_user_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuilds materialized daily/weekly/monthly performance rollups from trades and trade logs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only rebuild rollups of this username.")
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['user']:
+            users = users.filter(username=options['user'])
+
+        for user in users.iterator():
+            rebuild_user_rollups(user)
+            self.stdout.write(f"Rebuilt rollups for {user.username}")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt performance rollups for {users.count()} user(s)."))
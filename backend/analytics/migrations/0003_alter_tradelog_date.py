@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 12:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_instrument_alter_tradelog_instrument'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tradelog',
+            name='date',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
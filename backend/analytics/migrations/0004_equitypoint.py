@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 12:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_alter_tradelog_date'),
+        ('trade_samples', '0003_tradesample_aggregates'),
+        ('userentries', '0007_alter_playbook_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquityPoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_id', models.UUIDField()),
+                ('date', models.DateTimeField()),
+                ('cum_pnl', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('cum_r', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('drawdown_pnl', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('drawdown_r', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='equity_points', to=settings.AUTH_USER_MODEL)),
+                ('playbook', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='equity_points', to='userentries.playbook')),
+                ('sample', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='equity_points', to='trade_samples.tradesample')),
+            ],
+            options={
+                'ordering': ['date', 'source_id'],
+                'indexes': [models.Index(fields=['owner', 'playbook', 'sample', 'date'], name='equity_curve_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 12:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_equitypoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tradelog',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 12:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_tradelog_updated_at'),
+        ('userentries', '0009_playbook_owner_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tradelog',
+            index=models.Index(fields=['owner', '-date'], name='tradelog_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tradelog',
+            index=models.Index(fields=['strategy', 'date'], name='tradelog_strategy_date_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 13:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0006_tradelog_indexes'),
+        ('userentries', '0009_playbook_owner_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerformanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('trades', 'Trades'), ('logs', 'Trade logs')], max_length=6)),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('instrument', models.CharField(max_length=50)),
+                ('trades_count', models.PositiveIntegerField(default=0)),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('losses', models.PositiveIntegerField(default=0)),
+                ('breakevens', models.PositiveIntegerField(default=0)),
+                ('pnl', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('total_r', models.DecimalField(decimal_places=2, default=0.0, max_digits=12)),
+                ('rules_followed_count', models.PositiveIntegerField(default=0)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='performance_rollups', to=settings.AUTH_USER_MODEL)),
+                ('strategy', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='performance_rollups', to='userentries.playbook')),
+            ],
+            options={
+                'ordering': ['period_start'],
+                'indexes': [models.Index(fields=['owner', 'source', 'period', 'period_start'], name='rollup_range_idx')],
+            },
+        ),
+    ]
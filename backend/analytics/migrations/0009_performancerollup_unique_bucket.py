@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 14:17
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+BUCKET = ['owner', 'source', 'period', 'period_start', 'instrument', 'strategy']
+
+
+def drop_duplicate_buckets(apps, schema_editor):
+    # Równoległe przeliczenia mogły wstawić ten sam okres dwa razy (te same sumy) – zostaje jeden wiersz
+    PerformanceRollup = apps.get_model('analytics', 'PerformanceRollup')
+    duplicates = (
+        PerformanceRollup.objects.order_by().values(*BUCKET)
+        .annotate(keep=Min('id'), rows=Count('id')).filter(rows__gt=1)
+    )
+    for bucket in duplicates.iterator():
+        keep = bucket.pop('keep')
+        bucket.pop('rows')
+        PerformanceRollup.objects.filter(**bucket).exclude(pk=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0008_tradelog_tradelog_owner_instrument_idx'),
+        ('userentries', '0010_playbookitem'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_buckets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='performancerollup',
+            constraint=models.UniqueConstraint(fields=('owner', 'source', 'period', 'period_start', 'instrument', 'strategy'), name='rollup_bucket_unique', nulls_distinct=False),
+        ),
+    ]
@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 from userentries.models import Playbook
 
@@ -20,13 +21,86 @@ class TradeLog(models.Model):
     
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='analytics_trade_logs')
 
-    date = models.DateTimeField(auto_now_add=True)
+    date = models.DateTimeField(default=timezone.now)
     instrument = models.ForeignKey(Instrument, on_delete=models.CASCADE, related_name='trade_logs')
     outcome = models.CharField(max_length=4, choices=OutcomeChoices.choices)
     realized_r = models.DecimalField(max_digits=5, decimal_places=2, help_text="Rzeczywisty wynik w R, np. 2.5 lub -1")
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['owner', '-date'], name='tradelog_owner_date_idx'),
+            models.Index(fields=['strategy', 'date'], name='tradelog_strategy_date_idx'),
+            # Filtr ?instrument= z zakresem dat (api.filters)
+            models.Index(fields=['owner', 'instrument', '-date'], name='tradelog_owner_instrument_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.instrument} ({self.realized_r}R) for {self.strategy.title}"
\ No newline at end of file
+        return f"{self.instrument} ({self.realized_r}R) for {self.strategy.title}"
+
+
+class EquityPoint(models.Model):
+    # Punkt krzywej kapitału: krzywa użytkownika (playbook i sample puste), playbooka (z TradeLog) albo próbki (z Trade)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='equity_points')
+    playbook = models.ForeignKey(Playbook, on_delete=models.CASCADE, null=True, blank=True, related_name='equity_points')
+    sample = models.ForeignKey('trade_samples.TradeSample', on_delete=models.CASCADE, null=True, blank=True, related_name='equity_points')
+
+    source_id = models.UUIDField()
+    date = models.DateTimeField()
+    cum_pnl = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    cum_r = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    drawdown_pnl = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    drawdown_r = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+
+    class Meta:
+        ordering = ['date', 'source_id']
+        indexes = [
+            models.Index(fields=['owner', 'playbook', 'sample', 'date'], name='equity_curve_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date:%Y-%m-%d} {self.cum_r}R / {self.cum_pnl}"
+
+
+class PerformanceRollup(models.Model):
+    # Zmaterializowane sumy dnia / tygodnia / miesiąca per instrument i strategia (analytics.rollups)
+    class Source(models.TextChoices):
+        TRADES = 'trades', 'Trades'
+        LOGS = 'logs', 'Trade logs'
+
+    class Period(models.TextChoices):
+        DAY = 'day', 'Day'
+        WEEK = 'week', 'Week'
+        MONTH = 'month', 'Month'
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='performance_rollups')
+    source = models.CharField(max_length=6, choices=Source.choices)
+    period = models.CharField(max_length=5, choices=Period.choices)
+    period_start = models.DateField()
+    instrument = models.CharField(max_length=50)
+    strategy = models.ForeignKey(Playbook, on_delete=models.CASCADE, null=True, blank=True, related_name='performance_rollups')
+
+    trades_count = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    breakevens = models.PositiveIntegerField(default=0)
+    pnl = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    total_r = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    rules_followed_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['period_start']
+        indexes = [
+            models.Index(fields=['owner', 'source', 'period', 'period_start'], name='rollup_range_idx'),
+        ]
+        constraints = [
+            # Jeden wiersz na okres, instrument i strategię – także bez strategii (NULL)
+            models.UniqueConstraint(
+                fields=['owner', 'source', 'period', 'period_start', 'instrument', 'strategy'],
+                name='rollup_bucket_unique', nulls_distinct=False,
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.period_start} {self.instrument} ({self.trades_count} trades)"
@@ -0,0 +1,94 @@
+# Czysty NumPy – moduł importowany także przez procesy puli, więc bez zależności od Django
+import os
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+
+# Rozmiar paczki w komórkach macierzy ścieżek (n_paths x n_trades, float64): ~8 MB na macierz plus
+# tymczasowe cumsum/max, niezależnie od długości ścieżek – przy MAX_WORKERS procesach pamięć zostaje ograniczona
+CELLS_PER_CHUNK = 1_000_000
+PARALLEL_MIN_CELLS = 2_000_000
+MAX_WORKERS = 4
+CHECKPOINTS = 50
+BAND_PERCENTILES = (5, 25, 50, 75, 95)
+DRAWDOWN_PERCENTILES = (50, 75, 90, 95, 99)
+
+
+def _simulate_chunk(r, n_trades, n_paths, seed_sequence, ruin_r, checkpoints):
+    # Wszystkie ścieżki paczki jako jedna macierz (n_paths x n_trades)
+    rng = np.random.default_rng(seed_sequence)
+    equity = rng.choice(r, size=(n_paths, n_trades), replace=True).cumsum(axis=1)
+    peaks = np.maximum.accumulate(np.maximum(equity, 0), axis=1)
+    return {
+        'final': equity[:, -1],
+        'max_drawdown': (peaks - equity).max(axis=1),
+        'ruined': equity.min(axis=1) <= -ruin_r,
+        'checkpoints': equity[:, checkpoints],
+    }
+
+
+def chunk_plan(n_trades, n_paths):
+    # Liczby ścieżek w kolejnych paczkach – im dłuższe ścieżki, tym mniej ich w paczce
+    chunk_paths = max(1, CELLS_PER_CHUNK // n_trades)
+    sizes = [chunk_paths] * (n_paths // chunk_paths)
+    if n_paths % chunk_paths:
+        sizes.append(n_paths % chunk_paths)
+    return sizes
+
+
+def simulate(r, n_trades, n_paths, seed=None, ruin_r=20.0):
+    """
+    Bootstrap R-multiple'i strategii: n_paths przyszłych ścieżek po n_trades trade'ów.
+    Ścieżki dzielone są na paczki (chunk_plan, zależne tylko od n_trades i n_paths) z własnymi SeedSequence, więc wynik dla danego seeda
+    jest taki sam niezależnie od tego, czy liczony jest w jednym procesie czy w puli.
+    """
+    r = np.asarray(r, dtype=float)
+    seed_sequence = np.random.SeedSequence(seed)
+    checkpoints = np.unique(np.linspace(0, n_trades - 1, min(CHECKPOINTS, n_trades)).round().astype(int))
+
+    chunk_sizes = chunk_plan(n_trades, n_paths)
+    jobs = [
+        (r, n_trades, size, child, ruin_r, checkpoints)
+        for size, child in zip(chunk_sizes, seed_sequence.spawn(len(chunk_sizes)))
+    ]
+
+    if n_paths * n_trades >= PARALLEL_MIN_CELLS and len(jobs) > 1:
+        workers = min(MAX_WORKERS, os.cpu_count() or 1, len(jobs))
+        # spawn zamiast fork – bezpieczne w wielowątkowym serwerze aplikacji
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(_simulate_chunk, *zip(*jobs)))
+    else:
+        results = [_simulate_chunk(*job) for job in jobs]
+
+    final = np.concatenate([result['final'] for result in results])
+    drawdowns = np.concatenate([result['max_drawdown'] for result in results])
+    ruined = np.concatenate([result['ruined'] for result in results])
+    equity_at = np.concatenate([result['checkpoints'] for result in results])
+
+    band_values = np.percentile(equity_at, BAND_PERCENTILES, axis=0)
+    bands = [
+        {
+            'trade': int(step) + 1,
+            'mean': round(float(mean), 4),
+            **{f'p{p}': round(float(value), 4) for p, value in zip(BAND_PERCENTILES, band_values[:, i])},
+        }
+        for i, (step, mean) in enumerate(zip(checkpoints, equity_at.mean(axis=0)))
+    ]
+
+    return {
+        'paths': int(n_paths),
+        'trades': int(n_trades),
+        'seed': seed,
+        'ruin_r': ruin_r,
+        'risk_of_ruin': round(float(ruined.mean()), 4),
+        'probability_of_profit': round(float((final > 0).mean()), 4),
+        'final_r': {
+            'mean': round(float(final.mean()), 4),
+            **{f'p{p}': round(float(value), 4) for p, value in zip(BAND_PERCENTILES, np.percentile(final, BAND_PERCENTILES))},
+        },
+        'max_drawdown_r': {
+            f'p{p}': round(float(value), 4)
+            for p, value in zip(DRAWDOWN_PERCENTILES, np.percentile(drawdowns, DRAWDOWN_PERCENTILES))
+        },
+        'bands': bands,
+    }
@@ -0,0 +1,147 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, DateField, DecimalField, F, IntegerField, Q, Sum, Value
+from django.db.models.functions import Coalesce, Trunc
+from django.utils import timezone
+from trade_samples.models import Trade
+from .locks import lock_owner
+from .models import PerformanceRollup, TradeLog
+
+Source = PerformanceRollup.Source
+Period = PerformanceRollup.Period
+
+SUM_FIELDS = ['trades_count', 'wins', 'losses', 'breakevens', 'pnl', 'total_r', 'rules_followed_count']
+
+ZERO = Decimal('0.00')
+
+
+def bucket_start(moment, period):
+    # Ten sam podział co Trunc w bazie: w strefie TIME_ZONE, tygodnie od poniedziałku
+    day = timezone.localtime(moment).date() if isinstance(moment, datetime) else moment
+    if period == Period.WEEK:
+        return day - timedelta(days=day.weekday())
+    if period == Period.MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start, period):
+    if period == Period.WEEK:
+        return start + timedelta(days=7)
+    if period == Period.MONTH:
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def _as_moment(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _in_windows(rows, field, windows):
+    # Okna [start, end) połączone OR; None = bez ograniczenia z tej strony
+    condition = Q()
+    for start, end in windows:
+        window = Q()
+        if start is not None:
+            window &= Q(**{f'{field}__gte': start})
+        if end is not None:
+            window &= Q(**{f'{field}__lt': end})
+        condition |= window
+    return rows.filter(condition)
+
+
+def compute_rollups(owner_id, source, period, windows=((None, None),)):
+    """Jedno zapytanie grupujące: (początek okresu, instrument, strategia) -> sumy z wierszy w oknach [start, end)."""
+    rows = Trade.objects.filter(owner_id=owner_id) if source == Source.TRADES else TradeLog.objects.filter(owner_id=owner_id)
+    rows = _in_windows(rows, 'date', [
+        (start and _as_moment(start), end and _as_moment(end)) for start, end in windows
+    ])
+
+    if source == Source.TRADES:
+        instrument, pnl, r = 'instrument', Sum('realized_pnl'), Sum('realized_r_multiple')
+        breakevens = Count('pk', filter=Q(outcome=Trade.OutcomeChoices.BREAKEVEN))
+        rules = Count('pk', filter=Q(rules_followed=True))
+    else:
+        instrument, pnl, r = 'instrument__name', Value(ZERO, output_field=DecimalField()), Sum('realized_r')
+        breakevens = rules = Value(0, output_field=IntegerField())
+
+    grouped = rows.order_by().annotate(
+        bucket=Trunc('date', period, output_field=DateField()),
+        bucket_instrument=F(instrument),
+    ).values('bucket', 'bucket_instrument', 'strategy_id').annotate(
+        trades_count=Count('pk'),
+        wins=Count('pk', filter=Q(outcome='WIN')),
+        losses=Count('pk', filter=Q(outcome='LOSS')),
+        breakevens=breakevens,
+        pnl=Coalesce(pnl, ZERO, output_field=DecimalField()),
+        total_r=Coalesce(r, ZERO, output_field=DecimalField()),
+        rules_followed_count=rules,
+    )
+    return [
+        PerformanceRollup(
+            owner_id=owner_id, source=source, period=period, period_start=row['bucket'],
+            instrument=row['bucket_instrument'], strategy_id=row['strategy_id'],
+            **{field: row[field] for field in SUM_FIELDS},
+        )
+        for row in grouped
+    ]
+
+
+def _replace(owner_id, source, period, windows):
+    stale = PerformanceRollup.objects.filter(owner_id=owner_id, source=source, period=period)
+    _in_windows(stale, 'period_start', windows).delete()
+    PerformanceRollup.objects.bulk_create(compute_rollups(owner_id, source, period, windows), batch_size=2000)
+
+
+def refresh_rollups(owner_id, source, since=None, until=None):
+    """
+    Przelicza okresy obejmujące daty od `since` do `until` (włącznie; None = bez ograniczenia).
+    Każdy typ okresu to jeden DELETE, jedno zapytanie grupujące i jeden INSERT; przeliczenia jednego
+    konta są szeregowane, więc równoległe requesty nie wstawią tego samego okresu dwa razy.
+    """
+    with transaction.atomic():
+        lock_owner(owner_id)
+        for period in Period.values:
+            start = bucket_start(since, period) if since is not None else None
+            end = next_bucket(bucket_start(until, period), period) if until is not None else None
+            _replace(owner_id, source, period, [(start, end)])
+
+
+def refresh_rollups_for(owner_id, source, moments):
+    # Tylko okresy zawierające podane daty – edycja przenosząca trade o rok nie przelicza całego roku pomiędzy
+    moments = [moment for moment in moments if moment is not None]
+    with transaction.atomic():
+        lock_owner(owner_id)
+        for period in Period.values:
+            starts = {bucket_start(moment, period) for moment in moments}
+            _replace(owner_id, source, period, [(start, next_bucket(start, period)) for start in sorted(starts)])
+
+
+def rebuild_user_rollups(user):
+    for source in Source.values:
+        refresh_rollups(user.pk, source)
+
+
+def rollup_series(owner, source, period, start=None, end=None, instrument=None, strategy_id=None, group_by=()):
+    """
+    Okresy z zakresu [start, end] z tabeli rollupów – indeksowany odczyt zamiast przeglądania trade'ów.
+    Bez group_by wiersze instrumentów i strategii są sumowane do jednego wiersza na okres.
+    """
+    rows = PerformanceRollup.objects.filter(owner=owner, source=source, period=period)
+    if start is not None:
+        rows = rows.filter(period_start__gte=bucket_start(start, period))
+    if end is not None:
+        rows = rows.filter(period_start__lte=end)
+    if instrument:
+        rows = rows.filter(instrument__iexact=instrument)
+    if strategy_id:
+        rows = rows.filter(strategy_id=strategy_id)
+
+    keys = ['period_start', *group_by]
+    buckets = rows.order_by(*keys).values(*keys).annotate(**{field: Sum(field) for field in SUM_FIELDS})
+    for bucket in buckets:
+        bucket['pnl'] = Decimal(bucket['pnl']).quantize(ZERO)
+        bucket['total_r'] = Decimal(bucket['total_r']).quantize(ZERO)
+        bucket['win_rate'] = round(bucket['wins'] / bucket['trades_count'], 4) if bucket['trades_count'] else 0.0
+        yield bucket
@@ -1,13 +1,34 @@
 from rest_framework import serializers
+from api.importing import find_playbook
+from api.serializers import InstrumentedSerializerMixin, SparseFieldsetMixin
 from .models import TradeLog, Instrument
 
-class InstrumentSerializer(serializers.ModelSerializer):
+class InstrumentSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Instrument
         fields = ['id', 'name']
 
-class TradeLogSerializer(serializers.ModelSerializer):
+class TradeLogSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = TradeLog
         fields = '__all__'
-        read_only_fields = ['owner']
\ No newline at end of file
+        # Czas logu ustawia serwer przy zapisie; datę z przeszłości przyjmuje tylko import
+        read_only_fields = ['owner', 'date']
+
+class TradeLogImportSerializer(serializers.ModelSerializer):
+    # Playbook i instrument po nazwie/id z map w contextcie – bez zapytań per wiersz
+    strategy = serializers.CharField()
+    instrument = serializers.CharField()
+
+    class Meta:
+        model = TradeLog
+        fields = ['strategy', 'date', 'instrument', 'outcome', 'realized_r']
+
+    def validate_strategy(self, value):
+        return find_playbook(self.context['playbooks'], value)
+
+    def validate_instrument(self, value):
+        instrument = self.context['instruments'].get(value.lower())
+        if instrument is None:
+            raise serializers.ValidationError("Unknown instrument.")
+        return instrument
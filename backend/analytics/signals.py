@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from drc.models import DailyReportCard
+from trade_samples.models import TradeSample, Trade
+from userentries.models import Playbook
+from .models import TradeLog
+from api import events
+from .cache import bump_version
+
+
+@receiver([post_save, post_delete], sender=TradeLog)
+@receiver([post_save, post_delete], sender=Trade)
+@receiver([post_save, post_delete], sender=TradeSample)
+@receiver([post_save, post_delete], sender=DailyReportCard)
+@receiver([post_save, post_delete], sender=Playbook)
+def bump_owner_version(sender, instance, **kwargs):
+    bump_version(instance.owner_id)
+
+
+@receiver(post_save, sender=TradeLog)
+def publish_trade_log(sender, instance, created, **kwargs):
+    if created:
+        events.publish(instance.owner_id, 'trade_log', action='created', id=instance.pk, date=instance.date,
+                       strategy=instance.strategy_id, instrument=instance.instrument_id,
+                       outcome=instance.outcome, realized_r=instance.realized_r)
@@ -0,0 +1,100 @@
+from dataclasses import dataclass, asdict
+from django.db.models import Avg, Count, Q, Sum
+from .models import TradeLog
+from .cache import cached_for_user
+
+
+@dataclass
+class PlaybookStats:
+    trade_count: int = 0
+    ev: float = 0.0
+    win_rate: float = 0.0
+    avg_win_r: float = 0.0
+    avg_loss_r: float = 0.0
+    profit_factor: float | None = None
+    max_drawdown_r: float = 0.0
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def _to_float(value, digits=2):
+    return round(float(value), digits) if value is not None else 0.0
+
+
+def max_drawdowns(playbook_ids):
+    # Jedno zapytanie po wszystkich logach, strumieniowo, bez ładowania całej historii do pamięci
+    drawdowns = dict.fromkeys(playbook_ids, 0.0)
+    rows = (
+        TradeLog.objects
+        .filter(strategy_id__in=playbook_ids)
+        .order_by('strategy_id', 'date')
+        .values_list('strategy_id', 'realized_r')
+    )
+
+    current, equity, peak = None, 0.0, 0.0
+    for strategy_id, realized_r in rows.iterator(chunk_size=2000):
+        if strategy_id != current:
+            current, equity, peak = strategy_id, 0.0, 0.0
+        equity += float(realized_r)
+        peak = max(peak, equity)
+        drawdowns[strategy_id] = max(drawdowns[strategy_id], peak - equity)
+
+    return {key: round(value, 2) for key, value in drawdowns.items()}
+
+
+def playbook_stats(playbook_ids):
+    """Statystyki wszystkich podanych playbooków w stałej liczbie zapytań (2), niezależnie od ich ilości."""
+    playbook_ids = list(playbook_ids)
+    if not playbook_ids:
+        return {}
+
+    win = Q(outcome=TradeLog.OutcomeChoices.WIN)
+    loss = Q(outcome=TradeLog.OutcomeChoices.LOSS)
+    rows = (
+        TradeLog.objects
+        .filter(strategy_id__in=playbook_ids)
+        .order_by()
+        .values('strategy_id')
+        .annotate(
+            trade_count=Count('id'),
+            win_count=Count('id', filter=win),
+            ev=Avg('realized_r'),
+            avg_win_r=Avg('realized_r', filter=win),
+            avg_loss_r=Avg('realized_r', filter=loss),
+            gross_profit_r=Sum('realized_r', filter=Q(realized_r__gt=0)),
+            gross_loss_r=Sum('realized_r', filter=Q(realized_r__lt=0)),
+        )
+    )
+    drawdowns = max_drawdowns(playbook_ids)
+
+    stats = {playbook_id: PlaybookStats() for playbook_id in playbook_ids}
+    for row in rows:
+        gross_loss = abs(row['gross_loss_r'] or 0)
+        profit_factor = None
+        if gross_loss:
+            profit_factor = _to_float((row['gross_profit_r'] or 0) / gross_loss)
+
+        stats[row['strategy_id']] = PlaybookStats(
+            trade_count=row['trade_count'],
+            ev=_to_float(row['ev']),
+            win_rate=round(row['win_count'] / row['trade_count'], 4),
+            avg_win_r=_to_float(row['avg_win_r']),
+            avg_loss_r=_to_float(row['avg_loss_r']),
+            profit_factor=profit_factor,
+            max_drawdown_r=drawdowns[row['strategy_id']],
+        )
+    return stats
+
+
+def attach_playbook_stats(playbooks):
+    playbooks = list(playbooks)
+    playbook_ids = sorted(playbook.pk for playbook in playbooks)
+    owner_ids = {playbook.owner_id for playbook in playbooks}
+    if len(owner_ids) == 1:
+        stats = cached_for_user(owner_ids.pop(), 'playbook-stats', playbook_ids, lambda: playbook_stats(playbook_ids))
+    else:
+        stats = playbook_stats(playbook_ids)
+    for playbook in playbooks:
+        playbook.stats = stats[playbook.pk]
+    return playbooks
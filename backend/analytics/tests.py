@@ -1,3 +1,302 @@
-from django.test import TestCase
+import json
+import math
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from trade_samples.models import TradeSample
+from . import montecarlo
+from .comparison import betainc, holm, proportion_test, welch_test
+from .equity import refresh_curve
+from .models import EquityPoint, Instrument, TradeLog
+from .rollups import rebuild_user_rollups
 
-# Create your tests here.
+
+def curve(owner, sample=None):
+    points = EquityPoint.objects.filter(owner=owner, playbook=None, sample=sample).order_by('date', 'source_id')
+    return list(points.values_list('source_id', 'cum_r', 'cum_pnl', 'drawdown_r'))
+
+
+class EquityCurveRefreshTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trader')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.sample = TradeSample.objects.create(owner=self.user, name="A", start_date=date(2024, 1, 1))
+
+    def add_trade(self, sample, day, r, pnl):
+        response = self.client.post(f'/api/samples/{sample.pk}/trades/', {
+            'date': f'2024-01-{day:02d}T10:00:00Z', 'instrument': 'DAX', 'realized_pnl': pnl,
+            'realized_r_multiple': r, 'outcome': 'WIN' if r > 0 else 'LOSS',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data['id']
+
+    def assert_curves_match_rebuild(self, *samples):
+        # Przyrostowe przeliczenie musi dać to samo co pełne
+        incremental = {sample: curve(self.user, sample) for sample in (None, *samples)}
+        refresh_curve(self.user.pk)
+        for sample in samples:
+            refresh_curve(self.user.pk, sample_id=sample.pk)
+        self.assertEqual(incremental, {sample: curve(self.user, sample) for sample in (None, *samples)})
+        return incremental
+
+    def test_create_update_delete(self):
+        for day, r in [(5, 2), (3, -1), (9, 1.5), (7, -1)]:
+            trade_id = self.add_trade(self.sample, day, r, r * 100)
+        curves = self.assert_curves_match_rebuild(self.sample)
+        self.assertEqual([point[1] for point in curves[None]], [-1, 1, 0, 1.5])
+
+        response = self.client.patch(
+            f'/api/samples/{self.sample.pk}/trades/{trade_id}/',
+            {'date': '2024-01-01T10:00:00Z', 'realized_r_multiple': 3}, format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assert_curves_match_rebuild(self.sample)
+
+        response = self.client.delete(f'/api/samples/{self.sample.pk}/trades/{trade_id}/')
+        self.assertEqual(response.status_code, 204)
+        curves = self.assert_curves_match_rebuild(self.sample)
+        self.assertEqual(len(curves[None]), 3)
+
+    def test_sample_delete_refreshes_account_curve(self):
+        other = TradeSample.objects.create(owner=self.user, name="B", start_date=date(2024, 1, 1))
+        self.add_trade(self.sample, 2, 1, 50)
+        self.add_trade(other, 3, -1, -40)
+        self.add_trade(self.sample, 4, 2, 90)
+
+        response = self.client.delete(f'/api/samples/{other.pk}/')
+        self.assertEqual(response.status_code, 204)
+        curves = self.assert_curves_match_rebuild(self.sample)
+        self.assertEqual([point[1] for point in curves[None]], [1, 3])
+
+    def test_malformed_ids(self):
+        for params in ('playbook=abc', 'sample=abc'):
+            self.assertEqual(self.client.get(f'/api/equity-curve/?{params}').status_code, 400, params)
+        response = self.client.get('/api/equity-curve/?sample=7b0c5a3e-4a35-4d4c-9d37-0c5f7fb1e0a1')
+        self.assertEqual(response.status_code, 404)
+
+
+class StatisticsTests(TestCase):
+    def test_malformed_ids(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='trader'))
+        for params in ('playbook=abc', 'source=trades&sample=abc'):
+            self.assertEqual(client.get(f'/api/statistics/?{params}').status_code, 400, params)
+        response = client.get('/api/statistics/?playbook=7b0c5a3e-4a35-4d4c-9d37-0c5f7fb1e0a1')
+        self.assertEqual(response.status_code, 404)
+
+
+class RollupRefreshTests(TestCase):
+    FIELDS = ['source', 'period', 'period_start', 'instrument', 'strategy_id', 'trades_count', 'wins', 'losses',
+              'breakevens', 'pnl', 'total_r', 'rules_followed_count']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trader')
+        cls.playbook = cls.user.playbooks.create(title="Breakout")
+        cls.instrument = Instrument.objects.create(name="DAX")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_rollups_match_rebuild(self):
+        rows = lambda: sorted(self.user.performance_rollups.values_list(*self.FIELDS), key=str)
+        incremental = rows()
+        rebuild_user_rollups(self.user)
+        self.assertEqual(incremental, rows())
+        return incremental
+
+    def test_trade_changes(self):
+        sample = TradeSample.objects.create(owner=self.user, name="A", start_date=date(2024, 1, 1))
+        url = f'/api/samples/{sample.pk}/trades/'
+        for day, r in [(1, 2), (1, -1), (15, 1)]:
+            response = self.client.post(url, {
+                'date': f'2024-01-{day:02d}T10:00:00Z', 'instrument': 'DAX', 'realized_pnl': r * 100,
+                'realized_r_multiple': r, 'outcome': 'WIN' if r > 0 else 'LOSS', 'strategy': str(self.playbook.pk),
+            }, format='json')
+            self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(self.assert_rollups_match_rebuild()), 2 + 2 + 1)
+
+        trade_id = response.data['id']
+        response = self.client.patch(f'{url}{trade_id}/', {'date': '2024-03-02T10:00:00Z'}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assert_rollups_match_rebuild()
+
+        self.assertEqual(self.client.delete(f'{url}{trade_id}/').status_code, 204)
+        self.assertEqual(len(self.assert_rollups_match_rebuild()), 3)
+
+        self.assertEqual(self.client.delete(f'/api/samples/{sample.pk}/').status_code, 204)
+        self.assertEqual(self.assert_rollups_match_rebuild(), [])
+
+    def test_trade_log_changes(self):
+        for r in (1, -1):
+            response = self.client.post('/api/trade-logs/', {
+                'strategy': str(self.playbook.pk),
+                'instrument': self.instrument.pk, 'outcome': 'WIN' if r > 0 else 'LOSS', 'realized_r': r,
+            }, format='json')
+            self.assertEqual(response.status_code, 201, response.data)
+        self.assert_rollups_match_rebuild()
+
+        log_id = response.data['id']
+        response = self.client.patch(f'/api/trade-logs/{log_id}/', {'realized_r': 3, 'outcome': 'WIN'}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assert_rollups_match_rebuild()
+
+        self.assertEqual(self.client.delete(f'/api/trade-logs/{log_id}/').status_code, 204)
+        self.assert_rollups_match_rebuild()
+
+    def test_trade_log_date_is_read_only(self):
+        before = timezone.now()
+        response = self.client.post('/api/trade-logs/', {
+            'date': '2020-01-01T10:00:00Z', 'strategy': str(self.playbook.pk), 'instrument': self.instrument.pk,
+            'outcome': 'WIN', 'realized_r': 1,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        log = TradeLog.objects.get(pk=response.data['id'])
+        self.assertGreaterEqual(log.date, before)
+
+        response = self.client.patch(f'/api/trade-logs/{log.pk}/', {'date': '2020-01-01T10:00:00Z'}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(TradeLog.objects.get(pk=log.pk).date, log.date)
+
+    def test_import_keeps_dates(self):
+        content = json.dumps([{'date': '2020-01-01T10:00:00Z', 'strategy': "Breakout", 'instrument': "DAX",
+                               'outcome': 'WIN', 'realized_r': '1'}])
+        response = self.client.post('/api/trade-logs/import/', {
+            'file': SimpleUploadedFile('logs.json', content.encode()),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(self.user.analytics_trade_logs.get().date.year, 2020)
+
+    def test_malformed_playbook_id(self):
+        self.assertEqual(self.client.get('/api/rollups/?playbook=abc').status_code, 400)
+        response = self.client.get('/api/rollups/?playbook=7b0c5a3e-4a35-4d4c-9d37-0c5f7fb1e0a1')
+        self.assertEqual(response.status_code, 404)
+
+
+class TradeLogPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trader')
+        playbook = cls.user.playbooks.create(title="Breakout")
+        instrument = Instrument.objects.create(name="DAX")
+        # Daty różnią się o mniej niż milisekundę – kursor musi zachować mikrosekundy
+        start = datetime(2024, 1, 2, 10, tzinfo=dt_timezone.utc)
+        TradeLog.objects.bulk_create([
+            TradeLog(owner=cls.user, strategy=playbook, instrument=instrument, outcome='WIN', realized_r=1,
+                     date=start + timedelta(microseconds=100 * number))
+            for number in range(6)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_sub_millisecond_dates(self):
+        expected = [str(pk) for pk in self.user.analytics_trade_logs.order_by('-date', '-pk').values_list('pk', flat=True)]
+        pages, url = [], '/api/trade-logs/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            pages.append([log['id'] for log in response.data['results']])
+            url, previous = response.data['next'], response.data['previous']
+
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual([log['id'] for log in self.client.get(previous).data['results']], pages[-2])
+
+
+class MonteCarloChunkTests(TestCase):
+    def test_chunks_shrink_with_path_length(self):
+        self.assertEqual(montecarlo.chunk_plan(100, 25000), [10000, 10000, 5000])
+        plan = montecarlo.chunk_plan(5000, 1000)
+        self.assertEqual(sum(plan), 1000)
+        self.assertLessEqual(max(plan) * 5000, montecarlo.CELLS_PER_CHUNK)
+
+    def test_pool_matches_single_process(self):
+        r = [2, -1, -1, 1.5, 0.5, -1, 3]
+        parallel = montecarlo.simulate(r, 2500, 1200, seed=7)
+        self.assertGreater(len(montecarlo.chunk_plan(2500, 1200)), 1)
+        with mock.patch.object(montecarlo, 'PARALLEL_MIN_CELLS', float('inf')):
+            single = montecarlo.simulate(r, 2500, 1200, seed=7)
+        self.assertEqual(parallel, single)
+
+
+class ComparisonStatisticsTests(SimpleTestCase):
+    def test_betainc(self):
+        # I_x(1, 1) = x; I_x(2, 3) z rozkładu dwumianowego; I_x(1/2, 1/2) = 2/π·asin(√x)
+        np.testing.assert_allclose(betainc(1, 1, [0.1, 0.5, 0.9]), [0.1, 0.5, 0.9], rtol=1e-10)
+        np.testing.assert_allclose(betainc(2, 3, 0.4), 0.5248, rtol=1e-10)
+        np.testing.assert_allclose(betainc(0.5, 0.5, 0.25), 1 / 3, rtol=1e-10)
+        np.testing.assert_allclose(betainc(2, 3, [0.0, 1.0]), [0.0, 1.0])
+
+    def test_welch(self):
+        # Równe n i wariancje: df = 2(n - 1); t = 2 przy df = 10 -> p = 0.073388
+        t, df, p = welch_test(np.array([6, 6, 1]), np.array([3.0, 1, 1]), np.array([3.0, 2, 2]),
+                              np.array([6, 6, 5]), np.array([1.0, 1, 1]), np.array([3.0, 2, 2]))
+        np.testing.assert_allclose(t[:2], [2, 0])
+        np.testing.assert_allclose(df[:2], [10, 10])
+        np.testing.assert_allclose(p[:2], [0.0733880, 1.0], rtol=1e-5)
+        # Jeden trade po którejś stronie – testu nie ma
+        self.assertTrue(np.isnan(t[2]) and np.isnan(p[2]))
+
+    def test_proportion(self):
+        z, p = proportion_test(np.array([60, 5]), np.array([100, 0]), np.array([40, 3]), np.array([100, 10]))
+        np.testing.assert_allclose(z[0], 2 * math.sqrt(2))
+        np.testing.assert_allclose(p[0], math.erfc(2))
+        self.assertTrue(np.isnan(p[1]))
+
+    def test_holm(self):
+        np.testing.assert_allclose(
+            holm(np.array([0.01, 0.04, 0.03, np.nan])), [0.03, 0.06, 0.06, np.nan],
+        )
+        np.testing.assert_allclose(holm(np.array([0.5, 0.6])), [1.0, 1.0])
+        self.assertEqual(holm(np.array([])).size, 0)
+
+
+class StrategyComparisonTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trader')
+        cls.breakout = cls.user.playbooks.create(title="Breakout")
+        cls.reversal = cls.user.playbooks.create(title="Reversal")
+        instrument = Instrument.objects.create(name="DAX")
+        monday = datetime(2024, 1, 1, 9, tzinfo=dt_timezone.utc)
+        logs = [(cls.breakout, r) for r in (2, 3, -1, 2, 1, 3)] + [(cls.reversal, r) for r in (-1, 1, -1, 0.5, -1)]
+        TradeLog.objects.bulk_create([
+            TradeLog(owner=cls.user, strategy=playbook, instrument=instrument, date=monday + timedelta(days=number % 2),
+                     outcome='WIN' if r > 0 else 'LOSS', realized_r=r)
+            for number, (playbook, r) in enumerate(logs)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_comparison(self):
+        response = self.client.get('/api/strategy-comparison/', {'playbooks': f'{self.breakout.pk},{self.reversal.pk}'})
+        self.assertEqual(response.status_code, 200, response.data)
+
+        strategies = {strategy['title']: strategy for strategy in response.data['strategies']}
+        self.assertEqual((strategies['Breakout']['trades'], strategies['Breakout']['expectancy']), (6, round(10 / 6, 4)))
+        self.assertEqual((strategies['Reversal']['trades'], strategies['Reversal']['expectancy']), (5, -0.3))
+        self.assertEqual(sum(row['strategies'][0]['trades'] for row in response.data['breakdown']['weekday']), 6)
+
+        test, = response.data['tests']
+        breakout, reversal = np.array([2, 3, -1, 2, 1, 3.0]), np.array([-1, 1, -1, 0.5, -1])
+        t, df, p = welch_test(6, breakout.mean(), breakout.var(ddof=1), 5, reversal.mean(), reversal.var(ddof=1))
+        self.assertAlmostEqual(test['t'], float(t), places=3)
+        self.assertAlmostEqual(test['p_value'], float(p), places=3)
+        self.assertEqual(test['p_value_holm'], test['p_value'])
+        self.assertAlmostEqual(test['win_rate_diff'], round(5 / 6 - 2 / 5, 4))
+
+    def test_invalid_parameters(self):
+        for params in ({'source': 'other'}, {'playbooks': 'abc'}, {'playbooks': '7b0c5a3e-4a35-4d4c-9d37-0c5f7fb1e0a1'}):
+            self.assertEqual(self.client.get('/api/strategy-comparison/', params).status_code, 400, params)
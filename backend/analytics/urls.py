@@ -1,8 +1,19 @@
 from rest_framework.routers import DefaultRouter
-from .views import TradeLogViewSet, InstrumentViewSet
+from api.async_views import with_async_reads
+from .views import (
+    TradeLogViewSet, InstrumentViewSet, EquityCurveViewSet, StatisticsViewSet, RollupViewSet, AsyncTradeLogView,
+    StrategyComparisonViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'trade-logs', TradeLogViewSet, basename='tradelog')
 router.register(r'instruments', InstrumentViewSet, basename='instrument')
+router.register(r'equity-curve', EquityCurveViewSet, basename='equity-curve')
+router.register(r'statistics', StatisticsViewSet, basename='statistics')
+router.register(r'rollups', RollupViewSet, basename='rollup')
+router.register(r'strategy-comparison', StrategyComparisonViewSet, basename='strategy-comparison')
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = with_async_reads(router.urls, {
+    'tradelog-list': AsyncTradeLogView,
+    'tradelog-detail': AsyncTradeLogView,
+})
\ No newline at end of file
@@ -1,18 +1,221 @@
-from rest_framework import viewsets
+import uuid
+from datetime import date
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from api.async_views import AsyncReadView
+from api.importing import import_status, iter_upload_rows
+from api.mixins import ConditionalGetMixin, FacetsMixin
 from .models import TradeLog, Instrument
 from .serializers import TradeLogSerializer, InstrumentSerializer
+from .importers import TradeLogImporter
+from .filters import TradeLogFilter
+from .equity import equity_series, refresh_playbook_curves
+from .rollups import Period, Source, refresh_rollups_for, rollup_series
+from .engine import load_trade_log_r, load_trade_columns, strategy_statistics
+from .comparison import MAX_PLAYBOOKS, SOURCES as COMPARISON_SOURCES, compare_strategies
+from .cache import cached_for_user
 
 class InstrumentViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Instrument.objects.all()
     serializer_class = InstrumentSerializer
 
-class TradeLogViewSet(viewsets.ModelViewSet):
+class TradeLogViewSet(FacetsMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = TradeLogSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [TradeLogFilter]
 
     def get_queryset(self):
         return self.request.user.analytics_trade_logs.all()
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
\ No newline at end of file
+        with transaction.atomic():
+            log = serializer.save(owner=self.request.user)
+            refresh_playbook_curves(log.owner_id, [log.strategy_id], since=log.date)
+            refresh_rollups_for(log.owner_id, Source.LOGS, [log.date])
+
+    def perform_update(self, serializer):
+        old_strategy_id, old_date = serializer.instance.strategy_id, serializer.instance.date
+        with transaction.atomic():
+            log = serializer.save()
+            refresh_playbook_curves(log.owner_id, [old_strategy_id, log.strategy_id], since=min(old_date, log.date))
+            refresh_rollups_for(log.owner_id, Source.LOGS, [old_date, log.date])
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            refresh_playbook_curves(instance.owner_id, [instance.strategy_id], since=instance.date)
+            refresh_rollups_for(instance.owner_id, Source.LOGS, [instance.date])
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        importer = TradeLogImporter(request)
+        summary = importer.run(iter_upload_rows(request, importer.aliases))
+        return Response(summary, status=import_status(summary['created'], summary['failed']))
+
+
+class AsyncTradeLogView(AsyncReadView):
+    serializer_class = TradeLogSerializer
+    related_name = 'analytics_trade_logs'
+
+    def use_sync_view(self, request, kwargs):
+        # Filtry listy obsługuje ViewSet
+        return super().use_sync_view(request, kwargs) or any(param in request.GET for param in TradeLogFilter.params)
+
+
+def _owned_id(queryset, params, name):
+    # ?<name>=<uuid> z konta użytkownika: niepoprawny identyfikator to 400 (jak w api.filters), obcy – 404
+    try:
+        pk = uuid.UUID(params[name])
+    except ValueError:
+        raise ValidationError({name: f"Must be a {queryset.model._meta.verbose_name} id."})
+    return get_object_or_404(queryset, pk=pk).pk
+
+
+class EquityCurveViewSet(viewsets.ViewSet):
+    """
+    Krzywa kapitału i drawdown: ?playbook=<id> albo ?sample=<id> (domyślnie całe konto),
+    ?points=N zmniejsza serię algorytmem LTTB, ?metric=r|pnl wybiera wartość do downsamplingu.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        params = request.query_params
+        playbook_id = sample_id = None
+        if params.get('playbook'):
+            playbook_id = _owned_id(request.user.playbooks.all(), params, 'playbook')
+        elif params.get('sample'):
+            sample_id = _owned_id(request.user.trade_samples.all(), params, 'sample')
+
+        try:
+            max_points = int(params.get('points', 0)) or None
+        except ValueError:
+            raise ValidationError({'points': "Must be an integer."})
+
+        metric = {'r': 'cum_r', 'pnl': 'cum_pnl'}.get(params.get('metric', 'r'))
+        if metric is None:
+            raise ValidationError({'metric': "Must be 'r' or 'pnl'."})
+
+        params = [playbook_id, sample_id, max_points, metric]
+        return Response(cached_for_user(
+            request.user.pk, 'equity-curve', params,
+            lambda: equity_series(request.user, playbook_id, sample_id, max_points, metric),
+        ))
+
+
+class StatisticsViewSet(viewsets.ViewSet):
+    """
+    Rozszerzone statystyki strategii (expectancy, SQN, serie, przedział ufności win rate, histogram R).
+    ?source=logs (TradeLog, domyślnie) albo trades (Trade), opcjonalnie ?playbook=<id>, ?sample=<id>, ?bin_width=0.5.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        params = request.query_params
+        playbook_id = sample_id = None
+        if params.get('playbook'):
+            playbook_id = _owned_id(request.user.playbooks.all(), params, 'playbook')
+        if params.get('sample'):
+            sample_id = _owned_id(request.user.trade_samples.all(), params, 'sample')
+
+        try:
+            bin_width = float(params.get('bin_width', 0.5))
+        except ValueError:
+            raise ValidationError({'bin_width': "Must be a number."})
+        if bin_width <= 0:
+            raise ValidationError({'bin_width': "Must be positive."})
+
+        source = params.get('source', 'logs')
+        if source == 'logs':
+            if sample_id is not None:
+                raise ValidationError({'sample': "Samples contain trades, use source=trades."})
+            compute = lambda: strategy_statistics(load_trade_log_r(request.user, playbook_id), bin_width=bin_width)
+        elif source == 'trades':
+            compute = lambda: strategy_statistics(*load_trade_columns(request.user, playbook_id, sample_id), bin_width=bin_width)
+        else:
+            raise ValidationError({'source': "Must be 'logs' or 'trades'."})
+
+        stats = cached_for_user(request.user.pk, 'statistics', [source, playbook_id, sample_id, bin_width], compute)
+        return Response({'source': source, **stats})
+
+
+class RollupViewSet(viewsets.ViewSet):
+    """
+    Zmaterializowane okresy (heat-mapa kalendarza, porównanie okresów): ?period=day|week|month,
+    ?source=trades (domyślnie) albo logs, ?start= i ?end= (YYYY-MM-DD), ?instrument=, ?playbook=<id>,
+    ?group_by=instrument,strategy rozbija okres na instrumenty / strategie.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def _date(self, params, name):
+        if not params.get(name):
+            return None
+        try:
+            return date.fromisoformat(params[name])
+        except ValueError:
+            raise ValidationError({name: "Must be a date (YYYY-MM-DD)."})
+
+    def list(self, request):
+        params = request.query_params
+        source = params.get('source', Source.TRADES)
+        if source not in Source.values:
+            raise ValidationError({'source': "Must be 'trades' or 'logs'."})
+        period = params.get('period', Period.DAY)
+        if period not in Period.values:
+            raise ValidationError({'period': "Must be 'day', 'week' or 'month'."})
+
+        group_by = [key for key in params.get('group_by', '').split(',') if key]
+        if set(group_by) - {'instrument', 'strategy'}:
+            raise ValidationError({'group_by': "Allowed values: instrument, strategy."})
+
+        playbook_id = None
+        if params.get('playbook'):
+            playbook_id = _owned_id(request.user.playbooks.all(), params, 'playbook')
+
+        buckets = rollup_series(
+            request.user, source, period, start=self._date(params, 'start'), end=self._date(params, 'end'),
+            instrument=params.get('instrument'), strategy_id=playbook_id, group_by=group_by,
+        )
+        return Response({'source': source, 'period': period, 'buckets': list(buckets)})
+
+
+class StrategyComparisonViewSet(viewsets.ViewSet):
+    """
+    Porównanie playbooków obok siebie: ?playbooks=<id>,<id> (domyślnie wszystkie, maks. MAX_PLAYBOOKS),
+    ?source=logs (domyślnie) albo trades. Rozbicie R po instrumencie, dniu tygodnia, godzinie
+    (i rules_followed dla trades) oraz testy istotności (Welch t, test z win rate, poprawka Holma) dla par.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def _playbooks(self, request):
+        playbooks = request.user.playbooks.order_by('title', 'pk')
+        ids = [item.strip() for item in request.query_params.get('playbooks', '').split(',') if item.strip()]
+        if ids:
+            try:
+                ids = {uuid.UUID(playbook_id) for playbook_id in ids}
+            except ValueError:
+                raise ValidationError({'playbooks': "Must be a comma-separated list of playbook ids."})
+            playbooks = list(playbooks.filter(pk__in=ids))
+            if len(playbooks) != len(ids):
+                raise ValidationError({'playbooks': "Unknown playbook id."})
+        else:
+            playbooks = list(playbooks[:MAX_PLAYBOOKS + 1])
+        if len(playbooks) > MAX_PLAYBOOKS:
+            raise ValidationError({'playbooks': f"Compare at most {MAX_PLAYBOOKS} playbooks at once."})
+        return playbooks
+
+    def list(self, request):
+        source = request.query_params.get('source', 'logs')
+        if source not in COMPARISON_SOURCES:
+            raise ValidationError({'source': "Must be 'logs' or 'trades'."})
+        playbooks = self._playbooks(request)
+
+        params = [source, [playbook.pk for playbook in playbooks]]
+        return Response(cached_for_user(
+            request.user.pk, 'strategy-comparison', params,
+            lambda: compare_strategies(request.user, source, playbooks),
+        ))
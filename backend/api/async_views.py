@@ -0,0 +1,165 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured, ValidationError as DjangoValidationError
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import URLPattern
+from django.utils.cache import get_conditional_response
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .events import get_broker, user_channel
+from .mixins import set_validators, validators, version_rows, version_states
+
+_jwt = JWTAuthentication()
+
+
+async def authenticate(request, raw_token=None):
+    """To samo co JWTAuthentication z simplejwt, tylko użytkownik pobierany async ORM-em."""
+    if raw_token is None:
+        header = _jwt.get_header(request)
+        raw_token = _jwt.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        raise NotAuthenticated()
+
+    token = _jwt.get_validated_token(raw_token)
+    if jwt_settings.USER_ID_CLAIM not in token:
+        raise InvalidToken("Token contained no recognizable user identification")
+    user = await User.objects.filter(**{jwt_settings.USER_ID_FIELD: token[jwt_settings.USER_ID_CLAIM]}).afirst()
+    if user is None or not user.is_active:
+        raise AuthenticationFailed("User not found", code='user_not_found')
+    return user
+
+
+def error_response(request, exc):
+    # Ten sam kształt odpowiedzi co domyślny exception handler DRF
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    response = HttpResponse(JSONRenderer().render(data), status=exc.status_code, content_type='application/json')
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        response.status_code = 401
+        response['WWW-Authenticate'] = _jwt.authenticate_header(request)
+    return response
+
+
+class AsyncReadView(View):
+    """
+    GET list/retrieve natywnie async: JWT, ETag/304 i odczyt przez async ORM, bez blokowania wątku.
+    Zapisy i warianty, których ta ścieżka nie obsługuje (paginacja, ?format, przeglądarkowe API),
+    trafiają do synchronicznego ViewSetu z routera. Podklasy podają `related_name` – relację użytkownika
+    z obiektami widoku (np. 'reminders') – albo nadpisują get_queryset.
+    """
+    sync_view = None
+    serializer_class = None
+    related_name = None
+
+    def get_queryset(self, user):
+        if self.related_name is None:
+            raise ImproperlyConfigured(f"{type(self).__name__} is missing related_name. Define it or override get_queryset().")
+        return getattr(user, self.related_name).all()
+
+    def use_sync_view(self, request, kwargs):
+        return (
+            request.method != 'GET'
+            or 'format' in kwargs
+            or 'page_size' in request.GET
+            or 'text/html' in request.META.get('HTTP_ACCEPT', '')
+        )
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.use_sync_view(request, kwargs):
+            return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+        try:
+            request.user = await authenticate(request)
+            return await self.get(request, *args, **kwargs)
+        except APIException as exc:
+            return error_response(request, exc)
+
+    def serializer_context(self, request):
+        drf_request = Request(request)
+        drf_request.user = request.user
+        return {'request': drf_request}
+
+    def get_version_querysets(self, request, pk=None):
+        queryset = self.get_queryset(request.user)
+        return [queryset.filter(pk=pk) if pk is not None else queryset]
+
+    async def get(self, request, pk=None):
+        if pk is not None:
+            try:
+                pk = self.get_queryset(request.user).model._meta.pk.to_python(pk)
+            except DjangoValidationError:
+                raise NotFound()
+
+        querysets = self.get_version_querysets(request, pk)
+        states = version_states([row async for row in version_rows(querysets)], len(querysets))
+        etag, last_modified = validators(request, states, single=pk is not None)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            data = await self.get_data(request, pk)
+            response = HttpResponse(JSONRenderer().render(data), content_type='application/json')
+        return set_validators(response, etag, last_modified)
+
+    async def get_data(self, request, pk=None):
+        context = self.serializer_context(request)
+        queryset = self.get_queryset(request.user)
+        if pk is None:
+            return self.serializer_class([obj async for obj in queryset], many=True, context=context).data
+
+        instance = await queryset.filter(pk=pk).afirst()
+        if instance is None:
+            raise NotFound(f"No {queryset.model._meta.object_name} matches the given query.")
+        return self.serializer_class(instance, context=context).data
+
+
+class EventStreamView(View):
+    """
+    Server-sent events ze zmianami danych zalogowanego użytkownika (api.events). EventSource w przeglądarce
+    nie wysyła nagłówków, więc token można podać też jako ?token=. Zdarzenia nie są buforowane –
+    po (ponownym) połączeniu klient odświeża dane zwykłym GET, który dzięki ETag kończy się zwykle 304.
+    """
+
+    async def get(self, request):
+        try:
+            user = await authenticate(request, request.GET.get('token'))
+        except APIException as exc:
+            return error_response(request, exc)
+
+        response = StreamingHttpResponse(self.stream(user_channel(user.pk)), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # nginx nie może buforować strumienia
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, channel):
+        yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+        async with get_broker().subscribe(channel) as subscription:
+            while True:
+                message = await subscription.get(timeout=settings.EVENTS_KEEPALIVE_SECONDS)
+                if message is None:
+                    # Komentarz SSE, żeby proxy nie zamknęło bezczynnego połączenia
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"data: {message}\n\n"
+
+
+def with_async_reads(urls, views):
+    """
+    Podmienia trasy routera o podanych nazwach (np. 'tradelog-list') na widoki async, które resztę metod
+    oddają oryginalnemu ViewSetowi. Bez ASYNC_READS (serwer WSGI) lista wraca bez zmian.
+    """
+    if not settings.ASYNC_READS:
+        return urls
+
+    patterns = []
+    for pattern in urls:
+        view_class = views.get(pattern.name)
+        if view_class is not None:
+            view = csrf_exempt(view_class.as_view(sync_view=pattern.callback))
+            pattern = URLPattern(pattern.pattern, view, pattern.default_args, pattern.name)
+        patterns.append(pattern)
+    return patterns
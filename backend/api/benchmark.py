@@ -0,0 +1,245 @@
+import time
+from dataclasses import dataclass, field
+import numpy as np
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from analytics.models import Instrument
+from rest_framework.test import force_authenticate, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Dodatkowe warianty zapytań dla tras, które mają kosztowne parametry; {playbook}/{sample} z danych użytkownika
+ROUTE_VARIANTS = {
+    'sample-list': ['?include=trades'],
+    'trade-list': ['?fields=id,date,realized_r_multiple', '?page_size=50', '?outcome=LOSS&rules_followed=false'],
+    'trade-facets': ['?instrument=DAX,NASDAQ'],
+    'tradelog-list': ['?page_size=50', '?date_from=2020-01-01&r_min=0'],
+    'equity-curve-list': ['?points=500', '?playbook={playbook}', '?sample={sample}'],
+    'statistics-list': ['?source=trades', '?playbook={playbook}'],
+    'playbook-monte-carlo': ['?paths=1000'],
+    'dashboard-list': ['?include=market_bias,latest_drc'],
+    'daily_report_card-list': ['?mistakes_with_solutions=FOMO'],
+}
+
+# Trasy, które bez parametru zwracają 400 – zapytanie bazowe zamiast gołego URL-a
+ROUTE_QUERY = {
+    'playbook-items': '?field=checklist',
+    'daily_report_card-items': '?field=mistakes_with_solutions',
+}
+
+# Trasy zagnieżdżone: argument URL -> obiekt rodzica z danych użytkownika
+PARENT_KWARGS = {
+    'sample_pk': 'sample',
+}
+
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str
+    url: str
+    label: str
+    data: dict | None = None
+
+    @property
+    def key(self):
+        return f"{self.method} {self.label}"
+
+
+@dataclass
+class Measurement:
+    endpoint: Endpoint
+    status: int
+    timings: list = field(default_factory=list)
+    queries: int = 0
+    size: int = 0
+
+    def as_dict(self):
+        p50, p95, p99 = np.percentile(self.timings, [50, 95, 99]) if self.timings else (0.0, 0.0, 0.0)
+        return {
+            'status': self.status,
+            'p50': round(float(p50), 2),
+            'p95': round(float(p95), 2),
+            'p99': round(float(p99), 2),
+            'queries': self.queries,
+            'bytes': self.size,
+        }
+
+
+def iter_viewset_routes(patterns=None):
+    """Trasy zarejestrowane w routerach DRF (callback ma mapę akcji), bez wariantów z sufiksem formatu."""
+    for entry in patterns if patterns is not None else get_resolver().url_patterns:
+        if isinstance(entry, URLResolver):
+            yield from iter_viewset_routes(entry.url_patterns)
+        elif isinstance(entry, URLPattern) and getattr(entry.callback, 'actions', None):
+            if 'format' not in entry.pattern.regex.groupindex:
+                yield entry
+
+
+def journal_context(user):
+    # Obiekty z danymi, żeby trasy szczegółowe i filtry nie zwracały pustych odpowiedzi
+    return {
+        'playbook': user.playbooks.filter(trade_logs__isnull=False).first() or user.playbooks.first(),
+        'sample': user.trade_samples.filter(trades_count__gt=0).first() or user.trade_samples.first(),
+        'instrument': Instrument.objects.first(),
+    }
+
+
+def _route_kwargs(route, user, context):
+    kwargs = {}
+    names = list(route.pattern.regex.groupindex)
+    for name in names:
+        if name in PARENT_KWARGS:
+            kwargs[name] = str(context[PARENT_KWARGS[name]].pk)
+
+    own = [name for name in names if name not in kwargs]
+    if own:
+        # Identyfikator obiektu bierzemy z querysetu samego ViewSetu – dokładnie to, co widzi użytkownik
+        callback = route.callback
+        view = callback.cls(**callback.initkwargs)
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user)
+        view.action_map, view.format_kwarg = callback.actions, None
+        view.setup(request, **kwargs)
+        view.request = view.initialize_request(request)
+        lookup = view.lookup_url_kwarg or view.lookup_field
+        obj = view.get_queryset().first()
+        if obj is None:
+            return None
+        kwargs[lookup] = str(getattr(obj, view.lookup_field))
+    return kwargs
+
+
+def read_endpoints(user, context):
+    endpoints = []
+    for route in iter_viewset_routes():
+        if 'get' not in route.callback.actions:
+            continue
+        kwargs = _route_kwargs(route, user, context)
+        if kwargs is None:
+            continue
+        url = reverse(route.name, kwargs=kwargs) + ROUTE_QUERY.get(route.name, '')
+        for variant in ['', *ROUTE_VARIANTS.get(route.name, [])]:
+            query = variant.format(**{name: obj.pk for name, obj in context.items()})
+            endpoints.append(Endpoint(route.name, 'GET', url + query, f"{route.name}{variant}"))
+    return endpoints
+
+
+def write_scenarios(context):
+    """Pary create/delete, które zostawiają dane w stanie wyjściowym – każdy powtórzony pomiar widzi ten sam stan."""
+    playbook, sample, instrument = context['playbook'], context['sample'], context['instrument']
+    return [
+        (
+            Endpoint('sample-trades-list', 'POST', reverse('sample-trades-list', kwargs={'sample_pk': sample.pk}),
+                     'sample-trades-list', {
+                         'strategy': str(playbook.pk), 'date': '2025-06-01T12:00:00Z', 'instrument': 'DAX',
+                         'realized_pnl': '120.00', 'realized_r_multiple': '1.20', 'outcome': 'WIN',
+                         'rules_followed': True, 'context': 'Benchmark trade',
+                     }),
+            'trade-detail',
+        ),
+        (
+            Endpoint('tradelog-list', 'POST', reverse('tradelog-list'), 'tradelog-list', {
+                'strategy': str(playbook.pk), 'instrument': instrument.pk, 'date': '2025-06-01T12:00:00Z',
+                'outcome': 'WIN', 'realized_r': '1.50',
+            }),
+            'tradelog-detail',
+        ),
+        (
+            Endpoint('playbook-list', 'POST', reverse('playbook-list'), 'playbook-list', {
+                'title': 'Benchmark playbook', 'entry_criteria': ['Break of structure'], 'checklist': ['News'],
+            }),
+            'playbook-detail',
+        ),
+        (
+            Endpoint('daily_report_card-list', 'POST', reverse('daily_report_card-list'), 'daily_report_card-list', {
+                'date': '2030-01-01', 'grade': 'B', 'goal': 'Benchmark',
+                'mistakes_with_solutions': [{'mistake': 'FOMO', 'solution': 'Wait'}],
+            }),
+            'daily_report_card-detail',
+        ),
+    ]
+
+
+class BenchmarkClient:
+    def __init__(self, user, cold=False):
+        token = RefreshToken.for_user(user).access_token
+        self.client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.cold = cold
+
+    def request(self, method, url, data=None):
+        if self.cold:
+            cache.clear()
+        handler = getattr(self.client, method.lower())
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = handler(url, data, content_type='application/json') if data is not None else handler(url)
+            elapsed = (time.perf_counter() - started) * 1000
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, elapsed, len(queries), len(body)
+
+    def measure_read(self, endpoint, repeat):
+        measurement = None
+        for _ in range(repeat):
+            response, elapsed, queries, size = self.request('GET', endpoint.url)
+            if measurement is None:
+                measurement = Measurement(endpoint, response.status_code, size=size)
+            measurement.timings.append(elapsed)
+            measurement.queries = max(measurement.queries, queries)
+        return measurement
+
+    def measure_write(self, create, detail_name, repeat):
+        created = delete = None
+        for _ in range(repeat):
+            response, elapsed, queries, size = self.request(create.method, create.url, create.data)
+            if created is None:
+                created = Measurement(create, response.status_code, size=size)
+            created.timings.append(elapsed)
+            created.queries = max(created.queries, queries)
+            if response.status_code != 201:
+                break
+
+            url = reverse(detail_name, kwargs={'pk': response.json()['id']})
+            endpoint = Endpoint(detail_name, 'DELETE', url, detail_name)
+            response, elapsed, queries, size = self.request('DELETE', url)
+            if delete is None:
+                delete = Measurement(endpoint, response.status_code, size=size)
+            delete.timings.append(elapsed)
+            delete.queries = max(delete.queries, queries)
+        return [measurement for measurement in (created, delete) if measurement is not None]
+
+
+def run_benchmark(user, repeat=20, cold=False, writes=True):
+    context = journal_context(user)
+    client = BenchmarkClient(user, cold=cold)
+    measurements = [client.measure_read(endpoint, repeat) for endpoint in read_endpoints(user, context)]
+    if writes:
+        for create, detail_name in write_scenarios(context):
+            measurements.extend(client.measure_write(create, detail_name, repeat))
+    return {measurement.endpoint.key: measurement.as_dict() for measurement in measurements}
+
+
+def compare_results(results, baseline, latency_tolerance=0.25, latency_slack_ms=5.0, size_tolerance=0.10):
+    """
+    Regresje względem zapisanego baseline'u: więcej zapytań, inny status, wolniejsze p95
+    (ponad tolerancję względną i stały margines na szum) albo większa odpowiedź.
+    """
+    failures = []
+    for key, result in results.items():
+        if not 200 <= result['status'] < 300:
+            failures.append(f"{key}: status {result['status']}")
+
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if result['status'] != previous['status']:
+            failures.append(f"{key}: status {previous['status']} -> {result['status']}")
+        if result['queries'] > previous['queries']:
+            failures.append(f"{key}: queries {previous['queries']} -> {result['queries']}")
+        if result['p95'] > previous['p95'] * (1 + latency_tolerance) + latency_slack_ms:
+            failures.append(f"{key}: p95 {previous['p95']}ms -> {result['p95']}ms")
+        if result['bytes'] > previous['bytes'] * (1 + size_tolerance):
+            failures.append(f"{key}: size {previous['bytes']}B -> {result['bytes']}B")
+    return failures
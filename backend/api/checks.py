@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Error, Tags, Warning, register
+from django.db import DatabaseError, connections
+from django.utils.module_loading import import_string
+
+
+def psycopg_pool_available():
+    try:
+        import psycopg  # noqa: F401
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@register()
+def check_connection_settings(app_configs, **kwargs):
+    """Spójność CONN_MAX_AGE / pool / trybu PgBouncer w DATABASES – błędy konfiguracji przy starcie, nie przy pierwszym requeście."""
+    messages = []
+    for alias, database in settings.DATABASES.items():
+        if database['ENGINE'] != 'django.db.backends.postgresql':
+            continue
+
+        pool = database.get('OPTIONS', {}).get('pool')
+        conn_max_age = database.get('CONN_MAX_AGE', 0)
+        if pool:
+            if not psycopg_pool_available():
+                messages.append(Error(
+                    f"Database '{alias}' enables the connection pool, but psycopg 3 with psycopg_pool is not installed.",
+                    hint="Install psycopg[binary,pool] or unset DB_POOL.", id='api.E001',
+                ))
+            if conn_max_age != 0:
+                messages.append(Error(
+                    f"Database '{alias}' combines the connection pool with CONN_MAX_AGE={conn_max_age}.",
+                    hint="Pooled connections are returned after each request; set CONN_MAX_AGE to 0.", id='api.E002',
+                ))
+            if isinstance(pool, dict) and pool.get('min_size', 4) > pool.get('max_size', pool.get('min_size', 4)):
+                messages.append(Error(
+                    f"Database '{alias}' pool min_size is larger than max_size.", id='api.E003',
+                ))
+        elif conn_max_age and not database.get('CONN_HEALTH_CHECKS'):
+            messages.append(Warning(
+                f"Database '{alias}' keeps connections for {conn_max_age}s without CONN_HEALTH_CHECKS.",
+                hint="A connection dropped by the server will fail the first request that reuses it.", id='api.W001',
+            ))
+
+        if getattr(settings, 'ASYNC_READS', False) and conn_max_age:
+            messages.append(Warning(
+                f"Database '{alias}' keeps persistent connections while async reads are enabled.",
+                hint="Async requests run their queries in per-request threads, so persistent connections pile up; use DB_POOL.",
+                id='api.W003',
+            ))
+
+        # DISABLE_SERVER_SIDE_CURSORS ustawiają settings razem z DB_PGBOUNCER, więc tego nie sprawdzamy
+        if getattr(settings, 'DB_PGBOUNCER', False) and alias == 'default' and pool:
+            messages.append(Warning(
+                f"Database '{alias}' uses both PgBouncer and the application-side pool.",
+                hint="One pooling layer is enough; unset DB_POOL when PgBouncer is in front.", id='api.W002',
+            ))
+    return messages
+
+
+@register()
+def check_event_settings(app_configs, **kwargs):
+    messages = []
+    if not getattr(settings, 'EVENTS_ENABLED', False):
+        return messages
+    try:
+        broker = import_string(settings.EVENTS_BROKER)
+    except ImportError as exc:
+        return [Error(f"EVENTS_BROKER cannot be imported: {exc}", id='api.E005')]
+
+    if broker.__name__ == 'RedisBroker' and not getattr(settings, 'REDIS_URL', None):
+        messages.append(Error("EVENTS_BROKER is RedisBroker, but REDIS_URL is not set.", id='api.E006'))
+    if not settings.ASYNC_READS and broker.__name__ == 'InProcessBroker':
+        messages.append(Warning(
+            "Push events are published to the in-process broker, but the event stream needs ASYNC_READS.",
+            hint="Serve the app over ASGI with ASYNC_READS=1, or use a shared broker (REDIS_URL).", id='api.W004',
+        ))
+    return messages
+
+
+@register(Tags.caches)
+def check_cache_settings(app_configs, **kwargs):
+    from analytics.cache import process_local
+
+    if settings.DEBUG or not process_local(caches['default']):
+        return []
+    return [Warning(
+        "The default cache is process-local (LocMemCache), so cached analytics and data versions are not shared "
+        "between workers.",
+        hint=f"Set REDIS_URL; until then results are cached for only {settings.ANALYTICS_LOCAL_CACHE_TTL}s and other "
+             "workers may serve them stale for that long.",
+        id='api.W005',
+    )]
+
+
+@register(Tags.database)
+def check_database_connection(app_configs, databases=None, **kwargs):
+    # Uruchamiane przez migrate i `check --database default` – jedno połączenie i SELECT 1
+    messages = []
+    for alias in databases or []:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except DatabaseError as exc:
+            messages.append(Error(f"Cannot connect to database '{alias}': {exc}", id='api.E010'))
+    return messages
@@ -0,0 +1,132 @@
+import asyncio
+import functools
+import json
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def user_channel(user_id):
+    return f"events:{user_id}"
+
+
+class _Subscription:
+    # Kolejka jednego połączenia SSE; publish może przyjść z dowolnego wątku, więc wkładamy przez pętlę zdarzeń
+    def __init__(self, loop, maxsize):
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize)
+
+    def put(self, message):
+        try:
+            self._loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # Pętla już zamknięta – klient się rozłączył
+            pass
+
+    def _put(self, message):
+        if self._queue.full():
+            # Wolny klient traci najstarsze zdarzenia zamiast blokować publikujących
+            self._queue.get_nowait()
+        self._queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessBroker:
+    """
+    Pub/sub w pamięci procesu. Wystarcza przy jednym workerze ASGI – przy kilku procesach
+    zdarzenie dociera tylko do klientów podłączonych do tego samego procesu, wtedy RedisBroker.
+    """
+
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(message)
+        return len(subscribers)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        subscription = _Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscribers[channel].discard(subscription)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+
+class _RedisSubscription:
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    async def get(self, timeout=None):
+        message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        data = message['data']
+        return data.decode() if isinstance(data, bytes) else data
+
+
+class RedisBroker:
+    """Ten sam interfejs na Redis pub/sub (REDIS_URL) – zdarzenia widoczne we wszystkich workerach."""
+
+    def __init__(self, url=None):
+        import redis
+        import redis.asyncio
+
+        self._url = url or settings.REDIS_URL
+        self._client = redis.Redis.from_url(self._url)
+        self._async_redis = redis.asyncio
+
+    def publish(self, channel, message):
+        return self._client.publish(channel, message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        client = self._async_redis.Redis.from_url(self._url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            yield _RedisSubscription(pubsub)
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+            await client.aclose()
+
+
+@functools.cache
+def get_broker():
+    return import_string(settings.EVENTS_BROKER)()
+
+
+def send(user_id, event_type, **payload):
+    message = json.dumps({'type': event_type, **payload}, cls=DjangoJSONEncoder)
+    return get_broker().publish(user_channel(user_id), message)
+
+
+def publish(user_id, event_type, **payload):
+    """
+    Zdarzenie zmiany dla wszystkich otwartych kart użytkownika. Wysyłane po commicie, a błąd brokera
+    jest tylko logowany – zapis danych nie może się przez niego wywrócić.
+    """
+    if settings.EVENTS_ENABLED:
+        transaction.on_commit(lambda: send(user_id, event_type, **payload), robust=True)
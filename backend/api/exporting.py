@@ -0,0 +1,295 @@
+import csv
+import io
+import json
+from asgiref.sync import sync_to_async
+from dataclasses import dataclass
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from .importing import chunked
+
+CHUNK_SIZE = 2000
+
+
+@dataclass(frozen=True)
+class Export:
+    # Kolumny to (nazwa, lookup dla values_list) – nazwy zgodne z importem, więc eksport da się zaimportować z powrotem
+    related_name: str
+    columns: tuple
+    ordering: tuple
+
+    def queryset(self, user):
+        lookups = [lookup for _, lookup in self.columns]
+        return getattr(user, self.related_name).order_by(*self.ordering).values_list(*lookups)
+
+    def fields(self, model):
+        return [_lookup_field(model, lookup) for _, lookup in self.columns]
+
+
+EXPORTS = {
+    'trade-logs': Export('analytics_trade_logs', (
+        ('id', 'id'), ('date', 'date'), ('strategy', 'strategy_id'), ('instrument', 'instrument__name'),
+        ('outcome', 'outcome'), ('realized_r', 'realized_r'), ('updated_at', 'updated_at'),
+    ), ('date', 'id')),
+    'trades': Export('trades', (
+        ('id', 'id'), ('sample', 'sample_id'), ('strategy', 'strategy_id'), ('date', 'date'),
+        ('instrument', 'instrument'), ('initial_risk_pips', 'initial_risk_pips'),
+        ('initial_target_pips', 'initial_target_pips'), ('realized_pnl', 'realized_pnl'),
+        ('realized_r_multiple', 'realized_r_multiple'), ('outcome', 'outcome'),
+        ('rules_followed', 'rules_followed'), ('context', 'context'), ('comment', 'comment'),
+        ('updated_at', 'updated_at'),
+    ), ('date', 'id')),
+    'samples': Export('trade_samples', (
+        ('id', 'id'), ('name', 'name'), ('size', 'size'), ('start_date', 'start_date'), ('end_date', 'end_date'),
+        ('grade', 'grade'), ('pnl', 'pnl'), ('trades_count', 'trades_count'), ('wins', 'wins'),
+        ('losses', 'losses'), ('breakevens', 'breakevens'), ('total_r', 'total_r'),
+        ('rules_followed_count', 'rules_followed_count'), ('updated_at', 'updated_at'),
+    ), ('start_date', 'id')),
+    'drcs': Export('daily_report_cards', (
+        ('id', 'id'), ('date', 'date'), ('grade', 'grade'), ('goal', 'goal'), ('pnl', 'pnl'),
+        ('reminders', 'reminders'), ('improvements', 'improvements'),
+        ('mistakes_with_solutions', 'mistakes_with_solutions'), ('performance_table', 'performance_table'),
+        ('updated_at', 'updated_at'),
+    ), ('date',)),
+    'playbooks': Export('playbooks', (
+        ('id', 'id'), ('title', 'title'), ('overview', 'overview'), ('trade_type', 'trade_type'),
+        ('entry_criteria', 'entry_criteria'), ('exit_strategy', 'exit_strategy'),
+        ('stop_loss_rules', 'stop_loss_rules'), ('enhancers', 'enhancers'),
+        ('trade_management', 'trade_management'), ('checklist', 'checklist'),
+        ('trade_database', 'trade_database'), ('updated_at', 'updated_at'),
+    ), ('title', 'id')),
+    'reminders': Export('reminders', (('id', 'id'), ('text', 'text'), ('updated_at', 'updated_at')), ('id',)),
+    'market-drivers': Export('market_drivers', (
+        ('id', 'id'), ('name', 'name'), ('percentage', 'percentage'), ('color', 'color'), ('updated_at', 'updated_at'),
+    ), ('id',)),
+    'market-bias': Export('market_biases', (
+        ('id', 'id'), ('instrument', 'instrument'), ('bias', 'bias'), ('updated_at', 'updated_at'),
+    ), ('instrument',)),
+}
+
+
+def _lookup_field(model, lookup):
+    # Pole modelu na końcu lookupu ('instrument__name' -> Instrument.name, 'strategy_id' -> Trade.strategy)
+    *path, name = lookup.split('__')
+    for part in path:
+        model = model._meta.get_field(part).related_model
+    return model._meta.get_field(name)
+
+
+def arrow_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _Buffer(io.RawIOBase):
+    # Sink tylko do zapisu: encoder pisze do niego, a stream zaraz oddaje zapisane bajty klientowi
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class CSVEncoder:
+    def __init__(self, columns, fields):
+        self.columns = columns
+        self._json = [isinstance(field, models.JSONField) for field in fields]
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _drain(self):
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data.encode()
+
+    def _cell(self, value, is_json):
+        if is_json:
+            return json.dumps(value)
+        if value is None:
+            return ''
+        return value.isoformat() if hasattr(value, 'isoformat') else value
+
+    def begin(self):
+        self._writer.writerow(self.columns)
+        return self._drain()
+
+    def encode(self, rows):
+        self._writer.writerows([self._cell(value, is_json) for value, is_json in zip(row, self._json)] for row in rows)
+        return self._drain()
+
+    def end(self):
+        return b''
+
+
+class NDJSONEncoder:
+    def __init__(self, columns, fields):
+        self.columns = columns
+
+    def begin(self):
+        return b''
+
+    def encode(self, rows):
+        return ''.join(
+            json.dumps(dict(zip(self.columns, row)), cls=DjangoJSONEncoder) + '\n' for row in rows
+        ).encode()
+
+    def end(self):
+        return b''
+
+
+class ArrowEncoder:
+    """Arrow IPC stream – kolejne RecordBatch'e, typy kolumn z pól modelu."""
+
+    def __init__(self, columns, fields):
+        import pyarrow as pa
+
+        self._pa = pa
+        self._converters = [self._converter(field) for field in fields]
+        self.schema = pa.schema([
+            pa.field(column, self._type(field), nullable=field.null) for column, field in zip(columns, fields)
+        ])
+        self._buffer = _Buffer()
+        self._writer = None
+
+    def _type(self, field):
+        pa = self._pa
+        if field.is_relation:
+            return self._type(field.target_field)
+        if isinstance(field, models.DecimalField):
+            return pa.decimal128(field.max_digits, field.decimal_places)
+        if isinstance(field, models.DateTimeField):
+            return pa.timestamp('us', tz='UTC')
+        if isinstance(field, models.DateField):
+            return pa.date32()
+        if isinstance(field, models.BooleanField):
+            return pa.bool_()
+        if isinstance(field, (models.IntegerField, models.AutoField)):
+            return pa.int64()
+        # UUID, tekst i JSON (jako tekst) trafiają do kolumn string
+        return pa.string()
+
+    def _converter(self, field):
+        if field.is_relation:
+            return self._converter(field.target_field)
+        if isinstance(field, models.UUIDField):
+            return lambda value: None if value is None else str(value)
+        if isinstance(field, models.JSONField):
+            return json.dumps
+        return None
+
+    def _batch(self, rows):
+        columns = []
+        for index, (field, converter) in enumerate(zip(self.schema, self._converters)):
+            values = [row[index] for row in rows]
+            if converter is not None:
+                values = [converter(value) for value in values]
+            columns.append(self._pa.array(values, type=field.type))
+        return self._pa.record_batch(columns, schema=self.schema)
+
+    def open_writer(self, sink):
+        return self._pa.ipc.new_stream(sink, self.schema)
+
+    def begin(self):
+        self._writer = self.open_writer(self._buffer)
+        return self._buffer.drain()
+
+    def encode(self, rows):
+        self._writer.write_batch(self._batch(rows))
+        return self._buffer.drain()
+
+    def end(self):
+        self._writer.close()
+        return self._buffer.drain()
+
+
+class ParquetEncoder(ArrowEncoder):
+    # Jedna grupa wierszy na paczkę z kursora; stopka z metadanymi na końcu strumienia
+    def open_writer(self, sink):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(sink, self.schema)
+
+
+class ExportRenderer(BaseRenderer):
+    """
+    Renderery służą do negocjacji formatu (?format= albo Accept); treść eksportu idzie przez stream().
+    Renderowane są tylko odpowiedzi z danymi, czyli błędy (401, 404, 406) – te wychodzą jako JSON.
+    """
+    encoder_class = None
+    extension = None
+    requires_arrow = False
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = JSONRenderer.media_type
+        return JSONRenderer().render(data)
+
+
+class CSVRenderer(ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+    encoder_class = CSVEncoder
+    extension = 'csv'
+
+
+class NDJSONRenderer(ExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+    encoder_class = NDJSONEncoder
+    extension = 'ndjson'
+
+
+class ArrowRenderer(ExportRenderer):
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    encoder_class = ArrowEncoder
+    extension = 'arrows'
+    requires_arrow = True
+
+
+class ParquetRenderer(ExportRenderer):
+    media_type = 'application/vnd.apache.parquet'
+    format = 'parquet'
+    charset = None
+    encoder_class = ParquetEncoder
+    extension = 'parquet'
+    requires_arrow = True
+
+
+def stream(encoder, rows, chunk_size=CHUNK_SIZE):
+    yield encoder.begin()
+    for batch in chunked(rows, chunk_size):
+        yield encoder.encode(batch)
+    yield encoder.end()
+
+
+async def astream(chunks):
+    # Pod ASGI synchroniczny iterator zostałby zebrany do listy przed wysłaniem. Kolejne paczki
+    # (zapytanie i kodowanie) liczone są w wątku, pętla zdarzeń tylko wysyła bajty
+    next_chunk = sync_to_async(lambda: next(chunks, None))
+    while (chunk := await next_chunk()) is not None:
+        yield chunk
@@ -0,0 +1,175 @@
+import csv
+import io
+import json
+from itertools import islice
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+
+MAX_REPORTED_ERRORS = 500
+AMBIGUOUS = object()
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def playbook_lookup(user):
+    # Playbook po id albo po tytule (bez rozróżniania wielkości liter); tytuł kilku playbooków -> AMBIGUOUS
+    lookup = {}
+    for playbook in user.playbooks.only('id', 'title'):
+        title = playbook.title.lower()
+        lookup[title] = AMBIGUOUS if title in lookup else playbook
+        lookup[str(playbook.id)] = playbook
+    return lookup
+
+
+def find_playbook(lookup, value):
+    playbook = lookup.get(value.lower())
+    if playbook is AMBIGUOUS:
+        raise ValidationError("Several playbooks have this title, use the playbook id.")
+    if playbook is None:
+        raise ValidationError("Unknown playbook.")
+    return playbook
+
+
+def import_status(created, failed):
+    # 201 gdy coś zapisano, 400 gdy odrzucono wszystkie wiersze; pusty plik to 200 z zerowym podsumowaniem
+    if created:
+        return status.HTTP_201_CREATED
+    return status.HTTP_400_BAD_REQUEST if failed else status.HTTP_200_OK
+
+
+def _normalize_row(row, aliases):
+    normalized = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        key = key.strip().lower().replace(' ', '_')
+        normalized[aliases.get(key, key)] = value.strip() if isinstance(value, str) else value
+    return normalized
+
+
+def iter_ndjson_rows(stream, aliases=None):
+    aliases = aliases or {}
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield number, exc
+            continue
+        yield number, _normalize_row(row, aliases) if isinstance(row, dict) else row
+
+
+def iter_upload_rows(request, aliases=None):
+    """
+    Zwraca (numer_wiersza, dict) z pliku CSV / NDJSON / JSON albo z listy JSON w body.
+    CSV i .jsonl/.ndjson (jeden obiekt na linię) czytane są wiersz po wierszu, bez ładowania całości do pamięci;
+    plik .json to jedna lista obiektów, więc parsowany jest w całości.
+    """
+    aliases = aliases or {}
+    upload = request.FILES.get('file')
+
+    if upload is None:
+        if not isinstance(request.data, list):
+            raise ValidationError({'file': "Upload a CSV/NDJSON file or send a JSON list of rows."})
+        for number, row in enumerate(request.data, start=1):
+            yield number, _normalize_row(row, aliases) if isinstance(row, dict) else row
+        return
+
+    stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+    name = (upload.name or '').lower()
+
+    if name.endswith(('.ndjson', '.jsonl')):
+        yield from iter_ndjson_rows(stream, aliases)
+    elif name.endswith('.json'):
+        content = stream.read()
+        if not content.strip():
+            return
+        try:
+            rows = json.loads(content)
+        except json.JSONDecodeError as exc:
+            raise ValidationError({'file': f"Invalid JSON: {exc}."})
+        if not isinstance(rows, list):
+            raise ValidationError({'file': "A .json file must contain a list of objects."})
+        for number, row in enumerate(rows, start=1):
+            yield number, _normalize_row(row, aliases) if isinstance(row, dict) else row
+    else:
+        # Numer wiersza liczony od 2 – pierwszy wiersz CSV to nagłówek. Pusta komórka to brak wartości:
+        # pole opcjonalne (np. initial_risk_pips) bierze wartość domyślną zamiast błędu parsowania
+        for number, row in enumerate(csv.DictReader(stream), start=2):
+            yield number, {key: value for key, value in _normalize_row(row, aliases).items() if value != ''}
+
+
+class BulkImporter:
+    """
+    Walidacja wierszy w paczkach i zapis przez bulk_create, jedna transakcja na paczkę.
+    Podklasy ustawiają model i serializer_class, a w context przekazują mapy lookupów (bez zapytań per wiersz).
+    """
+    model = None
+    serializer_class = None
+    aliases = {}
+    batch_size = 1000
+
+    def __init__(self, request, context=None):
+        self.request = request
+        self.context = {'request': request, **(context or {})}
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def build_instance(self, validated_data):
+        return self.model(**validated_data)
+
+    def after_batch(self, instances):
+        pass
+
+    def after_import(self):
+        pass
+
+    def _record_error(self, number, detail):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': number, 'errors': detail})
+
+    def _validate(self, number, row):
+        if isinstance(row, Exception):
+            self._record_error(number, {'non_field_errors': [str(row)]})
+            return None
+        if not isinstance(row, dict):
+            self._record_error(number, {'non_field_errors': ["Expected an object."]})
+            return None
+
+        serializer = self.serializer_class(data=row, context=self.context)
+        if not serializer.is_valid():
+            self._record_error(number, serializer.errors)
+            return None
+        return self.build_instance(serializer.validated_data)
+
+    def run(self, rows):
+        for batch in chunked(rows, self.batch_size):
+            instances = [
+                instance for instance in (self._validate(number, row) for number, row in batch)
+                if instance is not None
+            ]
+            if not instances:
+                continue
+            with transaction.atomic():
+                self.model.objects.bulk_create(instances, batch_size=self.batch_size)
+                self.after_batch(instances)
+            self.created += len(instances)
+        if self.created:
+            self.after_import()
+        return self.summary()
+
+    def summary(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
@@ -0,0 +1,286 @@
+import io
+import logging
+import tempfile
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.exceptions import Throttled, ValidationError
+from analytics.cache import bump_version
+from analytics.engine import monte_carlo_options, playbook_monte_carlo
+from analytics.locks import lock_owners
+from analytics.rollups import rebuild_user_rollups
+from trade_samples.aggregates import rebuild_aggregates
+from . import events
+from .exporting import (
+    CHUNK_SIZE, EXPORTS, ArrowRenderer, CSVRenderer, NDJSONRenderer, ParquetRenderer, arrow_available, stream,
+)
+from .importing import chunked, iter_ndjson_rows
+from .journal import JournalRestore, archive_chunks
+from .models import Job, job_storage
+
+logger = logging.getLogger(__name__)
+
+Status = Job.Status
+UNFINISHED = [Status.QUEUED, Status.RUNNING]
+# Ile najstarszych zadań z kolejki worker przegląda, szukając użytkowników poniżej limitu
+CLAIM_SCAN = 100
+PURGE_BATCH_SIZE = 500
+
+EXPORT_RENDERERS = {renderer.format: renderer for renderer in (CSVRenderer, NDJSONRenderer, ArrowRenderer, ParquetRenderer)}
+
+
+class JobError(Exception):
+    """Oczekiwany błąd zadania – komunikat trafia do użytkownika w polu `error`."""
+
+
+@dataclass(frozen=True)
+class JobKind:
+    # clean(user, params) -> parametry zapisane w zadaniu (ValidationError przy błędach),
+    # run(job) -> wynik JSON; eksporty zapisują dodatkowo plik w job.result_file.
+    # upload: zadanie tworzy tylko endpoint, który przyjmuje plik (api.views.queue_job), nie POST /api/jobs/
+    clean: object
+    run: object
+    upload: bool = False
+
+
+def _clean_monte_carlo(user, params):
+    try:
+        playbook_id = uuid.UUID(str(params.get('playbook')))
+    except ValueError:
+        raise ValidationError({'playbook': "Must be a playbook id."})
+    if not user.playbooks.filter(pk=playbook_id).exists():
+        raise ValidationError({'playbook': "Unknown playbook id."})
+    options = monte_carlo_options(params)
+    return {
+        'playbook': str(playbook_id), 'trades': options['n_trades'], 'paths': options['n_paths'],
+        'seed': options['seed'], 'ruin_r': options['ruin_r'],
+    }
+
+
+def _run_monte_carlo(job):
+    result = playbook_monte_carlo(job.owner, uuid.UUID(job.params['playbook']), **monte_carlo_options(job.params))
+    if result is None:
+        raise JobError("This playbook has no logged trades to resample.")
+    return result
+
+
+def _clean_export(user, params):
+    resource = params.get('resource')
+    if resource != 'journal' and resource not in EXPORTS:
+        raise ValidationError({'resource': f"Allowed values: journal, {', '.join(EXPORTS)}."})
+    export_format = params.get('format', 'ndjson' if resource == 'journal' else 'csv')
+    if export_format not in EXPORT_RENDERERS:
+        raise ValidationError({'format': f"Allowed values: {', '.join(EXPORT_RENDERERS)}."})
+    if resource == 'journal' and export_format != 'ndjson':
+        raise ValidationError({'format': "The journal archive is only available as NDJSON."})
+    if EXPORT_RENDERERS[export_format].requires_arrow and not arrow_available():
+        raise ValidationError({'format': f"The {export_format} format needs pyarrow installed on the server."})
+    return {'resource': resource, 'format': export_format}
+
+
+def _run_export(job):
+    resource, renderer = job.params['resource'], EXPORT_RENDERERS[job.params['format']]
+    if resource == 'journal':
+        chunks = archive_chunks(job.owner)
+    else:
+        export = EXPORTS[resource]
+        queryset = export.queryset(job.owner)
+        encoder = renderer.encoder_class([column for column, _ in export.columns], export.fields(queryset.model))
+        chunks = stream(encoder, queryset.iterator(chunk_size=CHUNK_SIZE))
+
+    filename = f"{resource}-{timezone.localdate().isoformat()}.{renderer.extension}"
+    # Plik tymczasowy, bo eksport może być większy niż pamięć procesu; do magazynu wyników kopiowany na końcu
+    with tempfile.TemporaryFile() as output:
+        for chunk in chunks:
+            output.write(chunk)
+        size = output.tell()
+        output.seek(0)
+        job.result_file.save(f"{job.pk}.{renderer.extension}", File(output), save=False)
+    return {'resource': resource, 'format': renderer.format, 'filename': filename, 'size': size}
+
+
+def _clean_no_params(user, params):
+    return {}
+
+
+def _run_rebuild_rollups(job):
+    rebuild_user_rollups(job.owner)
+    return {'rollups': job.owner.performance_rollups.count()}
+
+
+def _clean_verify_aggregates(user, params):
+    fix = params.get('fix', False)
+    if not isinstance(fix, bool):
+        raise ValidationError({'fix': "Must be true or false."})
+    return {'fix': fix}
+
+
+def _run_verify_aggregates(job):
+    samples = job.owner.trade_samples.all()
+    with transaction.atomic():
+        mismatches = rebuild_aggregates(samples, fix=job.params['fix'])
+        if job.params['fix'] and mismatches:
+            bump_version(job.owner_id)
+    return {
+        'samples': samples.count(),
+        'fixed': job.params['fix'],
+        'mismatches': [
+            {'sample': sample_id, 'fields': {field: {'stored': stored, 'computed': computed}
+                                             for field, (stored, computed) in diff.items()}}
+            for sample_id, diff in mismatches.items()
+        ],
+    }
+
+
+def _clean_journal_restore(user, params):
+    replace = params.get('replace', False)
+    if not isinstance(replace, bool):
+        raise ValidationError({'replace': "Must be true or false."})
+    return {'replace': replace}
+
+
+def _run_journal_restore(job):
+    # Do wykonania result_file trzyma wgrane archiwum – anulowanie i wygasanie zadania sprzątają je jak wynik
+    try:
+        with job.result_file.open('rb') as archive:
+            rows = iter_ndjson_rows(io.TextIOWrapper(archive, encoding='utf-8-sig', newline=''))
+            return JournalRestore(job.owner, replace=job.params['replace']).run(rows)
+    except ValidationError as exc:
+        raise JobError(' '.join(str(message) for messages in exc.detail.values() for message in messages))
+    finally:
+        job.result_file.delete(save=False)
+
+
+JOB_KINDS = {
+    'monte-carlo': JobKind(_clean_monte_carlo, _run_monte_carlo),
+    'export': JobKind(_clean_export, _run_export),
+    'rebuild-rollups': JobKind(_clean_no_params, _run_rebuild_rollups),
+    'verify-aggregates': JobKind(_clean_verify_aggregates, _run_verify_aggregates),
+    'journal-restore': JobKind(_clean_journal_restore, _run_journal_restore, upload=True),
+}
+
+
+def clean_params(user, kind, params):
+    if not isinstance(params, dict):
+        raise ValidationError({'params': "Must be an object."})
+    try:
+        return JOB_KINDS[kind].clean(user, params)
+    except ValidationError as exc:
+        raise ValidationError({'params': exc.detail})
+
+
+def check_pending_limit(user):
+    pending = user.jobs.filter(status__in=UNFINISHED).count()
+    if pending >= settings.JOBS_MAX_PENDING_PER_USER:
+        raise Throttled(detail=f"You already have {pending} unfinished jobs. Wait for some of them to finish.")
+
+
+def _expiry(now):
+    return now + timedelta(seconds=settings.JOBS_RESULT_TTL_SECONDS)
+
+
+def claim(worker, slots):
+    """
+    Do `slots` najstarszych zadań z kolejki, z pominięciem użytkowników, którzy mają już
+    JOBS_MAX_RUNNING_PER_USER uruchomionych. Zwraca identyfikatory przejętych zadań.
+    Kandydaci blokowani z SKIP LOCKED (inne workery biorą kolejne zadania), a konta ich właścicieli
+    przed policzeniem uruchomionych – dwa workery nie przekroczą razem limitu jednego użytkownika.
+    """
+    if slots <= 0:
+        return []
+    with transaction.atomic():
+        candidates = list(
+            Job.objects.select_for_update(skip_locked=True).filter(status=Status.QUEUED)
+            .order_by('created_at').values_list('pk', 'owner_id')[:CLAIM_SCAN]
+        )
+        lock_owners({owner_id for _, owner_id in candidates})
+        running = dict(
+            Job.objects.filter(status=Status.RUNNING, owner_id__in={owner_id for _, owner_id in candidates})
+            .order_by().values('owner_id').annotate(count=Count('pk')).values_list('owner_id', 'count')
+        )
+
+        claimed = []
+        for job_id, owner_id in candidates:
+            if len(claimed) == slots:
+                break
+            if running.get(owner_id, 0) >= settings.JOBS_MAX_RUNNING_PER_USER:
+                continue
+            claimed.append(job_id)
+            running[owner_id] = running.get(owner_id, 0) + 1
+        Job.objects.filter(pk__in=claimed, status=Status.QUEUED).update(
+            status=Status.RUNNING, started_at=timezone.now(), worker=worker,
+        )
+    return claimed
+
+
+def _finish(job, status, **fields):
+    now = timezone.now()
+    updated = Job.objects.filter(pk=job.pk, status=Status.RUNNING).update(
+        status=status, finished_at=now, expires_at=_expiry(now), **fields,
+    )
+    if updated:
+        events.publish(job.owner_id, 'job', action=status, id=job.pk, kind=job.kind)
+    return updated
+
+
+def execute(job_id):
+    """Wykonanie przejętego zadania – w procesie puli workera (api.jobworker)."""
+    job = Job.objects.select_related('owner').get(pk=job_id)
+    try:
+        result = JOB_KINDS[job.kind].run(job)
+    except JobError as exc:
+        _finish(job, Status.FAILED, error=str(exc))
+        return
+    except Exception:
+        logger.exception("Job %s (%s) failed", job.pk, job.kind)
+        _finish(job, Status.FAILED, error="The job failed unexpectedly.")
+        return
+
+    if not _finish(job, Status.SUCCEEDED, result=result, result_file=job.result_file.name or ''):
+        # Zadanie w międzyczasie uznane za utracone – wynik nikomu się nie przyda
+        if job.result_file:
+            job.result_file.delete(save=False)
+
+
+def fail(job_ids, error):
+    now = timezone.now()
+    return Job.objects.filter(pk__in=job_ids, status=Status.RUNNING).update(
+        status=Status.FAILED, error=error, finished_at=now, expires_at=_expiry(now),
+    )
+
+
+def cancel(job):
+    now = timezone.now()
+    return Job.objects.filter(pk=job.pk, status=Status.QUEUED).update(
+        status=Status.CANCELLED, finished_at=now, expires_at=_expiry(now),
+    )
+
+
+def discard(jobs):
+    # Wiersze razem z plikami wyników; zwraca liczbę usuniętych zadań
+    storage = job_storage()
+    rows = list(jobs.values_list('pk', 'result_file'))
+    for batch in chunked(rows, PURGE_BATCH_SIZE):
+        for _, name in batch:
+            if name:
+                storage.delete(name)
+        Job.objects.filter(pk__in=[job_id for job_id, _ in batch]).delete()
+    return len(rows)
+
+
+def expire_jobs():
+    """
+    Zadania uruchomione dłużej niż JOBS_TIMEOUT_SECONDS -> failed, wyniki po terminie -> usunięte.
+    To tylko zapis w bazie dla zadań workerów, które zniknęły; własne zawieszone zadania run_jobs zabija sam.
+    """
+    now = timezone.now()
+    lost = Job.objects.filter(
+        status=Status.RUNNING, started_at__lt=now - timedelta(seconds=settings.JOBS_TIMEOUT_SECONDS),
+    ).values_list('pk', flat=True)
+    timed_out = fail(list(lost), "The job did not finish in time.")
+    return timed_out, discard(Job.objects.filter(expires_at__lte=now))
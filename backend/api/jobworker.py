@@ -0,0 +1,26 @@
+# Punkt wejścia procesów puli `run_jobs` – bez modeli na poziomie modułu, bo proces startowany
+# metodą spawn importuje ten moduł, zanim Django zostanie skonfigurowane
+import os
+import signal
+import django
+from django.db import close_old_connections
+
+
+def init_worker():
+    # Własna grupa procesów – run_jobs zabija zawieszone zadanie razem z procesami, które uruchomiło
+    # (np. pula symulacji Monte Carlo). Zatrzymanie prowadzi proces główny, który czeka na dokończenie zadań
+    os.setpgrp()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    django.setup()
+
+
+def run(job_id):
+    # Jak na granicach requestu – zerwane albo zbyt stare połączenie nie psuje kolejnych zadań
+    from .jobs import execute
+
+    close_old_connections()
+    try:
+        execute(job_id)
+    finally:
+        close_old_connections()
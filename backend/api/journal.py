@@ -0,0 +1,266 @@
+import json
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError as ArchiveError
+from analytics.cache import bump_version
+from analytics.equity import rebuild_user_curves
+from analytics.models import Instrument
+from analytics.rollups import rebuild_user_rollups
+from trade_samples.aggregates import rebuild_aggregates
+from . import events
+from .exporting import CHUNK_SIZE, EXPORTS, NDJSONEncoder, stream
+from .importing import MAX_REPORTED_ERRORS
+from .listitems import rebuild_items
+from .search import rebuild_documents
+
+ARCHIVE_VERSION = 1
+SKIP = object()
+
+# Kolejność zależności: playbooki i próbki przed trade'ami, które na nie wskazują
+SECTIONS = ['playbooks', 'samples', 'trades', 'trade-logs', 'drcs', 'reminders', 'market-drivers', 'market-bias']
+
+# Kolumna z archiwum -> (atrybut modelu, sekcja, do której musi wskazywać)
+REFERENCES = {
+    'trades': {'sample': ('sample_id', 'samples'), 'strategy': ('strategy_id', 'playbooks')},
+    'trade-logs': {'strategy': ('strategy_id', 'playbooks')},
+}
+
+
+def archive_chunks(user, chunk_size=CHUNK_SIZE):
+    """
+    Cały dziennik jako NDJSON: wiersz nagłówka, potem rekordy kolejnych sekcji z polem `type`.
+    Kolumny jak w eksporcie pojedynczych zasobów.
+    """
+    header = {'type': 'journal', 'version': ARCHIVE_VERSION, 'exported_at': timezone.now().isoformat()}
+    yield (json.dumps(header) + '\n').encode()
+    for section in SECTIONS:
+        export = EXPORTS[section]
+        encoder = NDJSONEncoder(['type', *(column for column, _ in export.columns)], None)
+        rows = ((section, *row) for row in export.queryset(user).iterator(chunk_size=chunk_size))
+        yield from stream(encoder, rows, chunk_size)
+
+
+def _owner_unique_fields(model):
+    # Zestawy pól unikalnych razem z właścicielem (unique_together i bezwarunkowe UniqueConstraint)
+    sets = [tuple(fields) for fields in model._meta.unique_together]
+    sets += [tuple(constraint.fields) for constraint in model._meta.total_unique_constraints]
+    return [fields for fields in sets if 'owner' in fields and len(fields) > 1]
+
+
+class JournalRestore:
+    """
+    Odtwarza dziennik z archiwum (archive_chunks) na koncie użytkownika, zachowując UUID i powiązania.
+    Rekordy zapisywane przez bulk_create paczkami, jedna transakcja na paczkę – bez sygnałów i bez
+    przyrostowych agregatów próbek; agregaty, krzywe kapitału i wersja cache liczone raz na końcu.
+    W trybie replace całość (usunięcie i wstawienie) to jedna transakcja: archiwum, z którego nic
+    nie powstało, albo błąd w trakcie zostawia dotychczasowy dziennik bez zmian.
+    """
+
+    def __init__(self, user, batch_size=CHUNK_SIZE, replace=False):
+        self.user = user
+        self.batch_size = batch_size
+        self.replace = replace
+        self.created = dict.fromkeys(SECTIONS, 0)
+        self.failed = 0
+        self.errors = []
+        self.known_ids = {
+            'playbooks': set(user.playbooks.values_list('id', flat=True)),
+            'samples': set(user.trade_samples.values_list('id', flat=True)),
+        }
+        self.instruments = dict(Instrument.objects.values_list('name', 'id'))
+        self._column_specs = {}
+
+    def _record_error(self, number, detail):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': number, 'errors': detail})
+
+    def clear(self):
+        # Tryb replace: najpierw usuwamy dotychczasowy dziennik (trade'y i logi kaskadowo z próbkami i playbookami);
+        # wywoływane w transakcji z run()
+        for related_name in ('trade_samples', 'playbooks', 'daily_report_cards', 'reminders', 'market_drivers'):
+            getattr(self.user, related_name).all().delete()
+        self.known_ids = {'playbooks': set(), 'samples': set()}
+
+    def _instrument_ids(self, names):
+        # Instrumenty są wspólne dla wszystkich – brakujące tworzymy jednym bulk_create
+        missing = {name for name in names if name not in self.instruments}
+        if missing:
+            Instrument.objects.bulk_create([Instrument(name=name) for name in missing], ignore_conflicts=True)
+            self.instruments.update(Instrument.objects.filter(name__in=missing).values_list('name', 'id'))
+
+    def _columns(self, model, section):
+        # (kolumna, atrybut modelu, pole, sekcja docelowa referencji) – liczone raz na sekcję, nie na wiersz
+        if section in self._column_specs:
+            return self._column_specs[section]
+        references = REFERENCES.get(section, {})
+        columns = []
+        for column, lookup in EXPORTS[section].columns:
+            # updated_at ustawia auto_now; biasy nadpisują istniejące wiersze konta, więc bez własnego id
+            if column == 'updated_at' or (section == 'market-bias' and column == 'id'):
+                continue
+            if column in references:
+                attname, target = references[column]
+                columns.append((column, attname, model._meta.get_field(attname), target))
+            elif lookup == 'instrument__name':
+                columns.append((column, 'instrument_id', model._meta.get_field('instrument'), None))
+            else:
+                columns.append((column, lookup, model._meta.get_field(lookup), None))
+        self._column_specs[section] = columns
+        return columns
+
+    def _value(self, attname, field, target, value):
+        # Wartość atrybutu; SKIP = pole pominięte, model weźmie wartość domyślną
+        if target is not None:
+            value = field.target_field.to_python(value) if value not in (None, '') else None
+            if value is not None and value not in self.known_ids[target]:
+                raise ValidationError(f"Unknown {target[:-1]}.")
+        elif attname == 'instrument_id':
+            value = self.instruments.get(value) if value else None
+        else:
+            if value is None and (field.has_default() or field.blank):
+                return SKIP
+            # Jak Field.clean, ale puste wartości (np. [] w polach JSON) przechodzą – tak zapisuje je sam model
+            value = field.to_python(value)
+            if value not in field.empty_values:
+                field.validate(value, None)
+                field.run_validators(value)
+            elif isinstance(value, str) and not field.blank:
+                raise ValidationError(field.error_messages['blank'], code='blank')
+
+        if value is None and not field.null:
+            raise ValidationError("This field is required.")
+        return value
+
+    def build_instance(self, model, section, number, row):
+        values, errors = {}, {}
+        for column, attname, field, target in self._columns(model, section):
+            try:
+                value = self._value(attname, field, target, row.get(column))
+            except ValidationError as exc:
+                errors[column] = exc.messages
+                continue
+            if value is not SKIP:
+                values[attname] = value
+
+        if errors:
+            self._record_error(number, {'type': section, **errors})
+            return None
+        return model(owner=self.user, **values)
+
+    def _save(self, section, batch):
+        if section == 'trade-logs':
+            self._instrument_ids({row.get('instrument') for _, row in batch if row.get('instrument')})
+
+        model = EXPORTS[section].queryset(self.user).model
+        instances = []
+        for number, row in batch:
+            instance = self.build_instance(model, section, number, row)
+            if instance is not None:
+                instances.append((number, instance))
+        if not instances:
+            return
+
+        with transaction.atomic():
+            if section == 'market-bias':
+                # Domyślne biasy konta już istnieją – nadpisujemy je po instrumencie, nie po id
+                model.objects.bulk_create(
+                    [instance for _, instance in instances],
+                    update_conflicts=True, unique_fields=['owner', 'instrument'], update_fields=['bias', 'updated_at'],
+                )
+            else:
+                taken = set(model.objects.filter(pk__in=[instance.pk for _, instance in instances])
+                            .values_list('pk', flat=True))
+                for number, instance in instances:
+                    if instance.pk in taken:
+                        self._record_error(number, {'type': section, 'id': ["Object with this id already exists."]})
+                instances = [(number, instance) for number, instance in instances if instance.pk not in taken]
+                instances = self._drop_unique_conflicts(model, section, instances)
+                model.objects.bulk_create([instance for _, instance in instances], batch_size=self.batch_size)
+
+        self.created[section] += len(instances)
+        if section in self.known_ids:
+            self.known_ids[section].update(instance.pk for _, instance in instances)
+
+    def _drop_unique_conflicts(self, model, section, instances):
+        # Unikalność w obrębie konta (np. jedna karta DRC na dzień) – kolizje z kontem albo z wcześniejszym
+        # wierszem archiwum to błędy wierszy, nie IntegrityError całej paczki
+        for fields in _owner_unique_fields(model):
+            others = [field for field in fields if field != 'owner']
+            attnames = [model._meta.get_field(field).attname for field in others]
+            keys = [tuple(getattr(instance, attname) for attname in attnames) for _, instance in instances]
+            existing = set(
+                model.objects.filter(owner=self.user, **{f'{attnames[0]}__in': {key[0] for key in keys}})
+                .values_list(*attnames)
+            )
+            kept = []
+            for (number, instance), key in zip(instances, keys):
+                if key in existing:
+                    self._record_error(number, {'type': section, **{field: [
+                        f"{model._meta.verbose_name.capitalize()} with this {' and '.join(others)} already exists."
+                    ] for field in others}})
+                else:
+                    existing.add(key)
+                    kept.append((number, instance))
+            instances = kept
+        return instances
+
+    def _sections(self, rows):
+        # (sekcja, paczka) w kolejności archiwum; paczka kończy się na zmianie sekcji albo po batch_size wierszach
+        section, batch = None, []
+        for number, row in rows:
+            if isinstance(row, Exception):
+                self._record_error(number, {'non_field_errors': [str(row)]})
+                continue
+            row_type = row.get('type') if isinstance(row, dict) else None
+            if row_type == 'journal':
+                if row.get('version') != ARCHIVE_VERSION:
+                    raise ArchiveError({'version': [f"Unsupported journal archive version {row.get('version')!r}."]})
+                continue
+            if row_type not in SECTIONS:
+                self._record_error(number, {'type': [f"Expected one of: {', '.join(SECTIONS)}."]})
+                continue
+            if batch and (row_type != section or len(batch) >= self.batch_size):
+                yield section, batch
+                batch = []
+            section = row_type
+            batch.append((number, row))
+        if batch:
+            yield section, batch
+
+    def run(self, rows):
+        if not self.replace:
+            return self._restore(rows)
+        with transaction.atomic():
+            self.clear()
+            summary = self._restore(rows)
+            if not any(self.created.values()):
+                transaction.set_rollback(True)
+        return summary
+
+    def _restore(self, rows):
+        for section, batch in self._sections(rows):
+            self._save(section, batch)
+        if any(self.created.values()):
+            self.after_restore()
+        return self.summary()
+
+    def after_restore(self):
+        # Agregaty z archiwum tylko weryfikujemy jednym zapytaniem grupującym; poprawiane są tylko rozbieżne próbki
+        rebuild_aggregates(self.user.trade_samples.all())
+        rebuild_user_curves(self.user)
+        rebuild_user_rollups(self.user)
+        rebuild_items(self.user.daily_report_cards.all())
+        rebuild_items(self.user.playbooks.all())
+        rebuild_documents(self.user)
+        bump_version(self.user.pk)
+        events.publish(self.user.pk, 'journal', action='restored', created=self.created)
+
+    def summary(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
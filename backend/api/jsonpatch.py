@@ -0,0 +1,130 @@
+import copy
+from rest_framework.parsers import JSONParser
+
+
+class PatchError(ValueError):
+    pass
+
+
+class PatchTestFailed(PatchError):
+    pass
+
+
+class JSONPatchParser(JSONParser):
+    media_type = 'application/json-patch+json'
+
+
+def parse_pointer(pointer):
+    # RFC 6901: '/mistakes_with_solutions/0/solution' -> ['mistakes_with_solutions', '0', 'solution']
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith('/')):
+        raise PatchError(f"Invalid JSON pointer {pointer!r}.")
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer.split('/')[1:]] if pointer else []
+
+
+def _index(container, token, allow_end=False):
+    if token == '-' and allow_end:
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith('0')):
+        raise PatchError(f"Invalid array index {token!r}.")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"Array index {index} is out of range.")
+    return index
+
+
+def _child(target, token):
+    if isinstance(target, list):
+        return target[_index(target, token)]
+    if isinstance(target, dict):
+        if token not in target:
+            raise PatchError(f"Path segment {token!r} does not exist.")
+        return target[token]
+    raise PatchError(f"Path segment {token!r} points into a scalar value.")
+
+
+def _get(document, tokens):
+    target = document
+    for token in tokens:
+        target = _child(target, token)
+    return target
+
+
+def _parent(document, tokens):
+    # Kontener, na którym działa operacja, i ostatni token ścieżki
+    if not tokens:
+        raise PatchError("Operations on the whole document are not supported.")
+    container = _get(document, tokens[:-1])
+    if not isinstance(container, (list, dict)):
+        raise PatchError(f"Path segment {tokens[-1]!r} points into a scalar value.")
+    return container, tokens[-1]
+
+
+def _add(document, tokens, value):
+    container, token = _parent(document, tokens)
+    if isinstance(container, list):
+        container.insert(_index(container, token, allow_end=True), value)
+    else:
+        container[token] = value
+
+
+def _remove(document, tokens):
+    container, token = _parent(document, tokens)
+    value = _child(container, token)
+    if isinstance(container, list):
+        del container[_index(container, token)]
+    else:
+        del container[token]
+    return value
+
+
+def _replace(document, tokens, value):
+    container, token = _parent(document, tokens)
+    _child(container, token)
+    container[_index(container, token) if isinstance(container, list) else token] = value
+
+
+def apply_patch(document, operations, roots=None):
+    """
+    Łatka JSON (RFC 6902) na kopii dokumentu – błąd w dowolnej operacji odrzuca całą łatkę.
+    `roots` ogranicza pierwszy segment ścieżek; nieudany `test` zgłasza PatchTestFailed.
+    """
+    if not isinstance(operations, list):
+        raise PatchError("A JSON Patch document must be a list of operations.")
+
+    document = copy.deepcopy(document)
+    for operation in operations:
+        if not isinstance(operation, dict) or 'op' not in operation or 'path' not in operation:
+            raise PatchError("Every operation needs 'op' and 'path'.")
+        op = operation['op']
+        pointers = {'path': parse_pointer(operation['path'])}
+        if op in ('move', 'copy'):
+            if 'from' not in operation:
+                raise PatchError(f"'{op}' needs 'from'.")
+            pointers['from'] = parse_pointer(operation['from'])
+        if op in ('add', 'replace', 'test') and 'value' not in operation:
+            raise PatchError(f"'{op}' needs 'value'.")
+        if roots is not None:
+            for name, tokens in pointers.items():
+                if not tokens or tokens[0] not in roots:
+                    raise PatchError(f"'{name}' must point into one of: {', '.join(roots)}.")
+
+        path = pointers['path']
+        if op == 'add':
+            _add(document, path, copy.deepcopy(operation['value']))
+        elif op == 'remove':
+            _remove(document, path)
+        elif op == 'replace':
+            _replace(document, path, copy.deepcopy(operation['value']))
+        elif op == 'move':
+            source = pointers['from']
+            if path[:len(source)] == source and path != source:
+                raise PatchError("A value cannot be moved into itself.")
+            _add(document, path, _remove(document, source))
+        elif op == 'copy':
+            _add(document, path, copy.deepcopy(_get(document, pointers['from'])))
+        elif op == 'test':
+            if _get(document, path) != operation['value']:
+                raise PatchTestFailed(f"Test operation failed at {operation['path']!r}.")
+        else:
+            raise PatchError(f"Unknown operation {op!r}.")
+    return document
@@ -0,0 +1,88 @@
+import json
+from django.db import transaction
+from django.db.models import Count, Max
+from .importing import chunked
+
+MAX_TEXT_LENGTH = 255
+
+
+def item_text(item, key=None):
+    # Tekst elementu listy: napis wprost, w słowniku wartość pola-klucza (np. 'mistake'), reszta jako JSON
+    if isinstance(item, dict) and key in item:
+        item = item[key]
+    if item is None:
+        return ''
+    text = item if isinstance(item, str) else json.dumps(item, sort_keys=True, ensure_ascii=False)
+    return text.strip()[:MAX_TEXT_LENGTH]
+
+
+def item_key(text):
+    # Klucz wyszukiwania – bez wielkości liter i zbędnych spacji
+    return ' '.join(text.split()).casefold()[:MAX_TEXT_LENGTH]
+
+
+def _relation(model):
+    # Obiekt z polami-listami -> (model elementów, nazwa FK do obiektu); elementy zawsze pod related_name='items'
+    relation = model._meta.get_field('items')
+    return relation.related_model, relation.field.name
+
+
+def item_model_for(model):
+    return _relation(model)[0]
+
+
+def _build(item_model, parent, instance, fields):
+    for field in fields:
+        values = getattr(instance, field)
+        for position, item in enumerate(values if isinstance(values, list) else []):
+            text = item_text(item, item_model.KEYS.get(field))
+            if text:
+                yield item_model(**{parent: instance}, owner_id=instance.owner_id, field=field,
+                                 position=position, text=text, key=item_key(text))
+
+
+def sync_items(instance, fields=None):
+    """Odtwarza wiersze elementów podanych (domyślnie wszystkich) pól-list jednego obiektu."""
+    item_model, parent = _relation(type(instance))
+    fields = [field for field in (item_model.FIELDS if fields is None else fields) if field in item_model.FIELDS]
+    if not fields:
+        return
+    with transaction.atomic():
+        instance.items.filter(field__in=fields).delete()
+        item_model.objects.bulk_create(_build(item_model, parent, instance, fields))
+
+
+def rebuild_items(queryset, batch_size=2000):
+    item_model, parent = _relation(queryset.model)
+    with transaction.atomic():
+        item_model.objects.filter(**{f'{parent}__in': queryset.values('pk')}).delete()
+        items = (
+            item for instance in queryset.iterator(chunk_size=batch_size)
+            for item in _build(item_model, parent, instance, item_model.FIELDS)
+        )
+        for batch in chunked(items, batch_size):
+            item_model.objects.bulk_create(batch)
+
+
+def filter_by_items(queryset, owner, params):
+    """
+    ?mistakes_with_solutions=FOMO – tylko obiekty, których lista zawiera taki element (bez wielkości liter).
+    Kilka parametrów łączone przez AND; każdy to półzłączenie po indeksie (owner, field, key).
+    """
+    item_model, parent = _relation(queryset.model)
+    for field in item_model.FIELDS:
+        if params.get(field):
+            matching = item_model.objects.filter(owner=owner, field=field, key=item_key(params[field]))
+            queryset = queryset.filter(pk__in=matching.values(parent))
+    return queryset
+
+
+def item_counts(model, owner, field):
+    """Najczęstsze elementy pola (np. powtarzające się błędy) – w ilu obiektach wystąpiły, jednym zapytaniem."""
+    item_model, parent = _relation(model)
+    return (
+        item_model.objects.filter(owner=owner, field=field)
+        .values('key')
+        .annotate(text=Max('text'), count=Count(parent, distinct=True))
+        .order_by('-count', 'key')
+    )
@@ -0,0 +1,100 @@
+import json
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from api.benchmark import compare_results, run_benchmark
+from api.seeding import seed_journal
+
+# Osobny cache w pamięci – benchmark nie czyta ani nie czyści współdzielonego Redisa
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark',
+    }
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds synthetic users into a throwaway test database, drives every router endpoint through the "
+        "Django test client and reports p50/p95/p99 latency, queries per request and response size. "
+        "With --baseline it fails when results regress against a previously saved run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=3, help="Seeded users; requests are made as the first one.")
+        parser.add_argument('--playbooks', type=int, default=10)
+        parser.add_argument('--samples', type=int, default=20)
+        parser.add_argument('--trades', type=int, default=5000)
+        parser.add_argument('--trade-logs', type=int, default=5000)
+        parser.add_argument('--drcs', type=int, default=365)
+        parser.add_argument('--repeat', type=int, default=20, help="Requests per endpoint.")
+        parser.add_argument('--cold', action='store_true', help="Clear the cache before every request.")
+        parser.add_argument('--no-writes', action='store_true', help="Skip the create/delete scenarios.")
+        parser.add_argument('--save', help="Write results as JSON to this file.")
+        parser.add_argument('--baseline', help="Compare against results saved earlier with --save.")
+        parser.add_argument('--latency-tolerance', type=float, default=0.25, help="Allowed relative p95 growth.")
+        parser.add_argument('--latency-slack', type=float, default=5.0, help="Absolute p95 noise margin in ms.")
+        parser.add_argument('--size-tolerance', type=float, default=0.10, help="Allowed relative size growth.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)
+
+        scale = {
+            name: options[name]
+            for name in ('users', 'playbooks', 'samples', 'trades', 'trade_logs', 'drcs', 'repeat', 'cold')
+        }
+        if baseline is not None and baseline.get('scale') != scale:
+            self.stderr.write(self.style.WARNING(f"Baseline was recorded with a different scale: {baseline.get('scale')}"))
+
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES):
+                results = self._run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self._report(results)
+        if options['save']:
+            with open(options['save'], 'w') as file:
+                json.dump({'vendor': connection.vendor, 'scale': scale, 'results': results}, file, indent=2)
+            self.stdout.write(f"Saved {len(results)} result(s) to {options['save']}")
+
+        failures = compare_results(
+            results, baseline['results'] if baseline else {},
+            latency_tolerance=options['latency_tolerance'],
+            latency_slack_ms=options['latency_slack'],
+            size_tolerance=options['size_tolerance'],
+        )
+        for failure in failures:
+            self.stderr.write(failure)
+        if failures:
+            raise CommandError(f"{len(failures)} regression(s) found.")
+        self.stdout.write(self.style.SUCCESS(f"{len(results)} endpoint(s) within thresholds."))
+
+    def _run(self, options):
+        self.stdout.write(f"Seeding {options['users']} user(s) on {connection.vendor}...")
+        users = []
+        for index in range(options['users']):
+            user = User.objects.create_user(username=f"benchmark-{index}", password="benchmark")
+            seed_journal(
+                user, playbooks=options['playbooks'], samples=options['samples'], trades=options['trades'],
+                trade_logs=options['trade_logs'], drcs=options['drcs'], seed=index,
+            )
+            users.append(user)
+        return run_benchmark(users[0], repeat=options['repeat'], cold=options['cold'], writes=not options['no_writes'])
+
+    def _report(self, results):
+        width = max(len(key) for key in results)
+        self.stdout.write(f"{'endpoint':<{width}} {'status':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>7} {'bytes':>9}")
+        for key, result in results.items():
+            self.stdout.write(
+                f"{key:<{width}} {result['status']:>6} {result['p50']:>7.2f}ms {result['p95']:>7.2f}ms "
+                f"{result['p99']:>7.2f}ms {result['queries']:>7} {result['bytes']:>9}"
+            )
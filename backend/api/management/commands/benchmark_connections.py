@@ -0,0 +1,89 @@
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from api.checks import psycopg_pool_available
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares connection strategies against the configured Postgres: a new connection per request, "
+        "persistent connections, the psycopg pool and optionally PgBouncer. Every simulated request runs "
+        "Django's request start/finish connection handling around a single query."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Requests per mode.")
+        parser.add_argument('--threads', type=int, default=4, help="Concurrent workers (one connection each).")
+        parser.add_argument('--pgbouncer-url', help="postgres:// URL of a PgBouncer in front of the same database.")
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'postgresql':
+            raise CommandError("The connection benchmark needs DATABASE_URL pointing at Postgres.")
+
+        threads = options['threads']
+        modes = {
+            'per-request': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+            'persistent': {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True},
+        }
+        if psycopg_pool_available():
+            modes['pool'] = {
+                'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': True,
+                'OPTIONS': {'pool': {'min_size': threads, 'max_size': threads}},
+            }
+        else:
+            self.stdout.write("psycopg 3 with psycopg_pool not installed, skipping the pool mode.")
+        if options['pgbouncer_url']:
+            url = urlparse(options['pgbouncer_url'])
+            modes['pgbouncer'] = {
+                'NAME': url.path.replace('/', ''), 'USER': url.username, 'PASSWORD': url.password,
+                'HOST': url.hostname, 'PORT': url.port or 6432,
+                'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True, 'DISABLE_SERVER_SIDE_CURSORS': True,
+            }
+
+        self.stdout.write(f"{'mode':<12} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>9}")
+        for mode, overrides in modes.items():
+            alias = f"benchmark_{mode.replace('-', '_')}"
+            self._add_alias(alias, overrides)
+            try:
+                timings, elapsed = self._run(alias, options['requests'], threads)
+            finally:
+                connections[alias].close_pool()
+            p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+            self.stdout.write(
+                f"{mode:<12} {p50:>7.2f}ms {p95:>7.2f}ms {p99:>7.2f}ms {len(timings) / elapsed:>9.0f}"
+            )
+
+    def _add_alias(self, alias, overrides):
+        overrides = copy.deepcopy(overrides)
+        database = copy.deepcopy(connections.settings['default'])
+        options = {key: value for key, value in database['OPTIONS'].items() if key != 'pool'}
+        options.update(overrides.pop('OPTIONS', {}))
+        connections.settings[alias] = {**database, 'DISABLE_SERVER_SIDE_CURSORS': False, **overrides, 'OPTIONS': options}
+
+    def _request(self, alias):
+        # To samo co sygnały request_started / request_finished wokół widoku z jednym zapytaniem
+        connection = connections[alias]
+        started = time.perf_counter()
+        connection.close_if_unusable_or_obsolete()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        connection.close_if_unusable_or_obsolete()
+        return (time.perf_counter() - started) * 1000
+
+    def _worker(self, alias, count):
+        try:
+            return [self._request(alias) for _ in range(count)]
+        finally:
+            connections[alias].close()
+
+    def _run(self, alias, requests, threads):
+        per_thread = [requests // threads + (index < requests % threads) for index in range(threads)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(lambda count: self._worker(alias, count), per_thread))
+        elapsed = time.perf_counter() - started
+        return [timing for timings in results for timing in timings], elapsed
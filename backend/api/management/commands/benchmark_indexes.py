@@ -0,0 +1,121 @@
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from analytics.models import TradeLog
+from api.seeding import seed_journal
+from trade_samples.models import TradeSample, Trade
+from userentries.models import Playbook
+
+# Indeksy dodane pod dostęp owner/sample/strategy + data – usuwane na czas pomiaru "before"
+BENCHMARKED_INDEXES = {
+    TradeLog: ['tradelog_owner_date_idx', 'tradelog_strategy_date_idx', 'tradelog_owner_instrument_idx'],
+    Trade: ['trade_owner_date_idx', 'trade_sample_date_idx', 'trade_strategy_date_idx', 'trade_owner_instrument_idx'],
+    TradeSample: ['sample_owner_start_idx'],
+    Playbook: ['playbook_owner_title_idx'],
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a synthetic journal inside a transaction, measures the owner-scoped queries with and without "
+        "the composite indexes (and with the Trade.owner column vs the old join), prints plans and latency, "
+        "then rolls everything back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Trades and trade logs to seed (each).")
+        parser.add_argument('--repeat', type=int, default=10, help="Timed runs per query.")
+        parser.add_argument('--plans', action='store_true', help="Print EXPLAIN output for every query.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write("Benchmark data rolled back.")
+
+    def _run(self, options):
+        rows = options['rows']
+        self.stdout.write(f"Seeding {rows} trades and {rows} trade logs on {connection.vendor}...")
+        started = time.perf_counter()
+        user = User.objects.create_user(username=f"benchmark-{uuid.uuid4().hex[:8]}")
+        seed_journal(user, playbooks=20, samples=max(1, rows // 1000), trades=rows, trade_logs=rows, drcs=min(rows, 3650))
+        self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+        cases = self._cases(user)
+        self._analyze()
+        after = {name: self._measure(after_fn(), options) for name, _, after_fn in cases}
+
+        with connection.cursor() as cursor:
+            for names in BENCHMARKED_INDEXES.values():
+                for name in names:
+                    cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+        self._analyze()
+        before = {name: self._measure(before_fn(), options) for name, before_fn, _ in cases}
+
+        self.stdout.write("")
+        self.stdout.write(f"{'query':<40} {'before p50':>11} {'after p50':>11} {'before p95':>11} {'after p95':>11}")
+        for name, _, _ in cases:
+            b, a = before[name], after[name]
+            self.stdout.write(f"{name:<40} {b['p50']:>9.2f}ms {a['p50']:>9.2f}ms {b['p95']:>9.2f}ms {a['p95']:>9.2f}ms")
+
+        if options['plans']:
+            for name, _, _ in cases:
+                self.stdout.write(f"\n== {name}\n-- before\n{before[name]['plan']}\n-- after\n{after[name]['plan']}")
+
+    def _cases(self, user):
+        playbook = user.playbooks.first()
+        sample = user.trade_samples.first()
+        latest = Trade.objects.filter(owner=user).order_by('-date').first()
+        month = (latest.date - timedelta(days=31), latest.date)
+        # (nazwa, queryset przed zmianą, queryset po zmianie)
+        return [
+            ("trade logs list (owner, -date)",
+             lambda: TradeLog.objects.filter(owner=user).order_by('-date')[:50],
+             lambda: TradeLog.objects.filter(owner=user).order_by('-date')[:50]),
+            ("playbook R series (strategy, date)",
+             lambda: TradeLog.objects.filter(strategy=playbook).order_by('date').values_list('realized_r'),
+             lambda: TradeLog.objects.filter(strategy=playbook).order_by('date').values_list('realized_r')),
+            ("trades list (join vs Trade.owner)",
+             lambda: Trade.objects.filter(sample__owner=user).order_by('-date')[:50],
+             lambda: Trade.objects.filter(owner=user).order_by('-date')[:50]),
+            ("sample trades (sample, -date)",
+             lambda: Trade.objects.filter(sample=sample).order_by('-date'),
+             lambda: Trade.objects.filter(sample=sample).order_by('-date')),
+            ("playbook trades (strategy, date)",
+             lambda: Trade.objects.filter(strategy=playbook).order_by('date').values_list('realized_r_multiple'),
+             lambda: Trade.objects.filter(strategy=playbook).order_by('date').values_list('realized_r_multiple')),
+            ("filtered trades (owner, instrument, -date)",
+             lambda: Trade.objects.filter(owner=user, instrument=latest.instrument, date__range=month).order_by('-date')[:50],
+             lambda: Trade.objects.filter(owner=user, instrument=latest.instrument, date__range=month).order_by('-date')[:50]),
+            ("samples list (owner, -start_date)",
+             lambda: TradeSample.objects.filter(owner=user).order_by('-start_date')[:50],
+             lambda: TradeSample.objects.filter(owner=user).order_by('-start_date')[:50]),
+        ]
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def _measure(self, queryset, options):
+        plan = queryset.explain()
+        timings = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            list(queryset._chain())
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return {
+            'p50': statistics.median(timings),
+            'p95': timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))],
+            'plan': plan,
+        }
@@ -0,0 +1,25 @@
+import sys
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from api.journal import archive_chunks
+
+
+class Command(BaseCommand):
+    help = "Writes a user's full journal as an NDJSON archive that import_journal can restore in another environment."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--output', '-o', help="Archive path (defaults to stdout).")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"User '{options['username']}' does not exist.")
+
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in archive_chunks(user):
+                output.write(chunk)
+        finally:
+            if options['output']:
+                output.close()
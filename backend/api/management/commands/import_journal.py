@@ -0,0 +1,45 @@
+import json
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from api.importing import iter_ndjson_rows
+from api.journal import JournalRestore
+
+
+class Command(BaseCommand):
+    help = (
+        "Restores an NDJSON journal archive (export_journal or /api/export/journal/) into a user account, "
+        "keeping UUIDs and relations. Rows are bulk inserted in batches, one transaction per batch "
+        "(with --replace the whole restore is one transaction)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('archive')
+        parser.add_argument('--create-user', action='store_true', help="Create the user if it does not exist.")
+        parser.add_argument('--replace', action='store_true', help="Delete the user's current journal first; kept if nothing could be restored.")
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            if not options['create_user']:
+                raise CommandError(f"User '{options['username']}' does not exist (use --create-user).")
+            user = User.objects.create_user(username=options['username'])
+
+        restore = JournalRestore(user, batch_size=options['batch_size'], replace=options['replace'])
+        started = time.perf_counter()
+        with open(options['archive'], encoding='utf-8') as archive:
+            try:
+                summary = restore.run(iter_ndjson_rows(archive))
+            except ValidationError as exc:
+                raise CommandError(json.dumps(exc.detail))
+        elapsed = time.perf_counter() - started
+
+        for error in summary['errors']:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        created = ', '.join(f"{section}: {count}" for section, count in summary['created'].items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Restored in {elapsed:.1f}s ({created}), {summary['failed']} row(s) failed."
+        ))
@@ -0,0 +1,22 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from api.listitems import rebuild_items
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the normalized item rows of DRC and playbook list fields (reminders, mistakes, checklist...)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only rebuild items of this username.")
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['user']:
+            users = users.filter(username=options['user'])
+
+        for user in users.iterator():
+            rebuild_items(user.daily_report_cards.all())
+            rebuild_items(user.playbooks.all())
+            self.stdout.write(f"Rebuilt list items for {user.username}")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt list items for {users.count()} user(s)."))
@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from api.search import rebuild_documents
+
+
+class Command(BaseCommand):
+    help = "Rebuilds full-text search documents (and tsvectors on PostgreSQL) from trades, DRCs and playbooks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only rebuild documents of this username.")
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['user']:
+            users = users.filter(username=options['user'])
+
+        for user in users.iterator():
+            rebuild_documents(user)
+            self.stdout.write(f"Rebuilt search documents for {user.username}")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search documents for {users.count()} user(s)."))
@@ -0,0 +1,118 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api import jobworker
+from api.jobs import claim, expire_jobs, fail
+
+# Co ile sekund sprawdzać zadania utracone i wyniki po terminie
+EXPIRY_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = "Runs queued background jobs (api.Job) in a process pool until stopped with SIGINT/SIGTERM."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.JOBS_WORKERS, help="Size of the process pool.")
+        parser.add_argument('--poll', type=float, default=settings.JOBS_POLL_SECONDS,
+                            help="Seconds between checks of an idle queue.")
+        parser.add_argument('--once', action='store_true', help="Exit when the queue is empty and all jobs finished.")
+
+    def _pool(self, workers):
+        # spawn zamiast fork – procesy nie dziedziczą połączeń z bazą ani stanu tego procesu
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=jobworker.init_worker,
+        )
+
+    def _kill(self, pool):
+        # ProcessPoolExecutor nie ma publicznego sposobu na przerwanie zadania – zabijamy grupy procesów puli
+        # (jobworker.init_worker), żeby nie zostały osierocone procesy potomne zadań
+        for process in list(pool._processes.values()):
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+        self.stdout.write("Stopping – waiting for running jobs to finish.")
+
+    def handle(self, *args, **options):
+        workers, poll = max(options['workers'], 1), options['poll']
+        name = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = False
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+
+        pool, running, finished, last_expiry = self._pool(workers), {}, 0, 0.0
+        started, hung = {}, set()
+        self.stdout.write(f"Worker {name} started with {workers} process(es).")
+        try:
+            while True:
+                if time.monotonic() - last_expiry >= EXPIRY_INTERVAL:
+                    timed_out, purged = expire_jobs()
+                    if timed_out or purged:
+                        self.stdout.write(f"Marked {timed_out} lost job(s) as failed, purged {purged} expired job(s).")
+                    last_expiry = time.monotonic()
+
+                # Zadanie ponad JOBS_TIMEOUT_SECONDS od razu failed; pula nie bierze nowych, a gdy zostaną w niej
+                # tylko zawieszone zadania, jest zabijana i tworzona od nowa – zajęty proces wraca do puli
+                now = time.monotonic()
+                overdue = [future for future in running
+                           if future not in hung and now - started[future] > settings.JOBS_TIMEOUT_SECONDS]
+                if overdue:
+                    fail([running[future] for future in overdue], "The job did not finish in time.")
+                    hung.update(overdue)
+                    self.stderr.write(f"Job(s) {', '.join(str(running[future]) for future in overdue)} timed out.")
+                if hung and hung.issuperset(running):
+                    self._kill(pool)
+                    finished += len(running)
+                    running.clear()
+                    started.clear()
+                    hung.clear()
+                    pool = self._pool(workers)
+
+                claimed = [] if self.stopping or hung else claim(name, workers - len(running))
+                for job_id in claimed:
+                    future = pool.submit(jobworker.run, job_id)
+                    running[future], started[future] = job_id, time.monotonic()
+
+                if not running and (self.stopping or (options['once'] and not claimed)):
+                    break
+                if not running:
+                    time.sleep(poll)
+                    continue
+
+                done, _ = wait(running, timeout=poll, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    job_id = running.pop(future)
+                    started.pop(future)
+                    hung.discard(future)
+                    finished += 1
+                    try:
+                        future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        fail([job_id], "The worker process running the job crashed.")
+                    except Exception as exc:
+                        fail([job_id], "The job failed unexpectedly.")
+                        self.stderr.write(f"Job {job_id} failed: {exc!r}")
+                if broken:
+                    # Martwy proces psuje całą pulę – pozostałe zadania też przepadły, nowa pula dla kolejnych
+                    fail(list(running.values()), "The worker process running the job crashed.")
+                    running.clear()
+                    started.clear()
+                    hung.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self._pool(workers)
+        finally:
+            pool.shutdown(wait=True)
+
+        self.stdout.write(self.style.SUCCESS(f"Worker {name} stopped after {finished} job(s)."))
@@ -0,0 +1,188 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Pomiary jednego requestu. Instancja jest też execute_wrapperem Django – widzi każde zapytanie
+    (SQL z placeholderami, więc te same zapytania z innymi parametrami mają ten sam tekst).
+    """
+
+    def __init__(self):
+        self.view = 'unresolved'
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.statements = Counter()
+        self._serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def repeated_statements(self, threshold):
+        # Ten sam SQL powtórzony wiele razy w jednym requeście to prawie zawsze zapytanie per wiersz (N+1).
+        # Sterowanie transakcjami (np. BEGIN na SQLite przy transakcji na paczkę) się nie liczy
+        return {
+            sql: count for sql, count in self.statements.items()
+            if count >= threshold and not sql.lstrip().upper().startswith(TRANSACTION_STATEMENTS)
+        }
+
+
+def bind(metrics):
+    return _current.set(metrics)
+
+
+def unbind(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def timed_representation(to_representation, instance):
+    # Liczymy tylko najbardziej zewnętrzny serializer – zagnieżdżone są już w jego czasie
+    metrics = _current.get()
+    if metrics is None or metrics._serializing:
+        return to_representation(instance)
+
+    metrics._serializing = True
+    started = time.perf_counter()
+    try:
+        return to_representation(instance)
+    finally:
+        metrics._serializing = False
+        metrics.serializer_seconds += time.perf_counter() - started
+
+
+def view_name(view_func, method):
+    """`TradeSampleViewSet.list`, `PlaybookViewSet.monte_carlo` – nazwa akcji ViewSetu, a nie URL z identyfikatorem."""
+    cls = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if cls is None:
+        return f"{view_func.__module__}.{view_func.__name__}"
+    actions = getattr(view_func, 'actions', None) or {}
+    return f"{cls.__name__}.{actions.get(method.lower(), method.lower())}"
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip([*self.buckets, '+Inf'], self.counts):
+            total += count
+            yield bound, total
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.response_bytes = 0
+        self.n_plus_one = 0
+        self.statuses = Counter()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class MetricsRegistry:
+    """
+    Metryki per (widok, metoda) w pamięci procesu. Przy kilku workerach każdy ma swoje liczniki –
+    Prometheus sumuje je po stronie zapytań.
+    """
+
+    PREFIX = 'tradingzone'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, metrics, method, status, latency, size, n_plus_one=False):
+        with self._lock:
+            view = self._views.setdefault((metrics.view, method), ViewMetrics())
+            view.latency.observe(latency)
+            view.queries.observe(metrics.queries)
+            view.db_seconds += metrics.db_seconds
+            view.serializer_seconds += metrics.serializer_seconds
+            view.response_bytes += size
+            view.n_plus_one += int(n_plus_one)
+            view.statuses[status] += 1
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        """Format tekstowy Prometheusa (exposition format 0.0.4)."""
+        prefix = self.PREFIX
+        with self._lock:
+            views = sorted(self._views.items())
+            lines = []
+
+            def header(name, kind, help_text):
+                lines.append(f"# HELP {prefix}_{name} {help_text}")
+                lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+            header('requests_total', 'counter', "Requests per view, method and status.")
+            for (view, method), metrics in views:
+                for status, count in sorted(metrics.statuses.items()):
+                    lines.append(f"{prefix}_requests_total{_labels(view=view, method=method, status=status)} {count}")
+
+            for name, attribute, help_text in (
+                ('request_duration_seconds', 'latency', "Request latency including rendering."),
+                ('db_queries_per_request', 'queries', "Database queries executed per request."),
+            ):
+                header(name, 'histogram', help_text)
+                for (view, method), metrics in views:
+                    histogram = getattr(metrics, attribute)
+                    for bound, count in histogram.cumulative():
+                        lines.append(f"{prefix}_{name}_bucket{_labels(view=view, method=method, le=bound)} {count}")
+                    lines.append(f"{prefix}_{name}_sum{_labels(view=view, method=method)} {histogram.sum:.6f}")
+                    lines.append(f"{prefix}_{name}_count{_labels(view=view, method=method)} {histogram.count}")
+
+            for name, attribute, help_text in (
+                ('db_duration_seconds_total', 'db_seconds', "Time spent executing SQL."),
+                ('serializer_duration_seconds_total', 'serializer_seconds', "Time spent in serializer to_representation."),
+                ('response_bytes_total', 'response_bytes', "Response payload size."),
+                ('n_plus_one_total', 'n_plus_one', "Requests that repeated an identical SQL statement."),
+            ):
+                header(name, 'counter', help_text)
+                for (view, method), metrics in views:
+                    lines.append(f"{prefix}_{name}{_labels(view=view, method=method)} {getattr(metrics, attribute)}")
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,80 @@
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """
+    Latencja, liczba i czas zapytań, czas serializacji i rozmiar odpowiedzi per widok DRF
+    (np. `TradeSampleViewSet.list`). Powtórzony identyczny SQL jest logowany jako podejrzenie N+1.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        # Pod ASGI łańcuch jest async – middleware nie może wymuszać przejścia do wątku
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        request_metrics, token, started = self._start()
+        try:
+            with self._execute_wrappers(request_metrics):
+                response = self.get_response(request)
+        finally:
+            metrics.unbind(token)
+        return self._finish(request, response, request_metrics, started)
+
+    async def __acall__(self, request):
+        request_metrics, token, started = self._start()
+        # Połączenia są per wątek – wrapper trzeba założyć w wątku, w którym async ORM wykonuje zapytania requestu
+        wrappers = await sync_to_async(self._execute_wrappers)(request_metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrappers.close)()
+            metrics.unbind(token)
+        return self._finish(request, response, request_metrics, started)
+
+    def _start(self):
+        request_metrics = metrics.RequestMetrics()
+        return request_metrics, metrics.bind(request_metrics), time.perf_counter()
+
+    def _execute_wrappers(self, request_metrics):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(request_metrics))
+        return stack
+
+    def _finish(self, request, response, request_metrics, started):
+        latency = time.perf_counter() - started
+
+        repeated = request_metrics.repeated_statements(settings.METRICS_N_PLUS_ONE_THRESHOLD)
+        for sql, count in repeated.items():
+            logger.warning("Possible N+1 in %s: %d identical queries: %s", request_metrics.view, count, sql)
+
+        # Odpowiedzi strumieniowe nie mają znanego rozmiaru w momencie zwrotu
+        size = 0 if response.streaming else len(response.content)
+        metrics.registry.observe(
+            request_metrics, request.method, response.status_code, latency, size, n_plus_one=bool(repeated),
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request_metrics = metrics.current()
+        if request_metrics is not None:
+            request_metrics.view = metrics.view_name(view_func, request.method)
@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-18 13:44
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_gin_index(apps, schema_editor):
+    # search_vector wypełniany i przeszukiwany tylko na PostgreSQL – na innych bazach bez indeksu GIN
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE INDEX search_vector_gin_idx ON api_searchdocument USING gin (search_vector)')
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS search_vector_gin_idx')
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('drc', '0004_dailyreportcarditem'),
+        ('trade_samples', '0007_trade_owner_required_and_indexes'),
+        ('userentries', '0010_playbookitem'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('trade', 'Trade'), ('drc', 'Daily report card'), ('playbook', 'Playbook')], max_length=10)),
+                ('title', models.CharField(max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('date', models.DateField(null=True)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('card', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='drc.dailyreportcard')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to=settings.AUTH_USER_MODEL)),
+                ('playbook', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='userentries.playbook')),
+                ('trade', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='trade_samples.trade')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', 'kind'], name='search_owner_kind_idx')],
+            },
+        ),
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
@@ -0,0 +1,77 @@
+from itertools import islice
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.utils import timezone
+
+# Kopia logiki api.search z chwili tej migracji – migracja nie może zależeć od bieżącego kodu aplikacji
+BATCH_SIZE = 1000
+PLAYBOOK_FIELDS = ('entry_criteria', 'exit_strategy', 'stop_loss_rules', 'enhancers', 'trade_management', 'checklist')
+
+
+def list_text(values):
+    texts = []
+    for item in values if isinstance(values, list) else []:
+        if isinstance(item, dict):
+            texts.extend(value for value in item.values() if isinstance(value, str) and value)
+        elif item:
+            texts.append(str(item))
+    return '\n'.join(texts)
+
+
+def lines(*parts):
+    return '\n'.join(part for part in parts if part)
+
+
+def trade_document(trade):
+    day = timezone.localtime(trade.date).date()
+    return {'title': f"{trade.instrument} {day.isoformat()}", 'body': lines(trade.context, trade.comment), 'date': day}
+
+
+def card_document(card):
+    return {
+        'title': f"Daily report card {card.date.isoformat()}",
+        'body': lines(card.goal, list_text(card.mistakes_with_solutions), list_text(card.improvements)),
+        'date': card.date,
+    }
+
+
+def playbook_document(playbook):
+    criteria = [list_text(getattr(playbook, field)) for field in PLAYBOOK_FIELDS]
+    return {'title': playbook.title, 'body': lines(playbook.overview, *criteria), 'date': None}
+
+
+def backfill_documents(apps, schema_editor):
+    SearchDocument = apps.get_model('api', 'SearchDocument')
+    sources = [
+        (apps.get_model('trade_samples', 'Trade'), 'trade', 'trade', trade_document),
+        (apps.get_model('drc', 'DailyReportCard'), 'drc', 'card', card_document),
+        (apps.get_model('userentries', 'Playbook'), 'playbook', 'playbook', playbook_document),
+    ]
+    # Tylko obiekty bez dokumentu – obiekty zapisane już przez API mają aktualny dokument
+    for model, kind, field, document in sources:
+        instances = model.objects.filter(search_document__isnull=True).order_by('pk').iterator(chunk_size=BATCH_SIZE)
+        while batch := list(islice(instances, BATCH_SIZE)):
+            SearchDocument.objects.bulk_create([
+                SearchDocument(owner_id=instance.owner_id, kind=kind, **{field: instance}, **document(instance))
+                for instance in batch
+            ])
+
+    if schema_editor.connection.vendor == 'postgresql':
+        SearchDocument.objects.filter(search_vector__isnull=True).update(
+            search_vector=SearchVector('title', weight='A', config='simple')
+            + SearchVector('body', weight='B', config='simple'),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_job'),
+        ('drc', '0004_dailyreportcarditem'),
+        ('trade_samples', '0008_trade_trade_owner_instrument_idx'),
+        ('userentries', '0010_playbookitem'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,196 @@
+import hashlib
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, IntegerField, Max, Value
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework import exceptions, status
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.decorators import action
+from .filters import facet_counts
+from .jsonpatch import JSONPatchParser, PatchError, PatchTestFailed, apply_patch
+from .listitems import filter_by_items, item_counts, item_model_for
+
+MAX_ITEM_COUNTS = 500
+
+
+def version_rows(querysets):
+    # (liczba wierszy, Max(updated_at)) każdego querysetu – wszystkie w jednym zapytaniu UNION ALL
+    querysets = [
+        queryset.order_by()
+        .annotate(_version_key=Value(index, output_field=IntegerField()))
+        .values('_version_key')
+        .annotate(count=Count('pk'), updated=Max('updated_at'))
+        .values_list('_version_key', 'count', 'updated')
+        for index, queryset in enumerate(querysets)
+    ]
+    return querysets[0].union(*querysets[1:], all=True) if len(querysets) > 1 else querysets[0]
+
+
+def version_states(rows, count):
+    states = {index: (row_count, updated) for index, row_count, updated in rows}
+    return [states.get(index, (0, None)) for index in range(count)]
+
+
+def validators(request, states, single=False):
+    # Last-Modified tylko dla pojedynczego obiektu – Max(updated_at) listy nie zmienia się po usunięciu
+    # wiersza, więc klient wysyłający samo If-Modified-Since dostałby nieaktualne 304; listy mają tylko ETag
+    parts, last_modified = [], None
+    for count, updated in states:
+        parts.append(f"{count}:{updated.isoformat() if updated else ''}")
+        if updated and (last_modified is None or updated > last_modified):
+            last_modified = updated
+
+    source = '|'.join([str(request.user.pk), request.get_full_path(), request.META.get('HTTP_ACCEPT', ''), *parts])
+    etag = f'"{hashlib.sha1(source.encode()).hexdigest()}"'
+    return etag, int(last_modified.timestamp()) if single and last_modified else None
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Przeglądarka może trzymać odpowiedź, ale zawsze ją rewaliduje
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class ConditionalResponseMixin:
+    """
+    ETag (i Last-Modified dla retrieve) dla list i retrieve na podstawie liczby wierszy i Max(updated_at)
+    querysetów, od których zależy odpowiedź. Jedno zapytanie zamiast serializacji –
+    przy niezmienionych danych klient dostaje 304.
+    """
+
+    def get_version_querysets(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            try:
+                queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            except (TypeError, ValueError, ValidationError):
+                # Niepoprawny identyfikator – get_object() i tak zwróci 404
+                queryset = queryset.none()
+        return [queryset]
+
+    def _version_states(self):
+        querysets = self.get_version_querysets()
+        return version_states(version_rows(querysets), len(querysets))
+
+    def get_validators(self, request):
+        return validators(request, self._version_states(), single=self.action == 'retrieve')
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        return set_validators(response, etag, last_modified)
+
+
+class ConditionalGetMixin(ConditionalResponseMixin):
+    # list i retrieve ModelViewSetu owinięte w walidację warunkową
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
+
+
+class PatchConflict(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "JSON Patch test operation failed."
+    default_code = 'conflict'
+
+
+class JSONPatchMixin:
+    """
+    PATCH z Content-Type application/json-patch+json (RFC 6902) na polach-listach z json_patch_fields –
+    pojedynczy element dodawany, zmieniany albo usuwany bez przesyłania całej listy. Wiersz jest blokowany
+    na czas łatki, więc równoległe łatki tej samej karty się nie nadpisują; nieudany `test` to 409.
+    """
+    json_patch_fields = ()
+
+    def get_parsers(self):
+        return [*super().get_parsers(), JSONPatchParser()]
+
+    def get_locked_object(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).select_for_update()
+        instance = get_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    def partial_update(self, request, *args, **kwargs):
+        if request.content_type.split(';')[0].strip() != JSONPatchParser.media_type:
+            return super().partial_update(request, *args, **kwargs)
+
+        with transaction.atomic():
+            instance = self.get_locked_object()
+            document = {field: getattr(instance, field) for field in self.json_patch_fields}
+            try:
+                patched = apply_patch(document, request.data, roots=self.json_patch_fields)
+            except PatchTestFailed as exc:
+                raise PatchConflict(str(exc))
+            except PatchError as exc:
+                raise exceptions.ValidationError({'patch': [str(exc)]})
+
+            errors = {field: ["Must be a list."] for field in document if not isinstance(patched.get(field), list)}
+            if errors:
+                raise exceptions.ValidationError(errors)
+
+            changed = {field: value for field, value in patched.items() if value != document[field]}
+            serializer = self.get_serializer(instance, data=changed, partial=True)
+            serializer.is_valid(raise_exception=True)
+            self.perform_update(serializer)
+        return Response(serializer.data)
+
+
+class ListItemsMixin:
+    """
+    Zapytania po elementach pól-list (api.listitems): lista filtrowana ?<pole>=<element>, np.
+    /api/drcs/?mistakes_with_solutions=FOMO, oraz /items/?field=<pole> z najczęstszymi elementami.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        # Tylko lista – filtr nie może ukryć obiektu przed retrieve/update ani zmienić liczników w items
+        if self.action != 'list':
+            return queryset
+        return filter_by_items(queryset, self.request.user, self.request.query_params)
+
+    @action(detail=False, methods=['get'])
+    def items(self, request):
+        fields = item_model_for(self.get_queryset().model).FIELDS
+        field = request.query_params.get('field')
+        if field not in fields:
+            raise exceptions.ValidationError({'field': [f"Expected one of: {', '.join(fields)}."]})
+        try:
+            limit = min(int(request.query_params.get('limit', 100)), MAX_ITEM_COUNTS)
+        except ValueError:
+            raise exceptions.ValidationError({'limit': ["Must be an integer."]})
+
+        counts = item_counts(self.get_queryset().model, request.user, field)[:max(limit, 0)]
+        return Response([{'text': row['text'], 'count': row['count']} for row in counts])
+
+
+class FacetsMixin:
+    """
+    /facets/ z tymi samymi filtrami co lista (api.filters.JournalFilter): liczba wyników i liczności
+    wartości per wymiar, z ETagiem jak lista. ?facets=instrument,outcome ogranicza wymiary.
+    """
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request, *args, **kwargs):
+        return self._conditional(self._facets, request, *args, **kwargs)
+
+    def _facets(self, request, *args, **kwargs):
+        available = self.filter_backends[0].facets
+        names = [name for name in request.query_params.get('facets', '').split(',') if name] or list(available)
+        if set(names) - set(available):
+            raise exceptions.ValidationError({'facets': [f"Allowed values: {', '.join(available)}."]})
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(facet_counts(queryset, {name: available[name] for name in names}))
@@ -1,3 +1,81 @@
+import uuid
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
+from django.core.files.storage import FileSystemStorage
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
-# Create your models here.
+
+class SearchDocument(models.Model):
+    """
+    Tekst obiektu dziennika do wyszukiwania (api.search) – jeden wiersz na trade, DRC albo playbook,
+    usuwany kaskadowo razem z obiektem. search_vector i indeks GIN istnieją tylko na PostgreSQL;
+    na innych bazach szuka odwrócony indeks w pamięci procesu.
+    """
+
+    class Kind(models.TextChoices):
+        TRADE = 'trade', 'Trade'
+        DRC = 'drc', 'Daily report card'
+        PLAYBOOK = 'playbook', 'Playbook'
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_documents')
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    trade = models.OneToOneField('trade_samples.Trade', on_delete=models.CASCADE, null=True, related_name='search_document')
+    card = models.OneToOneField('drc.DailyReportCard', on_delete=models.CASCADE, null=True, related_name='search_document')
+    playbook = models.OneToOneField('userentries.Playbook', on_delete=models.CASCADE, null=True, related_name='search_document')
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    date = models.DateField(null=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'kind'], name='search_owner_kind_idx'),
+        ]
+
+
+def job_storage():
+    # Wywoływane leniwie – katalog z ustawień, nie zamrożony w migracji
+    return FileSystemStorage(location=settings.JOBS_RESULT_DIR)
+
+
+class Job(models.Model):
+    """
+    Zadanie w tle (api.jobs) – kolejka w tej tabeli, wykonanie w procesach `manage.py run_jobs`.
+    Wynik to JSON w `result` albo plik w `result_file` (eksporty); po `expires_at` wiersz i plik są usuwane.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+        CANCELLED = 'cancelled', 'Cancelled'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='jobs')
+    kind = models.CharField(max_length=30)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    result_file = models.FileField(storage=job_storage, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Pobieranie kolejki przez workera i limity na użytkownika
+            models.Index(fields=['status', 'created_at'], name='job_queue_idx'),
+            models.Index(fields=['owner', '-created_at'], name='job_owner_created_idx'),
+            models.Index(fields=['expires_at'], name='job_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} ({self.status}) for {self.owner}"
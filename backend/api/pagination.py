@@ -0,0 +1,112 @@
+import datetime
+import json
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, PageNumberPagination
+
+
+class OwnerCursorPagination(CursorPagination):
+    """
+    Keyset paginacja po polach z Meta.ordering modelu (np. -date, -start_date) z pk na końcu.
+    Kursor trzyma wartości wszystkich pól ostatniego wiersza, nie tylko pierwszego jak CursorPagination
+    z DRF – powtarzające się wartości (np. tytuły playbooków) nie gubią ani nie dublują wierszy.
+    Włączana przez ?page_size=N – bez parametru lista zwracana jest w całości jak dotychczas.
+    """
+    page_size = None
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(queryset.model._meta.ordering or [])
+        # pk jako tie-breaker, żeby kolejność była deterministyczna przy równych datach
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            ordering.append('-pk')
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        # Strona wstecz to ta sama pętla po odwróconej kolejności
+        ordering = [_flip(field) for field in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        try:
+            if self.cursor is not None:
+                queryset = queryset.filter(_after(ordering, self._decode_position(self.cursor.position)))
+            results = list(queryset[:self.page_size + 1])
+        except ValidationError:
+            # Wartości z podrobionego kursora, których nie da się porównać z polem
+            raise NotFound(self.invalid_cursor_message)
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+        self.has_next = has_more if not reverse else True
+        self.has_previous = has_more if reverse else self.cursor is not None
+        return self.page
+
+    def _position(self, instance):
+        return json.dumps([_encode(getattr(instance, field.lstrip('-'))) for field in self.ordering])
+
+    def _decode_position(self, position):
+        try:
+            values = json.loads(position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # to_python zgłasza ValidationError przy wartościach, które nie pasują do pola
+        return [_field(self.model, field).to_python(value) for field, value in zip(self.ordering, values)]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self._position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self._position(self.page[0])))
+
+
+def _encode(value):
+    # Bez strat: DjangoJSONEncoder obcina czas do milisekund, a daty z timezone.now mają mikrosekundy
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def _field(model, field):
+    name = field.lstrip('-')
+    return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+
+def _flip(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def _after(ordering, values):
+    # Wiersze za pozycją w kolejności (a, b, c): a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+    condition, equal = Q(), Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        condition |= equal & Q(**{f"{name}__{'lt' if field.startswith('-') else 'gt'}": value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+class SearchPagination(PageNumberPagination):
+    # Wyniki uszeregowane trafnością nie mają klucza dla kursora – zwykłe strony ?page=N
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
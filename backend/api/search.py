@@ -0,0 +1,306 @@
+import html
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db import connection, transaction
+from django.db.models import Count, F, Max
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from drc.models import DailyReportCard
+from trade_samples.models import Trade
+from userentries.models import Playbook, PlaybookItem
+from .importing import chunked
+from .models import SearchDocument
+
+Kind = SearchDocument.Kind
+
+TEXT_SEARCH_CONFIG = 'simple'
+# Znaczniki trafień w surowym tekście; render_highlight zamienia je na <mark> po escapowaniu HTML
+START_MARK, STOP_MARK = '\x02', '\x03'
+HIGHLIGHT_LENGTH = 160
+TITLE_WEIGHT = 3
+BATCH_SIZE = 1000
+INDEX_CACHE_SIZE = 32
+
+WORD = re.compile(r'\w+')
+QUERY_TOKEN = re.compile(r'(-?)("[^"]*"|\S+)')
+
+
+def _list_text(values):
+    # Elementy pól-list: napisy wprost, ze słowników wszystkie wartości tekstowe (np. mistake i solution)
+    texts = []
+    for item in values if isinstance(values, list) else []:
+        if isinstance(item, dict):
+            texts.extend(value for value in item.values() if isinstance(value, str) and value)
+        elif item:
+            texts.append(str(item))
+    return '\n'.join(texts)
+
+
+def _lines(*parts):
+    return '\n'.join(part for part in parts if part)
+
+
+def _field_value(instance, name):
+    # Po zwykłym save() atrybut ma postać podaną przez wywołującego (np. '2026-01-05') – jak zapisze ją baza
+    return instance._meta.get_field(name).to_python(getattr(instance, name))
+
+
+def _trade_document(trade):
+    moment = _field_value(trade, 'date')
+    # Naiwny czas Django zapisuje w bieżącej strefie – tak samo go tu interpretujemy
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    day = timezone.localtime(moment).date()
+    return {'title': f"{trade.instrument} {day.isoformat()}", 'body': _lines(trade.context, trade.comment), 'date': day}
+
+
+def _card_document(card):
+    day = _field_value(card, 'date')
+    return {
+        'title': f"Daily report card {day.isoformat()}",
+        'body': _lines(card.goal, _list_text(card.mistakes_with_solutions), _list_text(card.improvements)),
+        'date': day,
+    }
+
+
+def _playbook_document(playbook):
+    criteria = [_list_text(getattr(playbook, field)) for field in PlaybookItem.FIELDS if field != 'trade_database']
+    return {'title': playbook.title, 'body': _lines(playbook.overview, *criteria), 'date': None}
+
+
+@dataclass(frozen=True)
+class Source:
+    kind: str
+    field: str
+    related_name: str
+    document: object
+
+
+SOURCES = {
+    Trade: Source(Kind.TRADE, 'trade', 'trades', _trade_document),
+    DailyReportCard: Source(Kind.DRC, 'card', 'daily_report_cards', _card_document),
+    Playbook: Source(Kind.PLAYBOOK, 'playbook', 'playbooks', _playbook_document),
+}
+
+
+def search_vector():
+    return (
+        SearchVector('title', weight='A', config=TEXT_SEARCH_CONFIG)
+        + SearchVector('body', weight='B', config=TEXT_SEARCH_CONFIG)
+    )
+
+
+def index_documents(instances):
+    """
+    Dokumenty wyszukiwania dla zapisanych obiektów jednego modelu: upsert paczkami, na PostgreSQL
+    od razu tsvector. Wywoływane w transakcji zapisu; usuwanie załatwia kaskada.
+    """
+    instances = list(instances)
+    if not instances:
+        return
+    source = SOURCES[type(instances[0])]
+    with transaction.atomic():
+        for batch in chunked(instances, BATCH_SIZE):
+            SearchDocument.objects.bulk_create(
+                [
+                    SearchDocument(owner_id=instance.owner_id, kind=source.kind, **{source.field: instance},
+                                   **source.document(instance))
+                    for instance in batch
+                ],
+                update_conflicts=True, unique_fields=[source.field], update_fields=['title', 'body', 'date', 'updated_at'],
+            )
+            if connection.vendor == 'postgresql':
+                SearchDocument.objects.filter(**{f'{source.field}__in': batch}).update(search_vector=search_vector())
+
+
+def rebuild_documents(user):
+    with transaction.atomic():
+        user.search_documents.all().delete()
+        for source in SOURCES.values():
+            for batch in chunked(getattr(user, source.related_name).iterator(chunk_size=BATCH_SIZE), BATCH_SIZE):
+                index_documents(batch)
+
+
+def tokens(text):
+    return [match.group().casefold() for match in WORD.finditer(text or '')]
+
+
+def parse_query(text):
+    """
+    Składnia jak websearch_to_tsquery: słowa łączone przez AND, "-słowo" wyklucza, "or" rozdziela
+    alternatywy. Frazy w cudzysłowie są tu tylko zbiorem słów (bez sprawdzania kolejności).
+    """
+    groups, include, exclude = [], [], []
+    for match in QUERY_TOKEN.finditer(text):
+        negated, token = match.groups()
+        if not negated and token.casefold() == 'or':
+            if include:
+                groups.append((include, exclude))
+            include, exclude = [], []
+            continue
+        target = exclude if negated else include
+        target.extend(term for term in tokens(token) if term not in target)
+    if include:
+        groups.append((include, exclude))
+    return groups
+
+
+class InvertedIndex:
+    """
+    Odwrócony indeks dokumentów jednego użytkownika (term -> {numer dokumentu: ważona liczba wystąpień},
+    słowa z tytułu liczone TITLE_WEIGHT razy) z rankingiem BM25. Zamiennik tsvector poza PostgreSQL.
+    """
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, rows):
+        # rows: (kind, object_id, title, body, date)
+        self.rows = rows
+        self.postings = defaultdict(dict)
+        self.lengths = []
+        for number, (_, _, title, body, _) in enumerate(rows):
+            counts = Counter(tokens(body))
+            for term in tokens(title):
+                counts[term] += TITLE_WEIGHT
+            for term, count in counts.items():
+                self.postings[term][number] = count
+            self.lengths.append(sum(counts.values()))
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 1.0
+
+    def _idf(self, term):
+        frequency = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.rows) - frequency + 0.5) / (frequency + 0.5))
+
+    def search(self, groups, kinds=None):
+        matches, terms = set(), []
+        for include, exclude in groups:
+            postings = [self.postings.get(term, {}) for term in include]
+            found = set(min(postings, key=len)).intersection(*postings)
+            for term in exclude:
+                found.difference_update(self.postings.get(term, ()))
+            matches |= found
+            terms.extend(term for term in include if term not in terms)
+        if kinds:
+            matches = {number for number in matches if self.rows[number][0] in kinds}
+
+        idf = {term: self._idf(term) for term in terms}
+        scored = []
+        for number in matches:
+            norm = self.K1 * (1 - self.B + self.B * self.lengths[number] / self.average_length)
+            score = 0.0
+            for term in terms:
+                frequency = self.postings[term].get(number, 0) if term in self.postings else 0
+                score += idf[term] * frequency * (self.K1 + 1) / (frequency + norm)
+            scored.append((score, number))
+        # Jak ORDER BY -rank, -date, pk na PostgreSQL
+        scored.sort(key=lambda item: (-item[0], -self._ordinal(item[1]), item[1]))
+        return scored
+
+    def _ordinal(self, number):
+        day = self.rows[number][4]
+        return day.toordinal() if day else 0
+
+
+def _version(documents):
+    state = documents.aggregate(count=Count('pk'), updated=Max('updated_at'))
+    return state['count'], state['updated']
+
+
+@lru_cache(maxsize=INDEX_CACHE_SIZE)
+def _user_index(owner_id, version):
+    # Wersja (liczba dokumentów, Max(updated_at)) w kluczu – po zmianie dziennika indeks budowany od nowa
+    rows = SearchDocument.objects.filter(owner_id=owner_id).order_by('pk').values_list(
+        'kind', Coalesce('trade_id', 'card_id', 'playbook_id'), 'title', 'body', 'date',
+    )
+    return InvertedIndex(list(rows))
+
+
+def highlight(text, terms, length=HIGHLIGHT_LENGTH):
+    # Fragment wokół pierwszego trafienia, trafienia otoczone znacznikami jak w ts_headline
+    matches = [match for match in WORD.finditer(text) if match.group().casefold() in terms]
+    start = max(matches[0].start() - length // 3, 0) if matches else 0
+    if start:
+        start = text.rfind(' ', 0, start) + 1
+    end = min(start + length, len(text))
+
+    pieces, position = [], start
+    for match in matches:
+        if match.start() < start or match.end() > end:
+            continue
+        pieces += [text[position:match.start()], START_MARK, match.group(), STOP_MARK]
+        position = match.end()
+    pieces.append(text[position:end])
+    return ('… ' if start else '') + ''.join(pieces) + (' …' if end < len(text) else '')
+
+
+def render_highlight(marked):
+    return html.escape(marked or '').replace(START_MARK, '<mark>').replace(STOP_MARK, '</mark>')
+
+
+def search(owner, text, kinds=None):
+    """
+    Trafienia posortowane od najlepszego: dict(kind, id, title, date, rank, highlight). Na PostgreSQL
+    leniwy queryset (paginacja tnie go LIMIT/OFFSET), poza nim lista z odwróconego indeksu w pamięci.
+    """
+    documents = SearchDocument.objects.filter(owner=owner)
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(text, search_type='websearch', config=TEXT_SEARCH_CONFIG)
+        if kinds:
+            documents = documents.filter(kind__in=kinds)
+        return (
+            documents.filter(search_vector=query)
+            .annotate(
+                id_=Coalesce('trade_id', 'card_id', 'playbook_id'),
+                rank=SearchRank(F('search_vector'), query),
+                highlight=SearchHeadline(
+                    'body', query, config=TEXT_SEARCH_CONFIG, start_sel=START_MARK, stop_sel=STOP_MARK,
+                    max_fragments=2, max_words=25, min_words=10, fragment_delimiter=' … ',
+                ),
+            )
+            .order_by('-rank', '-date', 'pk')
+            .values('kind', 'id_', 'title', 'date', 'rank', 'highlight')
+        )
+
+    groups = parse_query(text)
+    if not groups:
+        return []
+    return IndexHits(_user_index(owner.pk, _version(documents)), groups, kinds)
+
+
+class IndexHits:
+    """Wyniki z odwróconego indeksu; fragmenty z trafieniami budowane tylko dla wyciętej strony."""
+
+    def __init__(self, index, groups, kinds=None):
+        self.index = index
+        self.terms = {term for include, _ in groups for term in include}
+        self.scored = index.search(groups, kinds)
+
+    def __len__(self):
+        return len(self.scored)
+
+    def _hit(self, score, number):
+        kind, object_id, title, body, date = self.index.rows[number]
+        return {
+            'kind': kind, 'id_': object_id, 'title': title, 'date': date, 'rank': round(score, 6),
+            'highlight': highlight(body, self.terms),
+        }
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._hit(score, number) for score, number in self.scored[key]]
+        return self._hit(*self.scored[key])
+
+
+def hit_representation(hit):
+    return {
+        'type': hit['kind'],
+        'id': hit['id_'],
+        'title': hit['title'],
+        'date': hit['date'],
+        'rank': hit['rank'],
+        'highlight': render_highlight(hit['highlight']),
+    }
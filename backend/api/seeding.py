@@ -0,0 +1,96 @@
+import random
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from api.importing import chunked
+from api.listitems import rebuild_items
+from api.search import rebuild_documents
+from analytics.models import Instrument, TradeLog
+from dashboard.models import Reminder, MarketDriver
+from drc.models import DailyReportCard
+from trade_samples.models import TradeSample, Trade
+from trade_samples.aggregates import rebuild_aggregates
+from analytics.rollups import rebuild_user_rollups
+from userentries.models import Playbook
+
+INSTRUMENTS = ["XAUUSD", "NASDAQ", "DAX", "GBPJPY", "BTC"]
+R_OUTCOMES = [(-1, 45), (0, 10), (1, 15), (2, 20), (3, 10)]
+HISTORY_START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+HISTORY_SECONDS = 5 * 365 * 24 * 3600
+
+
+def _random_r(rng):
+    base = rng.choices([r for r, _ in R_OUTCOMES], weights=[w for _, w in R_OUTCOMES])[0]
+    return Decimal(str(round(base + rng.uniform(-0.3, 0.3), 2))) if base else Decimal('0.00')
+
+
+def _random_date(rng):
+    return HISTORY_START + timedelta(seconds=rng.randrange(HISTORY_SECONDS))
+
+
+def _outcome(r, breakeven='BE'):
+    if r > 0:
+        return 'WIN'
+    return 'LOSS' if r < 0 else breakeven
+
+
+def seed_journal(user, playbooks=5, samples=20, trades=1000, trade_logs=1000, drcs=100, seed=0, batch_size=5000):
+    """
+    Syntetyczny dziennik użytkownika o zadanej wielkości. Wiersze generowane i zapisywane paczkami,
+    więc nawet milion trade'ów nie trafia naraz do pamięci.
+    """
+    rng = random.Random(seed)
+    instruments = [Instrument.objects.get_or_create(name=name)[0] for name in INSTRUMENTS]
+
+    playbook_objects = Playbook.objects.bulk_create([
+        Playbook(
+            title=f"Strategy {index + 1}", owner=user, overview="Synthetic playbook",
+            entry_criteria=["Break of structure", "Retest"], checklist=["News checked"],
+        )
+        for index in range(playbooks)
+    ])
+    sample_objects = TradeSample.objects.bulk_create([
+        TradeSample(name=f"Sample {index + 1}", owner=user, start_date=date(2020, 1, 1) + timedelta(days=index * 7))
+        for index in range(samples)
+    ])
+
+    def trade_rows():
+        for _ in range(trades):
+            r = _random_r(rng)
+            yield Trade(
+                owner=user, sample=rng.choice(sample_objects), strategy=rng.choice(playbook_objects),
+                date=_random_date(rng), instrument=rng.choice(INSTRUMENTS),
+                realized_pnl=r * 100, realized_r_multiple=r, outcome=_outcome(r),
+                rules_followed=rng.random() > 0.2, context="Synthetic trade",
+            )
+
+    def trade_log_rows():
+        for _ in range(trade_logs):
+            r = _random_r(rng)
+            yield TradeLog(
+                owner=user, strategy=rng.choice(playbook_objects), instrument=rng.choice(instruments),
+                date=_random_date(rng), outcome=_outcome(r, breakeven='LOSS'), realized_r=r,
+            )
+
+    def drc_rows():
+        for index in range(drcs):
+            yield DailyReportCard(
+                owner=user, date=date(2020, 1, 1) + timedelta(days=index),
+                grade=rng.choice(['A', 'B', 'C']), pnl=Decimal(rng.randint(-500, 800)),
+                goal="Follow the plan", mistakes_with_solutions=[{"mistake": "FOMO", "solution": "Wait"}],
+            )
+
+    for model, rows in ((Trade, trade_rows()), (TradeLog, trade_log_rows()), (DailyReportCard, drc_rows())):
+        for batch in chunked(rows, batch_size):
+            model.objects.bulk_create(batch)
+
+    Reminder.objects.bulk_create([Reminder(owner=user, text=f"Reminder {index + 1}") for index in range(5)])
+    MarketDriver.objects.bulk_create([
+        MarketDriver(owner=user, name=f"Driver {index + 1}", percentage=20) for index in range(5)
+    ])
+
+    rebuild_aggregates(user.trade_samples.all())
+    rebuild_user_rollups(user)
+    rebuild_items(user.daily_report_cards.all())
+    rebuild_items(user.playbooks.all())
+    rebuild_documents(user)
+    return user
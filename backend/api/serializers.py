@@ -1,5 +1,35 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
+from rest_framework.reverse import reverse
+from .jobs import JOB_KINDS, clean_params
+from .metrics import timed_representation
+from .models import Job
+
+
+class InstrumentedSerializerMixin:
+    # Czas serializacji trafia do metryk requestu (api.middleware.RequestMetricsMiddleware)
+
+    def to_representation(self, instance):
+        return timed_representation(super().to_representation, instance)
+
+
+class SparseFieldsetMixin(InstrumentedSerializerMixin):
+    """Pozwala wybrać pola odpowiedzi przez ?fields=id,date,pnl (tylko dla GET)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+
+        fields = request.query_params.get('fields')
+        if not fields:
+            return
+
+        requested = {field.strip() for field in fields.split(',') if field.strip()}
+        for field_name in set(self.fields) - requested:
+            self.fields.pop(field_name)
+
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -10,3 +40,28 @@ class UserSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         user = User.objects.create_user(**validated_data)
         return user
+
+
+class JobSerializer(serializers.ModelSerializer):
+    kind = serializers.ChoiceField(choices=list(JOB_KINDS))
+    params = serializers.JSONField(required=False, default=dict)
+    result_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'params', 'status', 'error', 'created_at', 'started_at', 'finished_at', 'expires_at',
+            'result_url',
+        ]
+        read_only_fields = ['status', 'error', 'created_at', 'started_at', 'finished_at', 'expires_at']
+
+    def validate(self, attrs):
+        if JOB_KINDS[attrs['kind']].upload and 'upload' not in self.context:
+            raise serializers.ValidationError({'kind': "This job is queued by uploading the file to its endpoint."})
+        attrs['params'] = clean_params(self.context['request'].user, attrs['kind'], attrs.get('params', {}))
+        return attrs
+
+    def get_result_url(self, obj):
+        if obj.status != Job.Status.SUCCEEDED:
+            return None
+        return reverse('job-result', kwargs={'pk': obj.pk}, request=self.context.get('request'))
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from drc.models import DailyReportCard
+from trade_samples.models import Trade
+from userentries.models import Playbook
+from .search import index_documents
+
+
+# Każdy zapis przez save() (API, admin, skrypty) odświeża dokument wyszukiwania. bulk_create nie wysyła
+# sygnałów – importy i przywracanie dziennika indeksują same (index_documents / rebuild_documents)
+@receiver(post_save, sender=Trade)
+@receiver(post_save, sender=DailyReportCard)
+@receiver(post_save, sender=Playbook)
+def index_document(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_documents([instance])
@@ -1,3 +1,699 @@
-from django.test import TestCase
+import importlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import warnings
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+from asgiref.sync import async_to_sync, sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from api.async_views import EventStreamView, with_async_reads
+from api.benchmark import compare_results, run_benchmark
+from api.checks import check_cache_settings, check_connection_settings, check_database_connection
+from api.importing import iter_ndjson_rows
+from api.jobs import claim, execute, expire_jobs
+from api.journal import JournalRestore, archive_chunks
+from api.events import InProcessBroker, get_broker, user_channel
+from api.models import Job, SearchDocument
+from api.seeding import seed_journal
+from analytics.views import AsyncTradeLogView
+from dashboard.urls import router as dashboard_router
+from dashboard.views import AsyncDashboardView, AsyncReminderView
+from drc.views import AsyncDailyReportCardView
+from trade_samples.models import Trade, TradeSample
 
-# Create your tests here.
+
+def archive_lines(user):
+    return b''.join(archive_chunks(user)).decode().splitlines()
+
+
+def restore(user, lines, **kwargs):
+    return JournalRestore(user, **kwargs).run(iter_ndjson_rows(io.StringIO('\n'.join(lines))))
+
+
+def journal_counts(user):
+    return {
+        'playbooks': user.playbooks.count(),
+        'samples': user.trade_samples.count(),
+        'trades': user.trades.count(),
+        'trade-logs': user.analytics_trade_logs.count(),
+        'drcs': user.daily_report_cards.count(),
+    }
+
+
+class JournalRestoreTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='source')
+        seed_journal(cls.user, playbooks=2, samples=3, trades=40, trade_logs=30, drcs=5)
+
+    def test_round_trip(self):
+        before = journal_counts(self.user)
+        trades = set(self.user.trades.values_list('id', 'sample_id', 'strategy_id', 'realized_r_multiple'))
+        lines = archive_lines(self.user)
+        # UUID-y są globalne – archiwum wraca na to samo konto w trybie replace
+        summary = restore(self.user, lines, replace=True)
+
+        self.assertEqual(summary['failed'], 0, summary['errors'])
+        self.assertEqual(journal_counts(self.user), before)
+        self.assertEqual(
+            set(self.user.trades.values_list('id', 'sample_id', 'strategy_id', 'realized_r_multiple')), trades,
+        )
+        self.assertEqual(
+            sum(self.user.trade_samples.values_list('trades_count', flat=True)), before['trades'],
+        )
+
+    def test_replace_keeps_journal_when_nothing_is_restored(self):
+        before = journal_counts(self.user)
+        header, *records = archive_lines(self.user)
+        broken = [header] + [json.dumps({**json.loads(line), 'id': 'not-a-uuid'}) for line in records[:5]]
+
+        summary = restore(self.user, broken, replace=True)
+
+        self.assertEqual(summary['failed'], 5)
+        self.assertFalse(any(summary['created'].values()))
+        self.assertEqual(journal_counts(self.user), before)
+
+    def test_replace_keeps_journal_on_unsupported_archive(self):
+        before = journal_counts(self.user)
+        lines = [json.dumps({'type': 'journal', 'version': 99})] + archive_lines(self.user)[1:]
+
+        with self.assertRaises(ValidationError):
+            restore(self.user, lines, replace=True)
+        self.assertEqual(journal_counts(self.user), before)
+
+    def test_blank_required_text_is_rejected(self):
+        target = User.objects.create_user(username='target')
+        row = json.dumps({'type': 'playbooks', 'id': '7b0c5a3e-4a35-4d4c-9d37-0c5f7fb1e0a1', 'title': ''})
+
+        summary = restore(target, [row])
+
+        self.assertEqual(summary['failed'], 1)
+        self.assertIn('title', summary['errors'][0]['errors'])
+        self.assertFalse(target.playbooks.exists())
+
+    def test_card_for_an_existing_date_is_a_row_error(self):
+        card = self.user.daily_report_cards.first()
+        rows = [
+            json.dumps({'type': 'drcs', 'id': '7b0c5a3e-4a35-4d4c-9d37-0c5f7fb1e0a1', 'date': card.date.isoformat()}),
+            json.dumps({'type': 'drcs', 'id': '0f6f1bd2-51f4-4a4f-8b39-1d1a0e5b2a11', 'date': '1999-01-04'}),
+            json.dumps({'type': 'drcs', 'id': '5d1e7f3a-2c44-4b8e-9a51-6e2f4c8d9b70', 'date': '1999-01-04'}),
+        ]
+
+        summary = restore(self.user, rows)
+
+        self.assertEqual((summary['created']['drcs'], summary['failed']), (1, 2))
+        self.assertEqual([error['row'] for error in summary['errors']], [1, 3])
+        self.assertIn('date', summary['errors'][0]['errors'])
+        self.assertTrue(self.user.daily_report_cards.filter(date='1999-01-04').exists())
+
+
+@override_settings(JOBS_MAX_RUNNING_PER_USER=1, JOBS_MAX_PENDING_PER_USER=10, JOBS_TIMEOUT_SECONDS=60,
+                   JOBS_RESULT_DIR=tempfile.gettempdir())
+class JobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='jobs')
+        cls.other = User.objects.create_user(username='other')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def queue(self, owner, kind='rebuild-rollups', **fields):
+        return Job.objects.create(owner=owner, kind=kind, params={}, **fields)
+
+    def test_claim_respects_per_user_running_limit(self):
+        first, second = self.queue(self.user), self.queue(self.user)
+        other = self.queue(self.other)
+
+        self.assertEqual(claim('worker', 3), [first.pk, other.pk])
+        self.assertEqual(claim('worker', 3), [])
+        second.refresh_from_db()
+        self.assertEqual(second.status, Job.Status.QUEUED)
+
+    def test_claim_counts_jobs_of_other_workers(self):
+        self.queue(self.user, status=Job.Status.RUNNING, started_at=timezone.now(), worker='other-host')
+        queued = self.queue(self.user)
+
+        self.assertEqual(claim('worker', 3), [])
+        self.assertEqual(Job.objects.get(pk=queued.pk).status, Job.Status.QUEUED)
+
+    def test_expire_jobs(self):
+        now = timezone.now()
+        lost = self.queue(self.user, status=Job.Status.RUNNING, started_at=now - timedelta(minutes=5))
+        fresh = self.queue(self.other, status=Job.Status.RUNNING, started_at=now)
+        expired = self.queue(self.user, status=Job.Status.SUCCEEDED, expires_at=now - timedelta(seconds=1))
+
+        self.assertEqual(expire_jobs(), (1, 1))
+        lost.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((lost.status, fresh.status), (Job.Status.FAILED, Job.Status.RUNNING))
+        self.assertFalse(Job.objects.filter(pk=expired.pk).exists())
+
+    def test_monte_carlo_params_are_validated(self):
+        playbook = self.user.playbooks.create(title="Breakout")
+        for params in ({'seed': -1}, {'ruin_r': 'nan'}, {'ruin_r': 'inf'}, {'paths': 10}):
+            response = self.client.post(
+                '/api/jobs/', {'kind': 'monte-carlo', 'params': {'playbook': str(playbook.pk), **params}}, format='json',
+            )
+            self.assertEqual(response.status_code, 400, params)
+        self.assertFalse(Job.objects.exists())
+
+    def test_upload_only_kind_is_rejected(self):
+        response = self.client.post('/api/jobs/', {'kind': 'journal-restore', 'params': {}}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_large_restore_is_queued(self):
+        seed_journal(self.other, playbooks=1, samples=1, trades=5, trade_logs=5, drcs=1)
+        archive = '\n'.join(archive_lines(self.other)).encode()
+        self.other.playbooks.all().delete()
+        self.other.trade_samples.all().delete()
+
+        client = APIClient()
+        client.force_authenticate(self.other)
+        with override_settings(JOURNAL_RESTORE_SYNC_MAX_BYTES=100):
+            response = client.post(
+                '/api/journal/restore/', {'file': SimpleUploadedFile('journal.ndjson', archive)}, format='multipart',
+            )
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(pk=response.data['id'])
+        self.assertEqual(job.kind, 'journal-restore')
+
+        self.assertEqual(claim('worker', 1), [job.pk])
+        execute(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.SUCCEEDED, job.error)
+        self.assertEqual(job.result['created']['trades'], 5)
+        self.assertFalse(job.result_file)
+        self.assertEqual(self.other.trades.count(), 5)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trader')
+        cls.sample = TradeSample.objects.create(owner=cls.user, name="A", start_date=date(2024, 1, 1))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.playbook = self.user.playbooks.create(title="Breakout")
+        self.trade = self.sample.trades.create(
+            owner=self.user, strategy=self.playbook, date=timezone.now(), instrument='DAX', realized_pnl=10,
+            realized_r_multiple=1, outcome='WIN',
+        )
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_list_is_not_modified(self):
+        response = self.client.get('/api/trades/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(self.revalidate('/api/trades/', response['ETag']).status_code, 304)
+
+        detail = self.client.get(f'/api/trades/{self.trade.pk}/')
+        self.assertIn('Last-Modified', detail)
+        self.assertEqual(self.revalidate(f'/api/trades/{self.trade.pk}/', detail['ETag']).status_code, 304)
+
+    def test_edit_changes_the_etag(self):
+        etag = self.client.get('/api/trades/')['ETag']
+        response = self.client.patch(f'/api/trades/{self.trade.pk}/', {'comment': "Late entry"}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        response = self.revalidate('/api/trades/', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['comment'], "Late entry")
+
+    def test_related_delete_changes_the_etag(self):
+        # Usunięcie playbooka zeruje strategię trade'ów przez SET_NULL
+        etag = self.client.get('/api/trades/')['ETag']
+        self.assertEqual(self.client.delete(f'/api/playbooks/{self.playbook.pk}/').status_code, 204)
+
+        response = self.revalidate('/api/trades/', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data[0]['strategy'])
+
+
+class JournalFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trader')
+        cls.breakout = cls.user.playbooks.create(title="Breakout")
+        cls.reversal = cls.user.playbooks.create(title="Reversal")
+        sample = TradeSample.objects.create(owner=cls.user, name="A", start_date=date(2024, 1, 1))
+        for name, day, instrument, outcome, r, strategy, rules_followed in [
+            ('t1', 2, 'DAX', 'WIN', 2, cls.breakout, True),
+            ('t2', 5, 'NASDAQ', 'LOSS', -1, cls.reversal, False),
+            ('t3', 10, 'DAX', 'BE', 0, None, True),
+            ('t4', 3, 'DAX', 'LOSS', -1.5, cls.breakout, False),
+        ]:
+            sample.trades.create(
+                owner=cls.user, date=timezone.make_aware(datetime(2024, 1, day, 12)), instrument=instrument,
+                outcome=outcome, realized_r_multiple=r, realized_pnl=r * 100, strategy=strategy,
+                rules_followed=rules_followed, comment=name,
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def names(self, **params):
+        response = self.client.get('/api/trades/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return sorted(trade['comment'] for trade in response.data)
+
+    def test_each_filter(self):
+        cases = [
+            ({'date_from': '2024-01-03'}, ['t2', 't3', 't4']),
+            ({'date_to': '2024-01-03'}, ['t1', 't4']),
+            ({'instrument': 'NASDAQ, DAX'}, ['t1', 't2', 't3', 't4']),
+            ({'instrument': 'NASDAQ'}, ['t2']),
+            ({'outcome': 'loss'}, ['t2', 't4']),
+            ({'strategy': str(self.breakout.pk)}, ['t1', 't4']),
+            ({'strategy': f'{self.reversal.pk},none'}, ['t2', 't3']),
+            ({'r_min': '0'}, ['t1', 't3']),
+            ({'r_max': '-1'}, ['t2', 't4']),
+            ({'rules_followed': 'false'}, ['t2', 't4']),
+            ({'instrument': 'DAX', 'outcome': 'LOSS,WIN', 'date_to': '2024-01-02'}, ['t1']),
+        ]
+        for params, expected in cases:
+            self.assertEqual(self.names(**params), expected, params)
+
+    def test_invalid_values(self):
+        for params in (
+            {'date_from': '2024-13-01'}, {'outcome': 'DRAW'}, {'strategy': 'abc'}, {'r_min': 'nan'},
+            {'r_max': 'abc'}, {'rules_followed': 'maybe'},
+        ):
+            response = self.client.get('/api/trades/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(next(iter(params)), response.data)
+        # Logi nie mają rules_followed
+        self.assertEqual(self.client.get('/api/trade-logs/', {'rules_followed': 'true'}).status_code, 400)
+
+    def test_facets(self):
+        response = self.client.get('/api/trades/facets/')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(response.data['instrument'], [{'value': 'DAX', 'count': 3}, {'value': 'NASDAQ', 'count': 1}])
+        # Remisy sortowane po str(value), więc kolejność "Reversal" i braku strategii zależy od uuid
+        self.assertEqual(response.data['strategy'][0], {'value': self.breakout.pk, 'label': "Breakout", 'count': 2})
+        self.assertCountEqual(response.data['strategy'][1:], [
+            {'value': None, 'label': None, 'count': 1},
+            {'value': self.reversal.pk, 'label': "Reversal", 'count': 1},
+        ])
+        self.assertEqual(response.data['rules_followed'], [{'value': False, 'count': 2}, {'value': True, 'count': 2}])
+
+        response = self.client.get('/api/trades/facets/', {'instrument': 'DAX', 'facets': 'outcome'})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(set(response.data), {'count', 'outcome'})
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(response.data['outcome'], [
+            {'value': 'BE', 'count': 1}, {'value': 'LOSS', 'count': 1}, {'value': 'WIN', 'count': 1},
+        ])
+
+    def test_unknown_facet(self):
+        self.assertEqual(self.client.get('/api/trades/facets/', {'facets': 'grade'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/trades/facets/', {'outcome': 'DRAW'}).status_code, 400)
+
+
+class AsyncReadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trader')
+        seed_journal(cls.user, playbooks=2, samples=1, trades=5, trade_logs=5, drcs=3)
+        cls.token = str(RefreshToken.for_user(cls.user).access_token)
+        cls.other = User.objects.create_user(username='other')
+        cls.other.reminders.create(text="Not mine")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, view_class, path, pk=None, headers=None):
+        headers = {'Authorization': f"Bearer {self.token}", **(headers or {})}
+        request = AsyncRequestFactory().get(path, headers={name: value for name, value in headers.items() if value})
+        # Synchroniczny ViewSet z routera, tak jak w with_async_reads
+        view = view_class.as_view(sync_view=resolve(request.path).func)
+        response = async_to_sync(view)(request, **({'pk': pk} if pk is not None else {}))
+        # Odpowiedź DRF z widoku synchronicznego renderuje dopiero handler
+        return response.render() if hasattr(response, 'render') else response
+
+    def test_same_data_as_sync_views(self):
+        for view_class, path in (
+            (AsyncReminderView, '/api/reminders/'),
+            (AsyncDailyReportCardView, '/api/drcs/'),
+            (AsyncTradeLogView, '/api/trade-logs/'),
+            (AsyncDashboardView, '/api/dashboard/'),
+            (AsyncDashboardView, '/api/dashboard/?include=latest_drc'),
+        ):
+            response = self.get(view_class, path)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual(json.loads(response.content), self.client.get(path).json(), path)
+
+    def test_detail(self):
+        card = self.user.daily_report_cards.first()
+        response = self.get(AsyncDailyReportCardView, f'/api/drcs/{card.pk}/', pk=str(card.pk))
+        self.assertEqual(json.loads(response.content)['id'], str(card.pk))
+
+        mine = self.user.reminders.create(text="Mine")
+        other = self.other.reminders.get()
+        self.assertEqual(self.get(AsyncReminderView, f'/api/reminders/{mine.pk}/', pk=str(mine.pk)).status_code, 200)
+        self.assertEqual(self.get(AsyncReminderView, f'/api/reminders/{other.pk}/', pk=str(other.pk)).status_code, 404)
+        self.assertEqual(self.get(AsyncReminderView, '/api/reminders/abc/', pk='abc').status_code, 404)
+
+    def test_conditional_get(self):
+        headers = {'If-None-Match': self.get(AsyncReminderView, '/api/reminders/')['ETag']}
+        self.assertEqual(self.get(AsyncReminderView, '/api/reminders/', headers=headers).status_code, 304)
+
+        self.user.reminders.create(text="New")
+        self.assertEqual(self.get(AsyncReminderView, '/api/reminders/', headers=headers).status_code, 200)
+
+    def test_authentication(self):
+        response = self.get(AsyncReminderView, '/api/reminders/', headers={'Authorization': None})
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response)
+        response = self.get(AsyncReminderView, '/api/reminders/', headers={'Authorization': "Bearer oops"})
+        self.assertEqual(response.status_code, 401)
+
+    def test_unsupported_reads_use_the_sync_view(self):
+        for view_class, path in (
+            (AsyncReminderView, '/api/reminders/?page_size=1'),
+            (AsyncTradeLogView, '/api/trade-logs/?outcome=WIN'),
+            (AsyncDailyReportCardView, '/api/drcs/?improvements=review'),
+        ):
+            response = self.get(view_class, path)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual(json.loads(response.content), self.client.get(path).json(), path)
+
+    def test_routes_swapped_only_with_async_reads(self):
+        views = {'reminder-list': AsyncReminderView}
+        self.assertEqual(with_async_reads(dashboard_router.urls, views), dashboard_router.urls)
+
+        with override_settings(ASYNC_READS=True):
+            patterns = {pattern.name: pattern for pattern in with_async_reads(dashboard_router.urls, views)}
+        self.assertIs(patterns['reminder-list'].callback.view_class, AsyncReminderView)
+        self.assertIsNot(getattr(patterns['reminder-detail'].callback, 'view_class', None), AsyncReminderView)
+
+
+@override_settings(EVENTS_ENABLED=True, EVENTS_BROKER='api.events.InProcessBroker')
+class EventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trader')
+        cls.channel = user_channel(cls.user.pk)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Broker tworzony raz na proces – każdy test dostaje własny
+        get_broker.cache_clear()
+        self.addCleanup(get_broker.cache_clear)
+
+    def test_subscribers_get_their_channel(self):
+        broker = InProcessBroker(queue_size=2)
+
+        async def receive():
+            async with broker.subscribe(self.channel) as subscription:
+                self.assertEqual(broker.publish(self.channel, "first"), 1)
+                broker.publish(user_channel(0), "someone else")
+                broker.publish(self.channel, "second")
+                broker.publish(self.channel, "third")
+                # Przepełniona kolejka gubi najstarsze zdarzenie
+                messages = [await subscription.get(timeout=1) for _ in range(2)]
+                return messages, await subscription.get(timeout=0.01)
+
+        self.assertEqual(async_to_sync(receive)(), (["second", "third"], None))
+        self.assertEqual(broker.publish(self.channel, "after"), 0)
+
+    def test_write_is_published_after_commit(self):
+        def create_reminder():
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.post('/api/reminders/', {'text': "Wait for the close"}, format='json')
+            return response.data['id'], callbacks
+
+        def commit(callbacks):
+            for callback in callbacks:
+                callback()
+
+        async def receive():
+            async with get_broker().subscribe(self.channel) as subscription:
+                pk, callbacks = await sync_to_async(create_reminder)()
+                # Przed commitem nic nie wychodzi
+                self.assertIsNone(await subscription.get(timeout=0.01))
+                await sync_to_async(commit)(callbacks)
+                return pk, await subscription.get(timeout=1)
+
+        pk, message = async_to_sync(receive)()
+        self.assertEqual(json.loads(message), {
+            'type': 'reminder', 'action': 'created', 'id': pk, 'text': "Wait for the close",
+        })
+
+    @override_settings(EVENTS_KEEPALIVE_SECONDS=0.01, EVENTS_RETRY_MS=3000)
+    def test_stream(self):
+        async def read():
+            stream = EventStreamView().stream(self.channel)
+            chunks = [await anext(stream), await anext(stream)]
+            get_broker().publish(self.channel, '{"type": "job"}')
+            chunks.append(await anext(stream))
+            await stream.aclose()
+            return chunks
+
+        self.assertEqual(async_to_sync(read)(), ["retry: 3000\n\n", ": keepalive\n\n", 'data: {"type": "job"}\n\n'])
+        # Rozłączenie wypisuje klienta z kanału
+        self.assertEqual(get_broker().publish(self.channel, "after"), 0)
+
+    def test_stream_needs_a_token(self):
+        request = AsyncRequestFactory().get('/api/events/')
+        self.assertEqual(async_to_sync(EventStreamView.as_view())(request).status_code, 401)
+
+        token = RefreshToken.for_user(self.user).access_token
+        request = AsyncRequestFactory().get('/api/events/', {'token': str(token)})
+        response = async_to_sync(EventStreamView.as_view())(request)
+        self.assertEqual((response.status_code, response['Content-Type']), (200, 'text/event-stream'))
+
+
+class ExportErrorTests(TestCase):
+    def test_errors_are_json_in_every_format(self):
+        self.client = APIClient()
+        self.assertEqual(self.client.get('/api/export/trades/?format=csv').status_code, 401)
+        self.client.force_authenticate(User.objects.create_user(username='trader'))
+        for export_format in ('csv', 'ndjson', 'parquet'):
+            response = self.client.get(f'/api/export/unknown/?format={export_format}')
+            self.assertEqual(response.status_code, 404, export_format)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertIn('Unknown export', response.json()['detail'])
+
+        response = self.client.get('/api/export/journal/?format=csv')
+        self.assertEqual(response.status_code, 406)
+        self.assertIn('NDJSON', response.json()['detail'])
+
+
+@override_settings(METRICS_TOKEN='s3cret', METRICS_ALLOWED_IPS=[])
+class MetricsAccessTests(TestCase):
+    def test_requires_token_or_staff(self):
+        # Klient testowy łączy się z 127.0.0.1 – sam adres (np. reverse proxy) nie wystarcza
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 404)
+        self.assertEqual(self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 404)
+        self.assertEqual(self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+
+        self.client.force_login(User.objects.create_user(username='trader'))
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 404)
+        self.client.force_login(User.objects.create_user(username='admin', is_staff=True))
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 200)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_empty_token_is_not_accepted(self):
+        self.assertEqual(self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer ').status_code, 404)
+
+
+class BenchmarkIndexesTests(TestCase):
+    def test_runs_and_rolls_back(self):
+        out = io.StringIO()
+        call_command('benchmark_indexes', rows=50, repeat=1, plans=True, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("trades list (join vs Trade.owner)", output)
+        self.assertTrue(output.rstrip().endswith("Benchmark data rolled back."))
+        self.assertFalse(User.objects.exists())
+        # Usunięte na czas pomiaru indeksy wracają razem z rollbackiem
+        with connection.cursor() as cursor:
+            self.assertIn('trade_owner_date_idx', connection.introspection.get_constraints(cursor, Trade._meta.db_table))
+
+
+class BenchmarkApiTests(TestCase):
+    def test_every_route_succeeds(self):
+        user = User.objects.create_user(username='trader')
+        seed_journal(user, playbooks=2, samples=2, trades=20, trade_logs=20, drcs=3)
+
+        results = run_benchmark(user, repeat=1)
+
+        self.assertEqual(compare_results(results, {}), [])
+        self.assertEqual(compare_results(results, results), [])
+        for key in ('GET dashboard-list', 'GET trade-list?page_size=50', 'POST sample-trades-list', 'DELETE trade-detail'):
+            self.assertIn(key, results)
+
+    def test_regressions(self):
+        baseline = {'GET trade-list': {'status': 200, 'p95': 10.0, 'queries': 3, 'bytes': 1000}}
+        results = {'GET trade-list': {'status': 200, 'p95': 20.0, 'queries': 4, 'bytes': 1200}}
+
+        failures = compare_results(results, baseline)
+
+        self.assertEqual([failure.split(':')[1].split()[0] for failure in failures], ['queries', 'p95', 'size'])
+        # W granicach tolerancji i marginesu na szum
+        results['GET trade-list'].update(p95=17.0, queries=3, bytes=1100)
+        self.assertEqual(compare_results(results, baseline), [])
+        self.assertEqual(len(compare_results({'GET trade-list': {**baseline['GET trade-list'], 'status': 500}}, {})), 1)
+
+    def test_command_on_sqlite(self):
+        # Osobny proces – komenda sama tworzy i usuwa testową bazę
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            subprocess.run(
+                [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'benchmark_api', '--users', '1',
+                 '--playbooks', '2', '--samples', '2', '--trades', '20', '--trade-logs', '20', '--drcs', '3',
+                 '--repeat', '1', '--save', path],
+                env={**os.environ, 'DATABASE_URL': f"sqlite:///{os.path.join(directory, 'db.sqlite3')}"},
+                check=True, capture_output=True,
+            )
+            with open(path) as file:
+                saved = json.load(file)
+
+        self.assertEqual(saved['vendor'], 'sqlite')
+        self.assertTrue(all(200 <= result['status'] < 300 for result in saved['results'].values()))
+
+
+POSTGRES = {'ENGINE': 'django.db.backends.postgresql', 'NAME': 'journal', 'CONN_MAX_AGE': 0}
+
+
+class ConnectionCheckTests(TestCase):
+    def check(self, pgbouncer=False, **database):
+        with warnings.catch_warnings():
+            # override_settings ostrzega przy podmianie DATABASES, a sama konfiguracja nie jest tu używana
+            warnings.filterwarnings('ignore', message='Overriding setting DATABASES')
+            with override_settings(DATABASES={'default': {**POSTGRES, **database}}, DB_PGBOUNCER=pgbouncer):
+                return [message.id for message in check_connection_settings(None)]
+
+    def test_valid_settings(self):
+        self.assertEqual(self.check(), [])
+        self.assertEqual(self.check(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True), [])
+        with mock.patch('api.checks.psycopg_pool_available', return_value=True):
+            self.assertEqual(self.check(OPTIONS={'pool': {'min_size': 2, 'max_size': 8}}), [])
+        self.assertEqual(self.check(pgbouncer=True, DISABLE_SERVER_SIDE_CURSORS=True), [])
+
+    def test_invalid_settings(self):
+        with mock.patch('api.checks.psycopg_pool_available', return_value=False):
+            self.assertEqual(self.check(OPTIONS={'pool': True}), ['api.E001'])
+        with mock.patch('api.checks.psycopg_pool_available', return_value=True):
+            self.assertEqual(self.check(OPTIONS={'pool': True}, CONN_MAX_AGE=60), ['api.E002'])
+            self.assertEqual(self.check(OPTIONS={'pool': {'min_size': 8, 'max_size': 2}}), ['api.E003'])
+            self.assertEqual(self.check(pgbouncer=True, OPTIONS={'pool': True}), ['api.W002'])
+        self.assertEqual(self.check(CONN_MAX_AGE=60), ['api.W001'])
+
+    def test_sqlite_is_skipped(self):
+        self.assertEqual(check_connection_settings(None), [])
+        self.assertEqual(check_database_connection(None, databases=['default']), [])
+
+    def test_connection_benchmark_needs_postgres(self):
+        with self.assertRaisesMessage(CommandError, "needs DATABASE_URL pointing at Postgres"):
+            call_command('benchmark_connections', requests=1)
+
+
+class CacheCheckTests(TestCase):
+    @override_settings(DEBUG=False, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_warns(self):
+        self.assertEqual([message.id for message in check_cache_settings(None)], ['api.W005'])
+
+    @override_settings(DEBUG=False, CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_cache_settings(None), [])
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trader')
+        cls.sample = TradeSample.objects.create(owner=cls.user, name="A", start_date=date(2024, 1, 1))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_trade(self, day, comment, instrument='DAX'):
+        return self.sample.trades.create(
+            owner=self.user, date=timezone.make_aware(datetime(2024, 1, day, 10)), instrument=instrument,
+            realized_pnl=0, realized_r_multiple=0, outcome='BE', comment=comment,
+        )
+
+    def search(self, query):
+        response = self.client.get('/api/search/', {'q': query})
+        self.assertEqual(response.status_code, 200, response.data)
+        return [(hit['type'], hit['id']) for hit in response.data['results']]
+
+    def test_saves_are_indexed(self):
+        # Zapis poza API (admin, skrypty) też trafia do indeksu
+        trade = self.add_trade(2, "Chased the breakout")
+        card = self.user.daily_report_cards.create(date=date(2024, 1, 2), mistakes_with_solutions=[
+            {'mistake': "Chased entries", 'solution': "Wait for the retest"},
+        ])
+        playbook = self.user.playbooks.create(title="Retest", entry_criteria=["Breakout retest holds"])
+
+        self.assertEqual(self.search('retest'), [('playbook', playbook.pk), ('drc', card.pk)])
+        trade.comment = "Faded the range"
+        trade.save()
+        self.assertEqual(self.search('chased'), [('drc', card.pk)])
+        self.assertEqual(self.search('faded'), [('trade', trade.pk)])
+
+    def test_string_and_naive_dates(self):
+        # Zwykły zapis ORM z datą jako napisem albo naiwnym czasem – Django go przyjmuje, indeks też musi
+        card = self.user.daily_report_cards.create(date='2026-01-05', goal="Patience")
+        trade = self.sample.trades.create(
+            owner=self.user, date='2024-01-02T10:00:00Z', instrument='DAX', realized_pnl=0, realized_r_multiple=0,
+            outcome='BE', comment="Gap fill",
+        )
+        naive = self.add_trade(3, "Opening drive")
+        naive.date = datetime(2024, 1, 4, 10)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            naive.save()
+
+        documents = SearchDocument.objects.filter(owner=self.user)
+        self.assertEqual(documents.get(card=card).date, date(2026, 1, 5))
+        self.assertEqual(documents.get(trade=trade).date, timezone.localtime(Trade.objects.get(pk=trade.pk).date).date())
+        self.assertEqual(documents.get(trade=naive).date, date(2024, 1, 4))
+        self.assertEqual(self.search('patience'), [('drc', card.pk)])
+
+    def test_ranking(self):
+        once = self.add_trade(3, "Late entry on the pullback, small size")
+        often = self.add_trade(2, "Pullback, pullback and another pullback")
+        titled = self.add_trade(1, "Quiet session", instrument='Pullback')
+
+        # Słowa z tytułu ważą więcej niż z treści, częstsze trafienia wyżej
+        self.assertEqual(self.search('pullback'), [('trade', titled.pk), ('trade', often.pk), ('trade', once.pk)])
+        self.assertEqual(self.search('pullback -late'), [('trade', titled.pk), ('trade', often.pk)])
+        self.assertEqual(self.search('quiet or late'), [('trade', titled.pk), ('trade', once.pk)])
+
+    def test_backfill_migration(self):
+        trade = self.add_trade(2, "Chased the breakout")
+        SearchDocument.objects.all().delete()
+
+        migration = importlib.import_module('api.migrations.0003_backfill_search_documents')
+        migration.backfill_documents(apps, SimpleNamespace(connection=connection))
+
+        self.assertEqual(self.search('chased'), [('trade', trade.pk)])
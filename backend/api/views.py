@@ -1,10 +1,192 @@
+from django.conf import settings
 from django.shortcuts import render
 from django.contrib.auth.models import User
-from rest_framework import generics
-from .serializers import UserSerializer
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from rest_framework import exceptions, generics, mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotAcceptable, NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
+from .serializers import JobSerializer, UserSerializer
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from .exporting import (
+    CHUNK_SIZE, EXPORTS, ArrowRenderer, CSVRenderer, NDJSONRenderer, ParquetRenderer, arrow_available, astream, stream,
+)
+from .importing import import_status, iter_upload_rows
+from .jobs import EXPORT_RENDERERS, cancel, check_pending_limit, discard
+from .journal import JournalRestore, archive_chunks
+from .metrics import registry
+from .models import Job, SearchDocument
+from .pagination import SearchPagination
+from .search import hit_representation, search
 
 class CreateUserView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [AllowAny]
+
+
+def metrics_allowed(request):
+    # Scraper z tokenem METRICS_TOKEN (Authorization: Bearer) albo zalogowany staff. Sam REMOTE_ADDR za reverse
+    # proxy to adres proxy, więc lista METRICS_ALLOWED_IPS jest domyślnie pusta – tylko dla wdrożeń bez proxy
+    scheme, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    if settings.METRICS_TOKEN and scheme.lower() == 'bearer' and constant_time_compare(token, settings.METRICS_TOKEN):
+        return True
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+
+def metrics_view(request):
+    # Bez uprawnień endpoint nie istnieje
+    if not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ExportView(APIView):
+    """
+    Pełny eksport jednego zasobu: /api/export/<trade-logs|trades|samples|drcs|playbooks>/?format=csv|ndjson|arrow|parquet.
+    Wiersze czytane kursorem po stronie serwera i wysyłane paczkami – pamięć nie rośnie z długością historii.
+    """
+    renderer_classes = [CSVRenderer, NDJSONRenderer, ArrowRenderer, ParquetRenderer]
+
+    def get(self, request, resource):
+        renderer = request.accepted_renderer
+        if resource == 'journal':
+            # Archiwum całego dziennika (sekcje o różnych kolumnach) – tylko NDJSON, do odtworzenia przez /api/journal/restore/
+            if renderer.format != 'ndjson':
+                raise NotAcceptable("The journal archive is only available as NDJSON.")
+            chunks = archive_chunks(request.user)
+        else:
+            export = EXPORTS.get(resource)
+            if export is None:
+                raise NotFound(f"Unknown export '{resource}'. Choose one of: journal, {', '.join(EXPORTS)}.")
+            if renderer.requires_arrow and not arrow_available():
+                raise NotAcceptable(f"The {renderer.format} format needs pyarrow installed on the server.")
+
+            queryset = export.queryset(request.user)
+            encoder = renderer.encoder_class([column for column, _ in export.columns], export.fields(queryset.model))
+            chunks = stream(encoder, queryset.iterator(chunk_size=CHUNK_SIZE))
+
+        content = astream(chunks) if isinstance(request._request, ASGIRequest) else chunks
+
+        content_type = renderer.media_type + (f'; charset={renderer.charset}' if renderer.charset else '')
+        response = StreamingHttpResponse(content, content_type=content_type)
+        filename = f"{resource}-{timezone.localdate().isoformat()}.{renderer.extension}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+def queue_job(request, kind, params, upload=None):
+    """
+    Kolejkuje zadanie jak POST /api/jobs/ i zwraca 202 z adresem statusu – dla endpointów, które zbyt
+    dużą pracę oddają do tła. Wgrany plik trafia do magazynu zadań razem z wierszem, w jednej transakcji.
+    """
+    context = {'request': request, **({'upload': upload} if upload is not None else {})}
+    serializer = JobSerializer(data={'kind': kind, 'params': params}, context=context)
+    serializer.is_valid(raise_exception=True)
+    check_pending_limit(request.user)
+    with transaction.atomic():
+        job = serializer.save(owner=request.user)
+        if upload is not None:
+            job.result_file.save(f"{job.pk}.upload", upload)
+    location = reverse('job-detail', kwargs={'pk': job.pk}, request=request)
+    return Response(serializer.data, status=status.HTTP_202_ACCEPTED, headers={'Location': location})
+
+
+class JournalRestoreView(APIView):
+    """
+    Odtworzenie dziennika z archiwum NDJSON (/api/export/journal/) jako plik `file`.
+    ?replace=1 najpierw usuwa obecny dziennik użytkownika (zostaje, jeśli z archiwum nic nie powstało).
+    Plik większy niż JOURNAL_RESTORE_SYNC_MAX_BYTES odtwarzany jest w tle – 202 z zadaniem journal-restore.
+    """
+
+    def post(self, request):
+        replace = request.query_params.get('replace') == '1'
+        upload = request.FILES.get('file')
+        if upload is not None and upload.size > settings.JOURNAL_RESTORE_SYNC_MAX_BYTES:
+            return queue_job(request, 'journal-restore', {'replace': replace}, upload=upload)
+
+        restore = JournalRestore(request.user, replace=replace)
+        summary = restore.run(iter_upload_rows(request))
+        return Response(summary, status=import_status(any(summary['created'].values()), summary['failed']))
+
+
+class SearchView(APIView):
+    """
+    Wyszukiwanie w całym dzienniku (trade'y, DRC, playbooki): ?q=<zapytanie>&type=trade,drc,playbook&page=N.
+    Trafienia od najlepszego, z fragmentem tekstu, w którym znalezione słowa są w <mark>.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': ["This parameter is required."]})
+        kinds = [kind for kind in request.query_params.get('type', '').split(',') if kind]
+        if set(kinds) - set(SearchDocument.Kind.values):
+            raise ValidationError({'type': [f"Allowed values: {', '.join(SearchDocument.Kind.values)}."]})
+
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(search(request.user, text, kinds), request, view=self)
+        return paginator.get_paginated_response([hit_representation(hit) for hit in page])
+
+
+class JobConflict(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The job is not in a state that allows this."
+    default_code = 'conflict'
+
+
+class JobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                 mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Zadania w tle: POST {"kind": "monte-carlo|export|rebuild-rollups|verify-aggregates", "params": {...}}
+    zwraca 202 i status do odpytywania, wynik pod /api/jobs/<id>/result/ (JSON albo plik eksportu).
+    Zadania journal-restore tworzy /api/journal/restore/ dla dużych archiwów.
+    DELETE anuluje zadanie z kolejki albo usuwa zakończone razem z wynikiem.
+    """
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        # Wyniki po terminie są niewidoczne od razu, nie dopiero po sprzątaniu przez workera
+        return self.request.user.jobs.exclude(expires_at__lte=timezone.now())
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        response['Location'] = reverse('job-detail', kwargs={'pk': response.data['id']}, request=request)
+        return response
+
+    def perform_create(self, serializer):
+        check_pending_limit(self.request.user)
+        serializer.save(owner=self.request.user)
+
+    def perform_destroy(self, instance):
+        # Warunkowe UPDATE – worker mógł właśnie przejąć zadanie
+        if instance.status == Job.Status.QUEUED and cancel(instance):
+            return
+        if instance.status in (Job.Status.QUEUED, Job.Status.RUNNING):
+            raise JobConflict("A running job cannot be cancelled.")
+        discard(Job.objects.filter(pk=instance.pk))
+
+    @action(detail=True, methods=['get'])
+    def result(self, request, pk=None):
+        job = self.get_object()
+        if job.status != Job.Status.SUCCEEDED:
+            raise JobConflict(f"The job is {job.status}, there is no result.")
+        if not job.result_file:
+            return Response(job.result)
+
+        renderer = EXPORT_RENDERERS[job.params['format']]
+        content_type = renderer.media_type + (f'; charset={renderer.charset}' if renderer.charset else '')
+        return FileResponse(
+            job.result_file.open('rb'), as_attachment=True, filename=job.result['filename'], content_type=content_type,
+        )
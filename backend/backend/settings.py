@@ -27,6 +27,7 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.OwnerCursorPagination",
 }
 
 SIMPLE_JWT = {
@@ -53,6 +54,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,17 +90,135 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 tmpPostgres = urlparse(os.getenv("DATABASE_URL"))
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': tmpPostgres.path.replace('/', ''),
-        'USER': tmpPostgres.username,
-        'PASSWORD': tmpPostgres.password,
-        'HOST': tmpPostgres.hostname,
-        'PORT': 5432,
-        'OPTIONS': dict(parse_qsl(tmpPostgres.query)),
+# Connection reuse (validated at startup by api.checks):
+# DB_CONN_MAX_AGE - seconds a connection is kept between requests, 0 opens a new one per request
+# DB_POOL - psycopg 3 connection pool, "1" for defaults or "min_size:max_size"; replaces persistent connections
+# DB_PGBOUNCER - set to 1 when DATABASE_URL points at PgBouncer in transaction pooling mode
+# The defaults are not backed by measurements: `manage.py benchmark_connections` compares these strategies
+# against a real Postgres (and PgBouncer), but it has not been run yet. Run it before changing them in production.
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+DB_POOL = os.getenv("DB_POOL", "")
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "0") == "1"
+
+if tmpPostgres.scheme == 'sqlite':
+    # Local runs and benchmarks without a Postgres server: sqlite:///db.sqlite3 or sqlite:////abs/path.sqlite3
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / tmpPostgres.path[1:],
+        }
     }
-}
+    # SQLite cannot create the NULLS NOT DISTINCT rollup constraint; the per-user lock in analytics.rollups
+    # already serialises rollup refreshes there
+    SILENCED_SYSTEM_CHECKS = ['models.W047']
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': tmpPostgres.path.replace('/', ''),
+            'USER': tmpPostgres.username,
+            'PASSWORD': tmpPostgres.password,
+            'HOST': tmpPostgres.hostname,
+            'PORT': tmpPostgres.port or 5432,
+            'OPTIONS': dict(parse_qsl(tmpPostgres.query)),
+            # Persistent connections, checked before reuse so a dropped connection doesn't fail the request
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_MAX_AGE > 0,
+            # PgBouncer in transaction mode can't keep server-side cursors (QuerySet.iterator) across transactions
+            'DISABLE_SERVER_SIDE_CURSORS': DB_PGBOUNCER,
+        }
+    }
+    if DB_POOL:
+        # psycopg 3 pool: connections go back to the pool after each request instead of staying open per thread
+        min_size, _, max_size = DB_POOL.partition(':')
+        DATABASES['default']['OPTIONS']['pool'] = True if DB_POOL.lower() in ('1', 'true') else {
+            'min_size': int(min_size),
+            'max_size': int(max_size or min_size),
+        }
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        # With a pool the health check runs when a connection is taken out of it
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+
+# Cache
+# Analytics results are versioned per user (see analytics.cache).
+# Local memory by default, a shared Redis when REDIS_URL is set.
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'tradingzone',
+        }
+    }
+
+# LocMemCache is per process: after a write, other workers keep serving analytics results computed before it
+# until they expire, so without a shared cache (REDIS_URL) results live only this long. Check api.W005 warns
+# about a process-local cache outside DEBUG.
+ANALYTICS_LOCAL_CACHE_TTL = int(os.getenv("ANALYTICS_LOCAL_CACHE_TTL", "30"))
+
+
+# Async reads
+# Under ASGI (uvicorn backend.asgi:application) GET on trade logs, DRCs and dashboard widgets is served
+# by async views (api.async_views); writes keep going through the sync ViewSets.
+# Persistent connections don't work across async requests, use DB_POOL instead of DB_CONN_MAX_AGE.
+
+ASYNC_READS = os.getenv("ASYNC_READS", "0") == "1"
+
+
+# Push events
+# Per-user change events (market bias, reminders, sample P&L, new trade logs) streamed as server-sent events
+# at /api/events/ (ASGI only). Published after commit through EVENTS_BROKER: in-process by default,
+# which only reaches clients connected to the same worker; Redis pub/sub when REDIS_URL is set.
+
+EVENTS_ENABLED = os.getenv("EVENTS_ENABLED", "1" if ASYNC_READS else "0") == "1"
+EVENTS_BROKER = os.getenv("EVENTS_BROKER", "api.events.RedisBroker" if REDIS_URL else "api.events.InProcessBroker")
+# Idle streams get an SSE comment this often so proxies don't drop them
+EVENTS_KEEPALIVE_SECONDS = int(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+# Reconnect delay suggested to EventSource clients
+EVENTS_RETRY_MS = int(os.getenv("EVENTS_RETRY_MS", "3000"))
+
+
+# Metrics
+# Per-view latency, query count, DB and serializer time (api.middleware), Prometheus text at /api/metrics/.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# /api/metrics/ needs `Authorization: Bearer <METRICS_TOKEN>` (Prometheus `authorization` in the scrape config)
+# or a logged-in staff user. METRICS_ALLOWED_IPS additionally trusts REMOTE_ADDR – only safe when the app is
+# not behind a reverse proxy, where every request comes from the proxy's address
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv("METRICS_ALLOWED_IPS", "").split(",") if ip.strip()]
+# Identical SQL repeated this many times in one request is reported as a possible N+1
+METRICS_N_PLUS_ONE_THRESHOLD = int(os.getenv("METRICS_N_PLUS_ONE_THRESHOLD", "5"))
+
+
+# Background jobs
+# Heavy work (Monte Carlo, large exports and restores, rollup rebuilds, aggregate verification) queued in the api.Job table
+# and executed by `python manage.py run_jobs` in a process pool – no external broker needed.
+
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "2"))
+JOBS_POLL_SECONDS = float(os.getenv("JOBS_POLL_SECONDS", "1"))
+# Jobs of one user running at the same time / waiting in the queue
+JOBS_MAX_RUNNING_PER_USER = int(os.getenv("JOBS_MAX_RUNNING_PER_USER", "1"))
+JOBS_MAX_PENDING_PER_USER = int(os.getenv("JOBS_MAX_PENDING_PER_USER", "10"))
+# Finished jobs and their result files are deleted after this long
+JOBS_RESULT_TTL_SECONDS = int(os.getenv("JOBS_RESULT_TTL_SECONDS", str(60 * 60 * 24)))
+# Jobs still running after this long are marked failed; run_jobs kills their processes (restarting its pool
+# once the other jobs in it finish), and jobs of a worker that disappeared are failed by the expiry sweep
+JOBS_TIMEOUT_SECONDS = int(os.getenv("JOBS_TIMEOUT_SECONDS", str(60 * 60)))
+JOBS_RESULT_DIR = os.getenv("JOBS_RESULT_DIR", str(BASE_DIR / "job_results"))
+# Journal archives uploaded to /api/journal/restore/ above this size are restored as a background job
+# (roughly 1.3 s of request time per MB of NDJSON otherwise)
+JOURNAL_RESTORE_SYNC_MAX_BYTES = int(os.getenv("JOURNAL_RESTORE_SYNC_MAX_BYTES", str(2 * 1024 * 1024)))
 
 
 # Password validation
@@ -1,16 +1,23 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from api.views import CreateUserView
+from api.async_views import EventStreamView
+from api.views import CreateUserView, ExportView, JobViewSet, JournalRestoreView, SearchView, metrics_view
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from trade_samples.views import TradeViewSet
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
 router.register(r'trades', TradeViewSet, basename='trade')
+router.register(r'jobs', JobViewSet, basename='job')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/user/register/', CreateUserView.as_view(), name='register'),
+    path('api/metrics/', metrics_view, name='metrics'),
+    path('api/export/<str:resource>/', ExportView.as_view(), name='export'),
+    path('api/journal/restore/', JournalRestoreView.as_view(), name='journal-restore'),
+    path('api/search/', SearchView.as_view(), name='search'),
     path('api/token/', TokenObtainPairView.as_view(), name='get_token'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='refresh'),
     path('api-auth/', include('rest_framework.urls')),
@@ -21,3 +28,7 @@ urlpatterns = [
     path('api/', include('analytics.urls')),
     path('api/', include('dashboard.urls')),
 ]
+
+if settings.ASYNC_READS:
+    # Strumień SSE trzyma połączenie otwarte – tylko pod ASGI, pod WSGI blokowałby cały wątek workera
+    urlpatterns.append(path('api/events/', EventStreamView.as_view(), name='events'))
@@ -6,6 +6,7 @@ class Reminder(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     text = models.CharField(max_length=255)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reminders')
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.text[:50]
@@ -16,6 +17,7 @@ class MarketDriver(models.Model):
     percentage = models.PositiveIntegerField()
     color = models.CharField(max_length=20, default='blue')
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='market_drivers')
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} ({self.percentage}%)"
@@ -33,6 +35,7 @@ class MarketBias(models.Model):
     instrument = models.CharField(max_length=20)
     bias = models.CharField(max_length=20, choices=BiasChoices.choices, default=BiasChoices.NEUTRAL)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='market_biases')
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ['owner', 'instrument'] # Jeden użytkownik = jeden wpis na instrument
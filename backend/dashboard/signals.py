@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import MarketBias
+from api import events
+from .models import MarketBias, Reminder
 
 DEFAULT_INSTRUMENTS = [
     "XAUUSD", "NASDAQ", "DAX", "GBPJPY", "BTC", "USD"
@@ -14,4 +15,21 @@ def create_default_biases(sender, instance, created, **kwargs):
             MarketBias(owner=instance, instrument=instrument_name)
             for instrument_name in DEFAULT_INSTRUMENTS
         ]
-        MarketBias.objects.bulk_create(biases_to_create)
\ No newline at end of file
+        MarketBias.objects.bulk_create(biases_to_create)
+
+
+@receiver(post_save, sender=MarketBias)
+def publish_market_bias(sender, instance, **kwargs):
+    events.publish(instance.owner_id, 'market_bias', action='updated', id=instance.pk,
+                   instrument=instance.instrument, bias=instance.bias)
+
+
+@receiver(post_save, sender=Reminder)
+def publish_reminder(sender, instance, created, **kwargs):
+    events.publish(instance.owner_id, 'reminder', action='created' if created else 'updated',
+                   id=instance.pk, text=instance.text)
+
+
+@receiver(post_delete, sender=Reminder)
+def publish_reminder_deleted(sender, instance, **kwargs):
+    events.publish(instance.owner_id, 'reminder', action='deleted', id=instance.pk)
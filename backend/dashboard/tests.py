@@ -1,3 +1,67 @@
+from datetime import date
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
+from drc.models import DailyReportCard
+from trade_samples.models import TradeSample
+from .signals import DEFAULT_INSTRUMENTS
+from .views import DASHBOARD_SAMPLES
 
-# Create your tests here.
+
+class DashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trader')
+        cls.user.reminders.create(text="Wait for the close")
+        cls.user.market_drivers.create(name="CPI", percentage=60)
+        cls.user.market_biases.filter(instrument='DAX').update(bias='BULLISH')
+        for day in (2, 5, 3):
+            DailyReportCard.objects.create(owner=cls.user, date=date(2024, 1, day))
+        for day in range(1, DASHBOARD_SAMPLES + 3):
+            TradeSample.objects.create(owner=cls.user, name=f"Sample {day}", start_date=date(2024, 1, day))
+        # Dane innego użytkownika nie trafiają do dashboardu
+        User.objects.create_user(username='other').reminders.create(text="Not mine")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_sections(self):
+        response = self.client.get('/api/dashboard/')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(set(response.data), {'reminders', 'market_drivers', 'market_bias', 'latest_drc', 'samples'})
+        self.assertEqual([reminder['text'] for reminder in response.data['reminders']], ["Wait for the close"])
+        self.assertEqual(response.data['market_drivers'][0]['name'], "CPI")
+        # Domyślne biasy z rejestracji plus zmieniony DAX
+        biases = {bias['instrument']: bias['bias'] for bias in response.data['market_bias']}
+        self.assertEqual(len(biases), len(DEFAULT_INSTRUMENTS))
+        self.assertEqual(biases['DAX'], 'BULLISH')
+        self.assertEqual(response.data['latest_drc']['date'], '2024-01-05')
+        # Najnowsze próbki, w wersji bez trade'ów
+        self.assertEqual(len(response.data['samples']), DASHBOARD_SAMPLES)
+        self.assertEqual(response.data['samples'][0]['start_date'], f'2024-01-{DASHBOARD_SAMPLES + 2:02}')
+        self.assertNotIn('trades', response.data['samples'][0])
+
+    def test_include(self):
+        response = self.client.get('/api/dashboard/', {'include': 'reminders, latest_drc'})
+        self.assertEqual(set(response.data), {'reminders', 'latest_drc'})
+
+        response = self.client.get('/api/dashboard/', {'include': 'reminders,news'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('include', response.data)
+
+    def test_empty_sections(self):
+        self.client.force_authenticate(User.objects.create_user(username='new'))
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.data['reminders'], [])
+        self.assertIsNone(response.data['latest_drc'])
+
+    def test_one_query_per_section(self):
+        # Wersja dla ETag (wszystkie sekcje jednym zapytaniem) i po jednym zapytaniu na sekcję
+        with self.assertNumQueries(6):
+            response = self.client.get('/api/dashboard/')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        with self.assertNumQueries(2):
+            self.client.get('/api/dashboard/', {'include': 'market_bias'})
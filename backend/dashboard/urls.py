@@ -1,9 +1,20 @@
 from rest_framework.routers import DefaultRouter
-from .views import ReminderViewSet, MarketDriverViewSet, MarketBiasViewSet
+from api.async_views import with_async_reads
+from .views import ReminderViewSet, MarketDriverViewSet, MarketBiasViewSet, DashboardViewSet
+from .views import AsyncReminderView, AsyncMarketDriverView, AsyncMarketBiasView, AsyncDashboardView
 
 router = DefaultRouter()
 router.register(r'reminders', ReminderViewSet, basename='reminder')
 router.register(r'market-drivers', MarketDriverViewSet, basename='marketdriver')
 router.register(r'market-bias', MarketBiasViewSet, basename='marketbias')
+router.register(r'dashboard', DashboardViewSet, basename='dashboard')
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = with_async_reads(router.urls, {
+    'reminder-list': AsyncReminderView,
+    'reminder-detail': AsyncReminderView,
+    'marketdriver-list': AsyncMarketDriverView,
+    'marketdriver-detail': AsyncMarketDriverView,
+    'marketbias-list': AsyncMarketBiasView,
+    'marketbias-detail': AsyncMarketBiasView,
+    'dashboard-list': AsyncDashboardView,
+})
\ No newline at end of file
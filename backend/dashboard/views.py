@@ -1,9 +1,15 @@
 from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from api.async_views import AsyncReadView
+from api.mixins import ConditionalGetMixin, ConditionalResponseMixin
+from drc.serializers import DailyReportCardSerializer
+from trade_samples.serializers import TradeSampleSummarySerializer
 from .models import Reminder, MarketDriver, MarketBias
 from .serializers import ReminderSerializer, MarketDriverSerializer, MarketBiasSerializer
 
-class ReminderViewSet(viewsets.ModelViewSet):
+class ReminderViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ReminderSerializer
     permission_classes = [IsAuthenticated]
 
@@ -13,7 +19,7 @@ class ReminderViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-class MarketDriverViewSet(viewsets.ModelViewSet):
+class MarketDriverViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = MarketDriverSerializer
     permission_classes = [IsAuthenticated]
 
@@ -23,7 +29,7 @@ class MarketDriverViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-class MarketBiasViewSet(viewsets.ModelViewSet):
+class MarketBiasViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = MarketBiasSerializer
     permission_classes = [IsAuthenticated]
 
@@ -32,3 +38,100 @@ class MarketBiasViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
+
+
+class AsyncReminderView(AsyncReadView):
+    serializer_class = ReminderSerializer
+    related_name = 'reminders'
+
+class AsyncMarketDriverView(AsyncReadView):
+    serializer_class = MarketDriverSerializer
+    related_name = 'market_drivers'
+
+class AsyncMarketBiasView(AsyncReadView):
+    serializer_class = MarketBiasSerializer
+    related_name = 'market_biases'
+
+
+DASHBOARD_SAMPLES = 10
+
+# Sekcja -> (queryset użytkownika, serializer, lista czy pojedynczy obiekt)
+DASHBOARD_SECTIONS = {
+    'reminders': (lambda user: user.reminders.all(), ReminderSerializer, True),
+    'market_drivers': (lambda user: user.market_drivers.all(), MarketDriverSerializer, True),
+    'market_bias': (lambda user: user.market_biases.all(), MarketBiasSerializer, True),
+    'latest_drc': (lambda user: user.daily_report_cards.all(), DailyReportCardSerializer, False),
+    'samples': (lambda user: user.trade_samples.all(), TradeSampleSummarySerializer, True),
+}
+
+
+def parse_sections(include):
+    if not include:
+        return list(DASHBOARD_SECTIONS)
+
+    sections = [name.strip() for name in include.split(',') if name.strip()]
+    unknown = set(sections) - set(DASHBOARD_SECTIONS)
+    if unknown:
+        raise ValidationError({'include': f"Unknown sections: {', '.join(sorted(unknown))}."})
+    return sections
+
+
+def section_queryset(name, user):
+    queryset = DASHBOARD_SECTIONS[name][0](user)
+    return queryset[:DASHBOARD_SAMPLES] if name == 'samples' else queryset
+
+
+def serialize_section(name, data, context):
+    # data: lista obiektów dla sekcji listowych, pojedynczy obiekt albo None dla pozostałych
+    _, serializer_class, many = DASHBOARD_SECTIONS[name]
+    if many:
+        return serializer_class(data, many=True, context=context).data
+    return serializer_class(data, context=context).data if data is not None else None
+
+
+class DashboardViewSet(ConditionalResponseMixin, viewsets.ViewSet):
+    """
+    Wszystkie widgety dashboardu w jednej odpowiedzi, jedno zapytanie na sekcję.
+    ?include=reminders,market_bias wybiera sekcje (domyślnie wszystkie).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_sections(self):
+        return parse_sections(self.request.query_params.get('include'))
+
+    def get_version_querysets(self):
+        return [DASHBOARD_SECTIONS[name][0](self.request.user) for name in self.get_sections()]
+
+    def list(self, request):
+        return self._conditional(self._dashboard, request)
+
+    def _dashboard(self, request):
+        data = {}
+        for name in self.get_sections():
+            queryset = section_queryset(name, request.user)
+            many = DASHBOARD_SECTIONS[name][2]
+            data[name] = serialize_section(name, queryset if many else queryset.first(), {'request': request})
+        return Response(data)
+
+
+class AsyncDashboardView(AsyncReadView):
+    """
+    Dashboard przez async ORM, bez blokowania wątku. Sekcje po kolei – async ORM wykonuje zapytania
+    jednego requestu w jednym wątku i połączeniu, więc asyncio.gather nie skróciłby odpowiedzi.
+    """
+
+    def get_version_querysets(self, request, pk=None):
+        return [DASHBOARD_SECTIONS[name][0](request.user) for name in parse_sections(request.GET.get('include'))]
+
+    async def get_data(self, request, pk=None):
+        context = self.serializer_context(request)
+        sections = parse_sections(request.GET.get('include'))
+
+        data = {}
+        for name in sections:
+            queryset = section_queryset(name, request.user)
+            if DASHBOARD_SECTIONS[name][2]:
+                data[name] = serialize_section(name, [obj async for obj in queryset], context)
+            else:
+                data[name] = serialize_section(name, await queryset.afirst(), context)
+        return data
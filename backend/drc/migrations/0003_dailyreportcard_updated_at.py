@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 12:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drc', '0002_alter_dailyreportcard_grade'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyreportcard',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2 on 2026-10-18 13:41
+
+import django.db.models.deletion
+import json
+from itertools import islice
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Kopia api.listitems / api.importing z chwili tej migracji – migracja nie może zależeć od bieżącego kodu aplikacji
+MAX_TEXT_LENGTH = 255
+
+
+def item_text(item, key=None):
+    if isinstance(item, dict) and key in item:
+        item = item[key]
+    if item is None:
+        return ''
+    text = item if isinstance(item, str) else json.dumps(item, sort_keys=True, ensure_ascii=False)
+    return text.strip()[:MAX_TEXT_LENGTH]
+
+
+def item_key(text):
+    return ' '.join(text.split()).casefold()[:MAX_TEXT_LENGTH]
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+FIELDS = ('reminders', 'improvements', 'mistakes_with_solutions', 'performance_table')
+KEYS = {'mistakes_with_solutions': 'mistake', 'performance_table': 'segment_name'}
+
+
+def backfill_items(apps, schema_editor):
+    DailyReportCard = apps.get_model('drc', 'DailyReportCard')
+    DailyReportCardItem = apps.get_model('drc', 'DailyReportCardItem')
+
+    def items():
+        for card in DailyReportCard.objects.iterator(chunk_size=500):
+            for field in FIELDS:
+                values = getattr(card, field)
+                for position, item in enumerate(values if isinstance(values, list) else []):
+                    text = item_text(item, KEYS.get(field))
+                    if text:
+                        yield DailyReportCardItem(
+                            card=card, owner_id=card.owner_id, field=field, position=position,
+                            text=text, key=item_key(text),
+                        )
+
+    for batch in chunked(items(), 2000):
+        DailyReportCardItem.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drc', '0003_dailyreportcard_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyReportCardItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('reminders', 'reminders'), ('improvements', 'improvements'), ('mistakes_with_solutions', 'mistakes_with_solutions'), ('performance_table', 'performance_table')], max_length=30)),
+                ('position', models.PositiveIntegerField()),
+                ('text', models.CharField(max_length=255)),
+                ('key', models.CharField(max_length=255)),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='drc.dailyreportcard')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['field', 'position'],
+                'indexes': [models.Index(fields=['owner', 'field', 'key'], name='drc_item_lookup_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_items, migrations.RunPython.noop),
+    ]
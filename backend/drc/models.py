@@ -39,6 +39,7 @@ class DailyReportCard(models.Model):
     performance_table = models.JSONField(default=list, blank=True)
     
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_report_cards')
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-date']
@@ -46,3 +47,26 @@ class DailyReportCard(models.Model):
 
     def __str__(self):
         return f'DRC on {self.date} for {self.owner} with grade {self.grade}.'
+
+
+class DailyReportCardItem(models.Model):
+    # Elementy pól-list DRC w osobnych wierszach (utrzymywane przez api.listitems), żeby filtrować
+    # i zliczać np. powtarzające się błędy po stronie bazy zamiast przeglądać każdą kartę
+    FIELDS = ('reminders', 'improvements', 'mistakes_with_solutions', 'performance_table')
+    KEYS = {'mistakes_with_solutions': 'mistake', 'performance_table': 'segment_name'}
+
+    card = models.ForeignKey(DailyReportCard, on_delete=models.CASCADE, related_name='items')
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    field = models.CharField(max_length=30, choices=[(field, field) for field in FIELDS])
+    position = models.PositiveIntegerField()
+    text = models.CharField(max_length=255)
+    key = models.CharField(max_length=255)
+
+    class Meta:
+        ordering = ['field', 'position']
+        indexes = [
+            models.Index(fields=['owner', 'field', 'key'], name='drc_item_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.field}[{self.position}]: {self.text}'
@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from api.serializers import SparseFieldsetMixin
 from .models import DailyReportCard
 
-class DailyReportCardSerializer(serializers.ModelSerializer):
+class DailyReportCardSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = DailyReportCard
         
@@ -1,3 +1,63 @@
+import json
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+PATCH = 'application/json-patch+json'
+
+
+class JSONPatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trader')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/api/drcs/', {
+            'date': '2024-01-02', 'improvements': ["Journal every trade"],
+            'mistakes_with_solutions': [{'mistake': "FOMO", 'solution': "Wait for the close"}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.url = f"/api/drcs/{response.data['id']}/"
+
+    def patch(self, operations):
+        return self.client.patch(self.url, json.dumps(operations), content_type=PATCH)
+
+    def test_apply(self):
+        response = self.patch([
+            {'op': 'test', 'path': '/mistakes_with_solutions/0/mistake', 'value': "FOMO"},
+            {'op': 'replace', 'path': '/mistakes_with_solutions/0/solution', 'value': "Size down"},
+            {'op': 'add', 'path': '/improvements/-', 'value': "Review the week"},
+        ])
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['mistakes_with_solutions'], [{'mistake': "FOMO", 'solution': "Size down"}])
+        self.assertEqual(response.data['improvements'], ["Journal every trade", "Review the week"])
+        # Elementy list zsynchronizowane – filtr listy widzi nową wartość
+        self.assertEqual(len(self.client.get('/api/drcs/', {'improvements': "review the WEEK"}).data), 1)
+
+    def test_failed_test_is_a_conflict(self):
+        response = self.patch([
+            {'op': 'test', 'path': '/mistakes_with_solutions/0/mistake', 'value': "Revenge trading"},
+            {'op': 'remove', 'path': '/mistakes_with_solutions/0'},
+        ])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(len(self.client.get(self.url).data['mistakes_with_solutions']), 1)
+
+    def test_errors(self):
+        for operations in (
+            [{'op': 'remove', 'path': '/improvements/5'}],
+            [{'op': 'replace', 'path': '/goal', 'value': "Not a list field"}],
+            [{'op': 'move', 'path': '/improvements/0'}],
+            [{'op': 'replace', 'path': '/improvements', 'value': "not a list"}],
+            {'op': 'remove', 'path': '/improvements/0'},
+        ):
+            self.assertEqual(self.patch(operations).status_code, 400, operations)
+        self.assertEqual(self.client.get(self.url).data['improvements'], ["Journal every trade"])
+
+    def test_item_filters_apply_only_to_the_list(self):
+        response = self.client.get(self.url, {'improvements': "something else"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/drcs/', {'improvements': "something else"}).data, [])
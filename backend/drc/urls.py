@@ -1,11 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DailyReportCardView
+from api.async_views import with_async_reads
+from .views import DailyReportCardView, AsyncDailyReportCardView
 
 router = DefaultRouter()
 
 router.register(r'drcs', DailyReportCardView, basename='daily_report_card')
 
 urlpatterns = [
-    path('', include(router.urls)),
+    path('', include(with_async_reads(router.urls, {
+        'daily_report_card-list': AsyncDailyReportCardView,
+        'daily_report_card-detail': AsyncDailyReportCardView,
+    }))),
 ]
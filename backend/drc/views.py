@@ -1,16 +1,36 @@
+from django.db import transaction
 from django.shortcuts import render
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
-from .models import DailyReportCard
+from api.async_views import AsyncReadView
+from api.listitems import sync_items
+from api.mixins import ConditionalGetMixin, JSONPatchMixin, ListItemsMixin
+from .models import DailyReportCard, DailyReportCardItem
 from .serializers import DailyReportCardSerializer
 
-class DailyReportCardView(viewsets.ModelViewSet):
+class DailyReportCardView(JSONPatchMixin, ListItemsMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = DailyReportCardSerializer
     permission_classes = [IsAuthenticated]
+    json_patch_fields = DailyReportCardItem.FIELDS
 
     def get_queryset(self):
         return self.request.user.daily_report_cards.all()
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        with transaction.atomic():
+            card = serializer.save(owner=self.request.user)
+            sync_items(card)
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            card = serializer.save()
+            sync_items(card, fields=serializer.validated_data)
+
+
+class AsyncDailyReportCardView(AsyncReadView):
+    serializer_class = DailyReportCardSerializer
+    related_name = 'daily_report_cards'
+
+    def use_sync_view(self, request, kwargs):
+        # Filtry po elementach list obsługuje ViewSet
+        return super().use_sync_view(request, kwargs) or any(field in request.GET for field in DailyReportCardItem.FIELDS)
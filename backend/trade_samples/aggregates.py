@@ -0,0 +1,115 @@
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, Now
+from api import events
+from .models import TradeSample, Trade
+
+AGGREGATE_FIELDS = ['pnl', 'trades_count', 'wins', 'losses', 'breakevens', 'total_r', 'rules_followed_count']
+
+_OUTCOME_FIELDS = {
+    Trade.OutcomeChoices.WIN: 'wins',
+    Trade.OutcomeChoices.LOSS: 'losses',
+    Trade.OutcomeChoices.BREAKEVEN: 'breakevens',
+}
+
+
+def trade_contribution(trade):
+    contribution = dict.fromkeys(AGGREGATE_FIELDS, 0)
+    contribution.update(
+        pnl=Decimal(trade.realized_pnl),
+        trades_count=1,
+        total_r=Decimal(trade.realized_r_multiple),
+        rules_followed_count=int(trade.rules_followed),
+    )
+    outcome_field = _OUTCOME_FIELDS.get(trade.outcome)
+    if outcome_field:
+        contribution[outcome_field] = 1
+    return contribution
+
+
+def merge_deltas(*deltas):
+    merged = dict.fromkeys(AGGREGATE_FIELDS, 0)
+    for delta in deltas:
+        for field, value in delta.items():
+            merged[field] += value
+    return merged
+
+
+def trade_delta(old=None, new=None):
+    # Różnica między starym a nowym stanem trade'a; None oznacza brak (create / delete)
+    parts = []
+    if new is not None:
+        parts.append(trade_contribution(new))
+    if old is not None:
+        parts.append({field: -value for field, value in trade_contribution(old).items()})
+    return merge_deltas(*parts)
+
+
+def apply_delta(sample_id, delta):
+    # Jeden UPDATE z wyrażeniami F – atomowy na poziomie wiersza, bez wyścigów między requestami
+    changes = {field: F(field) + value for field, value in delta.items() if value}
+    if changes:
+        TradeSample.objects.filter(pk=sample_id).update(**changes, updated_at=Now())
+        if settings.EVENTS_ENABLED:
+            transaction.on_commit(lambda: _send_aggregates(sample_id), robust=True)
+
+
+def _send_aggregates(sample_id):
+    # UPDATE z F() omija post_save – nowe pnl czytamy już po commicie
+    sample = TradeSample.objects.filter(pk=sample_id).values('owner_id', 'pnl', 'trades_count', 'total_r').first()
+    if sample is not None:
+        events.send(sample.pop('owner_id'), 'trade_sample', action='updated', id=sample_id, **sample)
+
+
+def apply_trade_delta(sample_id, old=None, new=None):
+    apply_delta(sample_id, trade_delta(old=old, new=new))
+
+
+def apply_trade_change(old, new):
+    # Edycja trade'a; po przeniesieniu do innej próbki stara traci jego wkład, nowa go zyskuje
+    if old.sample_id == new.sample_id:
+        apply_trade_delta(new.sample_id, old=old, new=new)
+    else:
+        apply_trade_delta(old.sample_id, old=old)
+        apply_trade_delta(new.sample_id, new=new)
+
+
+def compute_aggregates(samples):
+    # Pełne przeliczenie z tabeli Trade – używane do przebudowy i weryfikacji
+    return samples.order_by().annotate(
+        computed_pnl=Coalesce(Sum('trades__realized_pnl'), Decimal('0.00')),
+        computed_trades_count=Count('trades'),
+        computed_wins=Count('trades', filter=Q(trades__outcome=Trade.OutcomeChoices.WIN)),
+        computed_losses=Count('trades', filter=Q(trades__outcome=Trade.OutcomeChoices.LOSS)),
+        computed_breakevens=Count('trades', filter=Q(trades__outcome=Trade.OutcomeChoices.BREAKEVEN)),
+        computed_total_r=Coalesce(Sum('trades__realized_r_multiple'), Decimal('0.00')),
+        computed_rules_followed_count=Count('trades', filter=Q(trades__rules_followed=True)),
+    )
+
+
+def mismatched_fields(sample):
+    return {
+        field: (getattr(sample, field), getattr(sample, f'computed_{field}'))
+        for field in AGGREGATE_FIELDS
+        if getattr(sample, field) != getattr(sample, f'computed_{field}')
+    }
+
+
+def rebuild_aggregates(samples=None, fix=True):
+    if samples is None:
+        samples = TradeSample.objects.all()
+
+    mismatches = {}
+    for sample in compute_aggregates(samples).iterator(chunk_size=500):
+        diff = mismatched_fields(sample)
+        if not diff:
+            continue
+        mismatches[sample.pk] = diff
+        if fix:
+            TradeSample.objects.filter(pk=sample.pk).update(
+                **{field: getattr(sample, f'computed_{field}') for field in AGGREGATE_FIELDS},
+                updated_at=Now(),
+            )
+    return mismatches
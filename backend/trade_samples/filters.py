@@ -0,0 +1,15 @@
+from api.filters import JournalFilter
+from .models import Trade
+
+
+class TradeFilter(JournalFilter):
+    instrument_lookup = 'instrument'
+    r_field = 'realized_r_multiple'
+    outcome_choices = Trade.OutcomeChoices.values
+    rules_field = 'rules_followed'
+    facets = {
+        'instrument': ('instrument', None),
+        'outcome': ('outcome', None),
+        'strategy': ('strategy_id', 'strategy__title'),
+        'rules_followed': ('rules_followed', None),
+    }
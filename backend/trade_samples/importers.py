@@ -0,0 +1,52 @@
+from api.importing import BulkImporter, playbook_lookup
+from api.search import index_documents
+from .models import Trade
+from .serializers import TradeImportSerializer
+from .aggregates import apply_delta, merge_deltas, trade_contribution
+from analytics.equity import refresh_trade_curves
+from analytics.rollups import Source, refresh_rollups
+from analytics.cache import bump_version
+
+
+class TradeImporter(BulkImporter):
+    model = Trade
+    serializer_class = TradeImportSerializer
+    aliases = {
+        'symbol': 'instrument',
+        'playbook': 'strategy',
+        'pnl': 'realized_pnl',
+        'r': 'realized_r_multiple',
+        'r_multiple': 'realized_r_multiple',
+        'result': 'outcome',
+    }
+
+    def __init__(self, request, sample=None):
+        context = {'sample': sample, 'playbooks': playbook_lookup(request.user)}
+        if sample is None:
+            context['samples'] = {str(s.id): s for s in request.user.trade_samples.only('id')}
+        super().__init__(request, context)
+        self.sample_ids = set()
+        self.since = None
+
+    def build_instance(self, validated_data):
+        return Trade(owner=self.request.user, **validated_data)
+
+    def after_batch(self, instances):
+        # Agregaty próbek odświeżane raz na paczkę, jednym UPDATE na próbkę
+        deltas = {}
+        for trade in instances:
+            deltas.setdefault(trade.sample_id, []).append(trade_contribution(trade))
+        for sample_id, contributions in deltas.items():
+            apply_delta(sample_id, merge_deltas(*contributions))
+
+        self.sample_ids.update(deltas)
+        index_documents(instances)
+        batch_since = min(trade.date for trade in instances)
+        self.since = batch_since if self.since is None else min(self.since, batch_since)
+
+    def after_import(self):
+        # Krzywe kapitału przeliczane raz na cały import, od najwcześniejszej zaimportowanej daty
+        refresh_trade_curves(self.request.user.pk, self.sample_ids, since=self.since)
+        refresh_rollups(self.request.user.pk, Source.TRADES, since=self.since)
+        # bulk_create nie wysyła sygnałów, więc wersję danych podbijamy ręcznie
+        bump_version(self.request.user.pk)
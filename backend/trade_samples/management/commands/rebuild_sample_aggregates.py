@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from trade_samples.models import TradeSample
+from trade_samples.aggregates import rebuild_aggregates
+
+
+class Command(BaseCommand):
+    help = "Rebuilds TradeSample aggregates (pnl, counts, total R, rules followed) from their trades."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only samples owned by this username.")
+        parser.add_argument(
+            '--verify', action='store_true',
+            help="Only report mismatches without fixing them; exits with an error if any are found.",
+        )
+
+    def handle(self, *args, **options):
+        samples = TradeSample.objects.all()
+        if options['user']:
+            samples = samples.filter(owner__username=options['user'])
+
+        mismatches = rebuild_aggregates(samples, fix=not options['verify'])
+
+        for sample_id, diff in mismatches.items():
+            details = ', '.join(f"{field}: {stored} != {computed}" for field, (stored, computed) in diff.items())
+            self.stdout.write(f"Sample {sample_id}: {details}")
+
+        if options['verify'] and mismatches:
+            raise CommandError(f"{len(mismatches)} sample(s) have stale aggregates.")
+
+        action = "Verified" if options['verify'] else "Rebuilt"
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {samples.count()} sample(s), {len(mismatches)} mismatch(es)."
+        ))
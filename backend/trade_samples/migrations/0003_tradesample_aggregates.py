@@ -0,0 +1,70 @@
+# Generated by Django 5.2 on 2026-10-18 12:46
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_aggregates(apps, schema_editor):
+    TradeSample = apps.get_model('trade_samples', 'TradeSample')
+    samples = TradeSample.objects.annotate(
+        computed_pnl=Coalesce(Sum('trades__realized_pnl'), Decimal('0.00')),
+        computed_trades_count=Count('trades'),
+        computed_wins=Count('trades', filter=Q(trades__outcome='WIN')),
+        computed_losses=Count('trades', filter=Q(trades__outcome='LOSS')),
+        computed_breakevens=Count('trades', filter=Q(trades__outcome='BE')),
+        computed_total_r=Coalesce(Sum('trades__realized_r_multiple'), Decimal('0.00')),
+        computed_rules_followed_count=Count('trades', filter=Q(trades__rules_followed=True)),
+    )
+    for sample in samples.iterator(chunk_size=500):
+        TradeSample.objects.filter(pk=sample.pk).update(
+            pnl=sample.computed_pnl,
+            trades_count=sample.computed_trades_count,
+            wins=sample.computed_wins,
+            losses=sample.computed_losses,
+            breakevens=sample.computed_breakevens,
+            total_r=sample.computed_total_r,
+            rules_followed_count=sample.computed_rules_followed_count,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trade_samples', '0002_alter_tradesample_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tradesample',
+            name='breakevens',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tradesample',
+            name='losses',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tradesample',
+            name='rules_followed_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tradesample',
+            name='total_r',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='tradesample',
+            name='trades_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tradesample',
+            name='wins',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
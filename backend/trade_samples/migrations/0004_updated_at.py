@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 12:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trade_samples', '0003_tradesample_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trade',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='tradesample',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_trade_owner(apps, schema_editor):
+    Trade = apps.get_model('trade_samples', 'Trade')
+    TradeSample = apps.get_model('trade_samples', 'TradeSample')
+    # Jeden UPDATE ze skorelowanym podzapytaniem zamiast zapisu każdego trade'a osobno
+    Trade.objects.filter(owner__isnull=True).update(
+        owner_id=Subquery(TradeSample.objects.filter(pk=OuterRef('sample_id')).values('owner_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trade_samples', '0005_trade_owner'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_trade_owner, migrations.RunPython.noop),
+    ]
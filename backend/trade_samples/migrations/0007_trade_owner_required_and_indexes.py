@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 12:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trade_samples', '0006_backfill_trade_owner'),
+        ('userentries', '0009_playbook_owner_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trade',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trades', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['owner', '-date'], name='trade_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['sample', '-date'], name='trade_sample_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['strategy', 'date'], name='trade_strategy_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tradesample',
+            index=models.Index(fields=['owner', '-start_date'], name='sample_owner_start_idx'),
+        ),
+    ]
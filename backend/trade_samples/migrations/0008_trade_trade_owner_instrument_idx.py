@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-18 13:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trade_samples', '0007_trade_owner_required_and_indexes'),
+        ('userentries', '0010_playbookitem'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['owner', 'instrument', '-date'], name='trade_owner_instrument_idx'),
+        ),
+    ]
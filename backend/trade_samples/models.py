@@ -13,9 +13,27 @@ class TradeSample(models.Model):
     grade = models.CharField(max_length=2, blank=True)
     pnl = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='trade_samples')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Agregaty utrzymywane przyrostowo przez trade_samples.aggregates
+    trades_count = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    breakevens = models.PositiveIntegerField(default=0)
+    total_r = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    rules_followed_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['-start_date']
+        indexes = [
+            models.Index(fields=['owner', '-start_date'], name='sample_owner_start_idx'),
+        ]
+
+    @property
+    def rules_followed_ratio(self):
+        if not self.trades_count:
+            return 0.0
+        return round(self.rules_followed_count / self.trades_count, 4)
 
     def __str__(self):
         return f"Sample {self.name} ({self.start_date})"
@@ -28,6 +46,8 @@ class Trade(models.Model):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     sample = models.ForeignKey(TradeSample, on_delete=models.CASCADE, related_name='trades')
+    # Zdenormalizowany właściciel próbki – filtrowanie bez joina do TradeSample
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='trades')
     strategy = models.ForeignKey(Playbook, on_delete=models.SET_NULL, null=True, blank=True, related_name='trades')
     date = models.DateTimeField()
     instrument = models.CharField(max_length=50)
@@ -42,9 +62,17 @@ class Trade(models.Model):
     rules_followed = models.BooleanField(default=True)
     context = models.TextField(blank=True)
     comment = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['owner', '-date'], name='trade_owner_date_idx'),
+            models.Index(fields=['sample', '-date'], name='trade_sample_date_idx'),
+            models.Index(fields=['strategy', 'date'], name='trade_strategy_date_idx'),
+            # Filtr ?instrument= z zakresem dat (api.filters)
+            models.Index(fields=['owner', 'instrument', '-date'], name='trade_owner_instrument_idx'),
+        ]
 
     def __str__(self):
         return f"{self.instrument} on {self.date.strftime('%Y-%m-%d')}"
\ No newline at end of file
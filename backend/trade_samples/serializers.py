@@ -1,7 +1,9 @@
 from rest_framework import serializers
+from api.importing import find_playbook
+from api.serializers import SparseFieldsetMixin
 from .models import TradeSample, Trade
 
-class TradeSerializer(serializers.ModelSerializer):
+class TradeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Trade
         fields = [
@@ -21,9 +23,9 @@ class TradeSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['sample'] 
 
-class TradeSampleSerializer(serializers.ModelSerializer):
-    trades = TradeSerializer(many=True, read_only=True)
-    trades_count = serializers.SerializerMethodField()
+class TradeSampleSummarySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Lista próbek bez zagnieżdżonych trade'ów – liczniki i PnL pochodzą z zapisanych agregatów
+    rules_followed_ratio = serializers.FloatField(read_only=True)
 
     class Meta:
         model = TradeSample
@@ -36,10 +38,70 @@ class TradeSampleSerializer(serializers.ModelSerializer):
             'grade', 
             'pnl', 
             'owner',
-            'trades',
-            'trades_count'
+            'trades_count',
+            'wins',
+            'losses',
+            'breakevens',
+            'total_r',
+            'rules_followed_ratio'
+        ]
+        read_only_fields = [
+            'owner',
+            'pnl',
+            'trades_count',
+            'wins',
+            'losses',
+            'breakevens',
+            'total_r'
         ]
-        read_only_fields = ['owner']
-    
-    def get_trades_count(self, obj):
-        return obj.trades.count()
\ No newline at end of file
+
+    def update(self, instance, validated_data):
+        # Zapisujemy tylko edytowane pola, żeby nie nadpisać agregatów zmienionych w międzyczasie
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
+
+class TradeSampleSerializer(TradeSampleSummarySerializer):
+    trades = TradeSerializer(many=True, read_only=True)
+
+    class Meta(TradeSampleSummarySerializer.Meta):
+        fields = TradeSampleSummarySerializer.Meta.fields + ['trades']
+
+
+class TradeImportSerializer(serializers.ModelSerializer):
+    # Powiązania rozwiązywane przez mapy z contextu (jedno zapytanie na import, nie na wiersz)
+    sample = serializers.CharField(required=False)
+    strategy = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+    class Meta:
+        model = Trade
+        fields = [
+            'sample',
+            'strategy',
+            'date',
+            'instrument',
+            'initial_risk_pips',
+            'initial_target_pips',
+            'realized_pnl',
+            'realized_r_multiple',
+            'outcome',
+            'rules_followed',
+            'context',
+            'comment',
+        ]
+
+    def validate_strategy(self, value):
+        if not value:
+            return None
+        return find_playbook(self.context['playbooks'], value)
+
+    def validate(self, attrs):
+        sample = self.context.get('sample')
+        if sample is None:
+            sample = self.context['samples'].get(str(attrs.get('sample', '')).lower())
+            if sample is None:
+                raise serializers.ValidationError({'sample': "Unknown trade sample."})
+        attrs['sample'] = sample
+        return attrs
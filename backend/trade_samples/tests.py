@@ -1,3 +1,252 @@
-from django.test import TestCase
+import copy
+import io
+import json
+from datetime import date
+from django.core.management import CommandError, call_command
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+from .aggregates import AGGREGATE_FIELDS, apply_trade_change, compute_aggregates
+from .models import Trade, TradeSample
 
-# Create your tests here.
+ROW = {'date': '2024-01-02T10:00:00Z', 'instrument': 'DAX', 'pnl': '50', 'r': '1', 'result': 'WIN'}
+
+
+class TradeImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trader')
+        cls.sample = TradeSample.objects.create(owner=cls.user, name="A", start_date=date(2024, 1, 1))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, name, content):
+        return self.client.post(
+            f'/api/samples/{self.sample.pk}/trades/import/',
+            {'file': SimpleUploadedFile(name, content.encode())}, format='multipart',
+        )
+
+    def test_csv_blank_optional_decimals_use_defaults(self):
+        content = "date,instrument,pnl,r,result,initial_risk_pips\n2024-01-02T10:00:00Z,DAX,50,1,WIN,\n"
+        response = self.upload('trades.csv', content)
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(self.sample.trades.get().initial_risk_pips, 0)
+
+    def test_json_list(self):
+        response = self.upload('trades.json', json.dumps([ROW, {**ROW, 'r': '-1', 'result': 'LOSS'}], indent=2))
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['created'], 2)
+
+    def test_json_must_be_a_list(self):
+        self.assertEqual(self.upload('trades.json', json.dumps(ROW)).status_code, 400)
+        self.assertEqual(self.upload('trades.json', '[{').status_code, 400)
+
+    def test_ndjson_lines(self):
+        response = self.upload('trades.ndjson', '\n'.join(json.dumps(row) for row in [ROW, ROW]))
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['created'], 2)
+
+    def test_empty_file(self):
+        for name in ('trades.csv', 'trades.json', 'trades.ndjson'):
+            response = self.upload(name, '')
+            self.assertEqual(response.status_code, 200, name)
+            self.assertEqual((response.data['created'], response.data['failed']), (0, 0))
+
+    def test_duplicate_playbook_titles_are_rejected(self):
+        first = self.user.playbooks.create(title="Breakout")
+        self.user.playbooks.create(title="breakout")
+
+        response = self.upload('trades.json', json.dumps([
+            {**ROW, 'playbook': 'BREAKOUT'}, {**ROW, 'playbook': str(first.pk)},
+        ]))
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+        self.assertIn('strategy', response.data['errors'][0]['errors'])
+        self.assertEqual(self.sample.trades.get().strategy, first)
+
+
+class AggregateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trader')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.sample = TradeSample.objects.create(owner=self.user, name="A", start_date=date(2024, 1, 1))
+        self.other = TradeSample.objects.create(owner=self.user, name="B", start_date=date(2024, 1, 1))
+
+    def add_trade(self, sample, r, outcome, pnl, rules_followed=True):
+        response = self.client.post(f'/api/samples/{sample.pk}/trades/', {
+            'date': '2024-01-02T10:00:00Z', 'instrument': 'DAX', 'realized_pnl': pnl, 'realized_r_multiple': r,
+            'outcome': outcome, 'rules_followed': rules_followed,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return Trade.objects.get(pk=response.data['id'])
+
+    def stored(self, sample):
+        return TradeSample.objects.filter(pk=sample.pk).values(*AGGREGATE_FIELDS).get()
+
+    def computed(self, sample):
+        row = compute_aggregates(TradeSample.objects.filter(pk=sample.pk)).get()
+        return {field: getattr(row, f'computed_{field}') for field in AGGREGATE_FIELDS}
+
+    def assert_consistent(self, *samples):
+        for sample in samples:
+            self.assertEqual(self.stored(sample), self.computed(sample))
+
+    def test_create_update_delete(self):
+        win = self.add_trade(self.sample, 2, 'WIN', 200)
+        self.add_trade(self.sample, -1, 'LOSS', -100, rules_followed=False)
+        self.add_trade(self.sample, 0, 'BE', 0)
+        self.assert_consistent(self.sample)
+        self.assertEqual(self.stored(self.sample), {
+            'pnl': 100, 'trades_count': 3, 'wins': 1, 'losses': 1, 'breakevens': 1, 'total_r': 1,
+            'rules_followed_count': 2,
+        })
+
+        response = self.client.patch(f'/api/samples/{self.sample.pk}/trades/{win.pk}/', {
+            'realized_r_multiple': -0.5, 'realized_pnl': -50, 'outcome': 'LOSS', 'rules_followed': False,
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assert_consistent(self.sample)
+
+        self.assertEqual(self.client.delete(f'/api/samples/{self.sample.pk}/trades/{win.pk}/').status_code, 204)
+        self.assert_consistent(self.sample)
+        self.assertEqual(self.stored(self.sample)['trades_count'], 2)
+
+    def test_move_between_samples(self):
+        trade = self.add_trade(self.sample, 2, 'WIN', 200)
+        self.add_trade(self.other, -1, 'LOSS', -100)
+
+        old = copy.copy(trade)
+        trade.sample = self.other
+        trade.save()
+        apply_trade_change(old, trade)
+
+        self.assert_consistent(self.sample, self.other)
+        self.assertEqual(self.stored(self.sample)['trades_count'], 0)
+        self.assertEqual(self.stored(self.other)['trades_count'], 2)
+
+    def test_interleaved_updates(self):
+        # Dwie edycje liczone z tego samego, starego stanu próbki – wyrażenia F() nie gubią żadnej
+        first, second = self.add_trade(self.sample, 1, 'WIN', 100), self.add_trade(self.sample, 1, 'WIN', 100)
+        old_first, old_second = copy.copy(first), copy.copy(second)
+
+        first.realized_r_multiple, first.realized_pnl, first.outcome = -1, -100, 'LOSS'
+        second.realized_r_multiple, second.realized_pnl = 3, 300
+        first.save()
+        second.save()
+        apply_trade_change(old_second, second)
+        apply_trade_change(old_first, first)
+
+        self.assert_consistent(self.sample)
+        self.assertEqual(self.stored(self.sample)['total_r'], 2)
+
+    def test_rebuild_command(self):
+        for r, outcome in [(2, 'WIN'), (-1, 'LOSS'), (1.5, 'WIN')]:
+            self.add_trade(self.sample, r, outcome, r * 100)
+        TradeSample.objects.filter(pk=self.sample.pk).update(pnl=0, trades_count=7, wins=0, total_r=0)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_sample_aggregates', '--verify', stdout=io.StringIO())
+        call_command('rebuild_sample_aggregates', stdout=io.StringIO())
+
+        self.assert_consistent(self.sample, self.other)
+        self.assertEqual(self.stored(self.sample)['trades_count'], 3)
+        call_command('rebuild_sample_aggregates', '--verify', stdout=io.StringIO())
+
+
+class SampleListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trader')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.sample = self.add_sample("A", [(2, 'WIN', 200, True), (-1, 'LOSS', -100, False)])
+
+    def add_sample(self, name, trades):
+        sample = TradeSample.objects.create(owner=self.user, name=name, start_date=date(2024, 1, 1))
+        for r, outcome, pnl, rules_followed in trades:
+            response = self.client.post(f'/api/samples/{sample.pk}/trades/', {
+                'date': '2024-01-02T10:00:00Z', 'instrument': 'DAX', 'realized_pnl': pnl, 'realized_r_multiple': r,
+                'outcome': outcome, 'rules_followed': rules_followed,
+            }, format='json')
+            self.assertEqual(response.status_code, 201, response.data)
+        return sample
+
+    def test_summary(self):
+        [row] = self.client.get('/api/samples/').data
+
+        self.assertNotIn('trades', row)
+        self.assertEqual(
+            {key: row[key] for key in ('trades_count', 'wins', 'losses', 'breakevens', 'rules_followed_ratio')},
+            {'trades_count': 2, 'wins': 1, 'losses': 1, 'breakevens': 0, 'rules_followed_ratio': 0.5},
+        )
+        self.assertEqual((float(row['pnl']), float(row['total_r'])), (100, 1))
+
+    def test_include_trades(self):
+        [row] = self.client.get('/api/samples/', {'include': 'trades'}).data
+        self.assertEqual(len(row['trades']), 2)
+        self.assertEqual(len(self.client.get(f'/api/samples/{self.sample.pk}/').data['trades']), 2)
+
+    def test_list_query_count_does_not_grow(self):
+        # Wersja dla ETag (z ?include=trades obejmuje też trade'y) i lista; trade'y jednym prefetchem
+        with self.assertNumQueries(2):
+            self.client.get('/api/samples/')
+        with self.assertNumQueries(3):
+            self.client.get('/api/samples/', {'include': 'trades'})
+
+        for i in range(5):
+            self.add_sample(f"Sample {i}", [(1, 'WIN', 100, True), (0, 'BE', 0, True)])
+        with self.assertNumQueries(2):
+            self.assertEqual(len(self.client.get('/api/samples/').data), 6)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/samples/', {'include': 'trades'})
+        self.assertEqual(sum(len(row['trades']) for row in response.data), 12)
+
+
+class TradeOwnerMigrationTests(TransactionTestCase):
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def migrate_to_latest(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_backfill_and_indexes(self):
+        # Kolejne testy potrzebują pełnego schematu
+        self.addCleanup(self.migrate_to_latest)
+        apps = self.migrate([('trade_samples', '0005_trade_owner')])
+        owner = apps.get_model('auth', 'User').objects.create(username='trader')
+        sample = apps.get_model('trade_samples', 'TradeSample').objects.create(
+            owner=owner, name="A", start_date=date(2024, 1, 1),
+        )
+        trade = apps.get_model('trade_samples', 'Trade').objects.create(
+            sample=sample, date='2024-01-02T10:00:00Z', instrument='DAX', realized_pnl=50, realized_r_multiple=1,
+            outcome='WIN',
+        )
+        self.assertIsNone(trade.owner_id)
+
+        self.migrate_to_latest()
+
+        self.assertEqual(Trade.objects.get(pk=trade.pk).owner_id, owner.pk)
+        with connection.cursor() as cursor:
+            indexes = set(connection.introspection.get_constraints(cursor, Trade._meta.db_table))
+            indexes |= set(connection.introspection.get_constraints(cursor, TradeSample._meta.db_table))
+        self.assertLessEqual({
+            'trade_owner_date_idx', 'trade_sample_date_idx', 'trade_strategy_date_idx', 'trade_owner_instrument_idx',
+            'sample_owner_start_idx',
+        }, indexes)
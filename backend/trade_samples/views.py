@@ -1,45 +1,103 @@
-from django.db.models import Sum
-from rest_framework import viewsets
+from django.db import transaction
+from django.db.models import Max, Min
+from django.shortcuts import get_object_or_404
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from api.importing import import_status, iter_upload_rows
+from api.mixins import ConditionalGetMixin, FacetsMixin
 from .models import TradeSample, Trade
-from .serializers import TradeSampleSerializer, TradeSerializer
+from .serializers import TradeSampleSerializer, TradeSampleSummarySerializer, TradeSerializer
+from .filters import TradeFilter
+from .aggregates import apply_trade_change, apply_trade_delta
+from .importers import TradeImporter
+from analytics.equity import refresh_curve, refresh_trade_curves
+from analytics.rollups import Source, refresh_rollups, refresh_rollups_for
 
 
-class TradeSampleViewSet(viewsets.ModelViewSet):
+class TradeSampleViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = TradeSampleSerializer
     permission_classes = [IsAuthenticated]
 
+    def _with_trades(self):
+        # Lista domyślnie w trybie podsumowania; ?include=trades dołącza trade'y jednym prefetchem
+        return self.action != 'list' or 'trades' in self.request.query_params.get('include', '').split(',')
+
     def get_queryset(self):
-        return self.request.user.trade_samples.all()
+        queryset = self.request.user.trade_samples.all()
+        if self._with_trades():
+            queryset = queryset.prefetch_related('trades')
+        return queryset
+
+    def get_version_querysets(self):
+        querysets = super().get_version_querysets()
+        if self._with_trades():
+            trades = self.request.user.trades.all()
+            if self.action == 'retrieve':
+                trades = trades.filter(sample_id=self.kwargs['pk'])
+            querysets.append(trades)
+        return querysets
+
+    def get_serializer_class(self):
+        if self._with_trades():
+            return TradeSampleSerializer
+        return TradeSampleSummarySerializer
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            # Trade'y próbki znikają kaskadowo (krzywa próbki razem z nimi) – krzywa konta i rollupy
+            # przeliczane w zakresie ich dat
+            span = instance.trades.aggregate(since=Min('date'), until=Max('date'))
+            instance.delete()
+            if span['since'] is not None:
+                refresh_curve(instance.owner_id, since=span['since'])
+                refresh_rollups(instance.owner_id, Source.TRADES, **span)
+
 
-class TradeViewSet(viewsets.ModelViewSet):
+class TradeViewSet(FacetsMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = TradeSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [TradeFilter]
 
     def get_queryset(self):
-        return Trade.objects.filter(sample__owner=self.request.user)
-
-    def _update_sample_pnl(self, sample):
-        total_pnl = sample.trades.aggregate(total=Sum('realized_pnl'))['total']
-        sample.pnl = total_pnl or 0.00
-        sample.save()
-        
+        return self.request.user.trades.all()
 
     def perform_create(self, serializer):
         sample_id = self.kwargs['sample_pk']
         sample = TradeSample.objects.get(id=sample_id, owner=self.request.user)
-        serializer.save(sample=sample)
-        self._update_sample_pnl(sample)
+        with transaction.atomic():
+            trade = serializer.save(sample=sample, owner=self.request.user)
+            apply_trade_delta(sample.pk, new=trade)
+            refresh_trade_curves(self.request.user.pk, [sample.pk], since=trade.date)
+            refresh_rollups_for(self.request.user.pk, Source.TRADES, [trade.date])
 
     def perform_update(self, serializer):
-        trade = serializer.save()
-        self._update_sample_pnl(trade.sample)
-    
+        with transaction.atomic():
+            # Blokada wiersza, żeby równoległa edycja nie policzyła tej samej różnicy dwa razy
+            old = Trade.objects.select_for_update().get(pk=serializer.instance.pk)
+            trade = serializer.save()
+            apply_trade_change(old, trade)
+            refresh_trade_curves(self.request.user.pk, [trade.sample_id], since=min(old.date, trade.date))
+            refresh_rollups_for(self.request.user.pk, Source.TRADES, [old.date, trade.date])
+
     def perform_destroy(self, instance):
-        sample = instance.sample
-        instance.delete()
-        self._update_sample_pnl(sample)
+        with transaction.atomic():
+            deleted, _ = Trade.objects.filter(pk=instance.pk).delete()
+            if deleted:
+                apply_trade_delta(instance.sample_id, old=instance)
+                refresh_trade_curves(self.request.user.pk, [instance.sample_id], since=instance.date)
+                refresh_rollups_for(self.request.user.pk, Source.TRADES, [instance.date])
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request, sample_pk=None):
+        sample = None
+        if sample_pk is not None:
+            sample = get_object_or_404(TradeSample, id=sample_pk, owner=request.user)
+
+        importer = TradeImporter(request, sample=sample)
+        summary = importer.run(iter_upload_rows(request, importer.aliases))
+        return Response(summary, status=import_status(summary['created'], summary['failed']))
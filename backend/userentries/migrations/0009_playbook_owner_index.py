@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 12:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userentries', '0008_playbook_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='playbook',
+            index=models.Index(fields=['owner', '-title'], name='playbook_owner_title_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2 on 2026-10-18 13:41
+
+import django.db.models.deletion
+import json
+from itertools import islice
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Kopia api.listitems / api.importing z chwili tej migracji – migracja nie może zależeć od bieżącego kodu aplikacji
+MAX_TEXT_LENGTH = 255
+
+
+def item_text(item, key=None):
+    if isinstance(item, dict) and key in item:
+        item = item[key]
+    if item is None:
+        return ''
+    text = item if isinstance(item, str) else json.dumps(item, sort_keys=True, ensure_ascii=False)
+    return text.strip()[:MAX_TEXT_LENGTH]
+
+
+def item_key(text):
+    return ' '.join(text.split()).casefold()[:MAX_TEXT_LENGTH]
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+FIELDS = (
+    'entry_criteria', 'exit_strategy', 'stop_loss_rules', 'enhancers', 'trade_management', 'checklist',
+    'trade_database',
+)
+KEYS = {}
+
+
+def backfill_items(apps, schema_editor):
+    Playbook = apps.get_model('userentries', 'Playbook')
+    PlaybookItem = apps.get_model('userentries', 'PlaybookItem')
+
+    def items():
+        for playbook in Playbook.objects.iterator(chunk_size=500):
+            for field in FIELDS:
+                values = getattr(playbook, field)
+                for position, item in enumerate(values if isinstance(values, list) else []):
+                    text = item_text(item, KEYS.get(field))
+                    if text:
+                        yield PlaybookItem(
+                            playbook=playbook, owner_id=playbook.owner_id, field=field, position=position,
+                            text=text, key=item_key(text),
+                        )
+
+    for batch in chunked(items(), 2000):
+        PlaybookItem.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userentries', '0009_playbook_owner_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlaybookItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('entry_criteria', 'entry_criteria'), ('exit_strategy', 'exit_strategy'), ('stop_loss_rules', 'stop_loss_rules'), ('enhancers', 'enhancers'), ('trade_management', 'trade_management'), ('checklist', 'checklist'), ('trade_database', 'trade_database')], max_length=30)),
+                ('position', models.PositiveIntegerField()),
+                ('text', models.CharField(max_length=255)),
+                ('key', models.CharField(max_length=255)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('playbook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='userentries.playbook')),
+            ],
+            options={
+                'ordering': ['field', 'position'],
+                'indexes': [models.Index(fields=['owner', 'field', 'key'], name='playbook_item_lookup_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_items, migrations.RunPython.noop),
+    ]
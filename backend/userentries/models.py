@@ -1,5 +1,4 @@
 from django.db import models
-from django.db.models import Avg
 import uuid
 from django.contrib.auth.models import User
 
@@ -30,16 +29,38 @@ class Playbook(models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='playbooks')
 
     trade_database = models.JSONField(default=list, blank=True)
-
-    @property
-    def calculated_ev(self):
-        logs = self.trade_logs.all()
-        if logs.exists():
-            return logs.aggregate(ev=Avg('realized_r'))['ev']
-        return 0.00
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-title']
+        indexes = [
+            models.Index(fields=['owner', '-title'], name='playbook_owner_title_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class PlaybookItem(models.Model):
+    # Elementy pól-list playbooka w osobnych wierszach (utrzymywane przez api.listitems) – filtrowanie po stronie bazy
+    FIELDS = (
+        'entry_criteria', 'exit_strategy', 'stop_loss_rules', 'enhancers', 'trade_management', 'checklist',
+        'trade_database',
+    )
+    KEYS = {}
+
+    playbook = models.ForeignKey(Playbook, on_delete=models.CASCADE, related_name='items')
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    field = models.CharField(max_length=30, choices=[(field, field) for field in FIELDS])
+    position = models.PositiveIntegerField()
+    text = models.CharField(max_length=255)
+    key = models.CharField(max_length=255)
+
+    class Meta:
+        ordering = ['field', 'position']
+        indexes = [
+            models.Index(fields=['owner', 'field', 'key'], name='playbook_item_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.field}[{self.position}]: {self.text}'
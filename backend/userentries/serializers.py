@@ -1,9 +1,25 @@
 from rest_framework import serializers
+from analytics.stats import attach_playbook_stats
+from api.serializers import SparseFieldsetMixin
 from .models import Playbook
 
-class PlaybookSerializer(serializers.ModelSerializer):
+
+class PlaybookListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Statystyki liczone hurtowo dla całej listy zamiast 2 zapytań na każdy playbook
+        playbooks = data.all() if hasattr(data, 'all') else data
+        if {'stats', 'calculated_ev'} & set(self.child.fields):
+            playbooks = attach_playbook_stats(playbooks)
+        return super().to_representation(playbooks)
+
+
+class PlaybookSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    calculated_ev = serializers.SerializerMethodField()
+    stats = serializers.SerializerMethodField()
+
     class Meta:
         model = Playbook
+        list_serializer_class = PlaybookListSerializer
         fields = [
             'id', 
             'title',
@@ -17,8 +33,20 @@ class PlaybookSerializer(serializers.ModelSerializer):
             'owner',
             'checklist',
             'trade_database',
-            'calculated_ev'
+            'calculated_ev',
+            'stats'
         ]
 
         read_only_fields = ['owner']
 
+    def _get_stats(self, obj):
+        if not hasattr(obj, 'stats'):
+            attach_playbook_stats([obj])
+        return obj.stats
+
+    def get_calculated_ev(self, obj):
+        return self._get_stats(obj).ev
+
+    def get_stats(self, obj):
+        return self._get_stats(obj).as_dict()
+
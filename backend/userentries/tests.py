@@ -1,3 +1,97 @@
+from base64 import b64encode
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+from analytics.models import Instrument, TradeLog
 
-# Create your tests here.
+
+class PlaybookPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trader')
+        # Powtarzające się tytuły – pierwsze pole kolejności (-title) nie wyznacza pozycji kursora
+        for title in ["Breakout"] * 5 + ["Reversal"] * 3 + ["Trend"]:
+            cls.user.playbooks.create(title=title)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def pages(self, url, key):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            pages.append([playbook['id'] for playbook in response.data['results']])
+            url = response.data[key]
+        return pages, response
+
+    def test_pages_cover_every_playbook_once(self):
+        expected = [str(pk) for pk in self.user.playbooks.order_by('-title', '-pk').values_list('pk', flat=True)]
+        pages, last = self.pages('/api/playbooks/?page_size=2', 'next')
+
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual(len(pages), 5)
+
+        # Z ostatniej strony wstecz – te same strony w odwrotnej kolejności
+        back, _ = self.pages(last.data['previous'], 'previous')
+        self.assertEqual(back, pages[-2::-1])
+
+    def test_invalid_cursor(self):
+        for position in ('p=oops', 'p=%5B%22x%22%2C%20%22y%22%5D', 'p=%5B1%5D'):
+            cursor = b64encode(position.encode()).decode()
+            response = self.client.get('/api/playbooks/', {'page_size': 2, 'cursor': cursor})
+            self.assertEqual(response.status_code, 404, position)
+
+    def test_without_page_size_returns_everything(self):
+        self.assertEqual(len(self.client.get('/api/playbooks/').data), 9)
+
+
+class PlaybookStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='trader')
+        cls.instrument = Instrument.objects.create(name='DAX')
+        cls.breakout = cls.add_playbook("Breakout", [2, -1, 3, -1])
+        cls.add_playbook("Reversal", [])
+
+    @classmethod
+    def add_playbook(cls, title, results):
+        playbook = cls.user.playbooks.create(title=title)
+        for r in results:
+            TradeLog.objects.create(
+                owner=cls.user, strategy=playbook, instrument=cls.instrument,
+                outcome=TradeLog.OutcomeChoices.WIN if r > 0 else TradeLog.OutcomeChoices.LOSS, realized_r=r,
+            )
+        return playbook
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        cache.clear()
+
+    def test_stats(self):
+        playbooks = {playbook['title']: playbook for playbook in self.client.get('/api/playbooks/').data}
+
+        self.assertEqual(playbooks["Breakout"]['calculated_ev'], 0.75)
+        self.assertEqual(playbooks["Breakout"]['stats'], {
+            'trade_count': 4, 'ev': 0.75, 'win_rate': 0.5, 'avg_win_r': 2.5, 'avg_loss_r': -1.0,
+            'profit_factor': 2.5, 'max_drawdown_r': 1.0,
+        })
+        self.assertEqual(playbooks["Reversal"]['stats']['trade_count'], 0)
+        self.assertIsNone(playbooks["Reversal"]['stats']['profit_factor'])
+        # Pojedynczy playbook liczy te same statystyki
+        response = self.client.get(f'/api/playbooks/{self.breakout.pk}/')
+        self.assertEqual(response.data['stats'], playbooks["Breakout"]['stats'])
+
+    def test_list_query_count_does_not_grow(self):
+        # Wersja dla ETag (jedno zapytanie na playbooki i logi), lista, drawdowny, statystyki
+        with self.assertNumQueries(4):
+            self.client.get('/api/playbooks/')
+
+        for i in range(10):
+            self.add_playbook(f"Playbook {i}", [1, -1])
+        cache.clear()
+        with self.assertNumQueries(4):
+            self.assertEqual(len(self.client.get('/api/playbooks/').data), 12)
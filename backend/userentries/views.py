@@ -1,15 +1,67 @@
+from django.db import transaction
+from django.db.models import Max, Min
 from django.shortcuts import render
+from django.utils import timezone
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
-from .models import Playbook
+from rest_framework.response import Response
+from analytics.engine import MONTE_CARLO_MAX_SYNC_STEPS, monte_carlo_options, playbook_monte_carlo
+from analytics.rollups import Source, refresh_rollups
+from api.listitems import sync_items
+from api.mixins import ConditionalGetMixin, JSONPatchMixin, ListItemsMixin
+from api.views import queue_job
+from .models import Playbook, PlaybookItem
 from .serializers import PlaybookSerializer
 
-class PlaybookViewSet(viewsets.ModelViewSet):
+class PlaybookViewSet(JSONPatchMixin, ListItemsMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = PlaybookSerializer
     permission_classes = [IsAuthenticated]
+    json_patch_fields = PlaybookItem.FIELDS
 
     def get_queryset(self):
         return self.request.user.playbooks.all()
 
+    def get_version_querysets(self):
+        # Statystyki w odpowiedzi zależą też od TradeLog
+        return super().get_version_querysets() + [self.request.user.analytics_trade_logs.all()]
+
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        with transaction.atomic():
+            playbook = serializer.save(owner=self.request.user)
+            sync_items(playbook)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            playbook = serializer.save()
+            sync_items(playbook, fields=serializer.validated_data)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            # Logi playbooka i ich rollupy znikają kaskadowo; trade'y zostają bez strategii,
+            # więc ich okresy przeliczamy ponownie
+            span = instance.trades.aggregate(since=Min('date'), until=Max('date'))
+            # SET_NULL nie zmienia updated_at – bez tego ETag list trade'ów nie zauważyłby zmiany strategii
+            instance.trades.update(updated_at=timezone.now())
+            instance.delete()
+            if span['since'] is not None:
+                refresh_rollups(instance.owner_id, Source.TRADES, **span)
+
+    @action(detail=True, methods=['get'], url_path='monte-carlo')
+    def monte_carlo(self, request, pk=None):
+        """
+        Bootstrap R-multiple'i z TradeLog: ?trades=100&paths=10000&seed=0&ruin_r=20.
+        Powyżej MONTE_CARLO_MAX_SYNC_STEPS (trades × paths) 202 z zadaniem monte-carlo zamiast wyniku.
+        """
+        playbook = self.get_object()
+        options = monte_carlo_options(request.query_params)
+        if options['n_trades'] * options['n_paths'] > MONTE_CARLO_MAX_SYNC_STEPS:
+            return queue_job(request, 'monte-carlo', {
+                'playbook': str(playbook.pk), 'trades': options['n_trades'], 'paths': options['n_paths'],
+                'seed': options['seed'], 'ruin_r': options['ruin_r'],
+            })
+        result = playbook_monte_carlo(request.user, playbook.pk, **options)
+        if result is None:
+            raise ValidationError("This playbook has no logged trades to resample.")
+        return Response(result)